@@ -0,0 +1,86 @@
+"""Binning engine vs the previous implementations.
+
+Run from the project root:
+    python -m benchmarks.bench_binning [rows ...]
+"""
+import sys
+import time
+from functools import reduce
+from typing import Any, Callable, List
+
+import numpy as np
+import pandas as pd
+
+from src.data_analysis.binning import count_grid, uniform_edges
+from src.data_analysis.visualization import _calculate_heatmap_data
+
+
+def _legacy_heatmap_data(df: pd.DataFrame) -> np.ndarray:
+    """The per-row reduce that _calculate_heatmap_data used before the binning
+    module."""
+
+    def __update_heatmap_data(acc: np.ndarray, row: Any) -> np.ndarray:
+        x_bin = min(int(row.tomatometer_rating // 10), 9)
+        y_bin = min(int(row.audience_rating // 10), 9)
+        acc[9 - y_bin, x_bin] += 1
+        return acc
+
+    return reduce(__update_heatmap_data, df.itertuples(), np.zeros((10, 10)))
+
+
+def _ratings_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "tomatometer_rating": rng.integers(0, 101, rows).astype(np.float64),
+            "audience_rating": rng.integers(0, 101, rows).astype(np.float64),
+            "runtime_in_minutes": rng.normal(105, 25, rows).round().clip(0, 280),
+        }
+    )
+
+
+def _best_of(func: Callable[[], object], repeat: int = 3) -> float:
+    def _once() -> float:
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
+
+    return min(_once() for _ in range(repeat))
+
+
+def run(sizes: List[int]) -> None:
+    runtime_bins = np.linspace(30, 240, 8)
+    rating_bins = uniform_edges(0, 100, 20)
+
+    print(
+        f"{'rows':>10} | {'heatmap legacy':>14} | {'heatmap new':>11} | "
+        f"{'histogram2d':>11} | {'count_grid':>10}"
+    )
+    for rows in sizes:
+        df = _ratings_frame(rows)
+        runtime = df["runtime_in_minutes"].to_numpy()
+        rating = df["tomatometer_rating"].to_numpy()
+
+        # results have to match before timings mean anything
+        assert np.array_equal(_legacy_heatmap_data(df), _calculate_heatmap_data(df))
+        assert np.array_equal(
+            np.histogram2d(runtime, rating, bins=(runtime_bins, rating_bins))[0],
+            count_grid(runtime, rating, runtime_bins, rating_bins, clip=False),
+        )
+
+        legacy = _best_of(lambda: _legacy_heatmap_data(df), repeat=1)
+        new = _best_of(lambda: _calculate_heatmap_data(df))
+        hist2d = _best_of(
+            lambda: np.histogram2d(runtime, rating, bins=(runtime_bins, rating_bins))
+        )
+        grid = _best_of(
+            lambda: count_grid(runtime, rating, runtime_bins, rating_bins, clip=False)
+        )
+        print(
+            f"{rows:>10,} | {legacy:>13.4f}s | {new:>10.4f}s | {hist2d:>10.4f}s | "
+            f"{grid:>9.4f}s"
+        )
+
+
+if __name__ == "__main__":
+    run([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -0,0 +1,106 @@
+"""Batched bootstrap CIs vs bootstrapping every group on its own.
+
+Run from the project root:
+    python -m benchmarks.bench_bootstrap [--rows 17000 1000000] [--groups 100]
+        [--resamples 10000] [--workers 1]
+
+Integer ratings 0-100 in ~100 year groups with uneven sizes. The per-group baseline
+draws a (resamples x size) index matrix per group with numpy, i.e. one loop iteration
+per year. The batched engine draws all groups at once (rows path / counts path per
+group). Intervals of both have to agree to within Monte Carlo noise.
+"""
+import argparse
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from src.data_analysis import bootstrap
+
+
+def _per_group(
+    values: np.ndarray, codes: np.ndarray, n_groups: int, resamples: int
+) -> Tuple[np.ndarray, ...]:
+    rng = np.random.default_rng(0)
+    low, high = np.full(n_groups, np.nan), np.full(n_groups, np.nan)
+    for group in range(n_groups):
+        own = values[codes == group]
+        if len(own):
+            means = own[rng.integers(0, len(own), (resamples, len(own)))].mean(axis=1)
+            low[group], high[group] = np.quantile(means, [0.025, 0.975])
+    return low, high
+
+
+def _data(rows: int, groups: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    # old years are sparse, like the real data
+    weights = np.linspace(0.05, 1, groups) ** 2
+    codes = rng.choice(groups, rows, p=weights / weights.sum())
+    return rng.integers(0, 101, rows).astype(np.float64), codes
+
+
+def run(rows_list: List[int], groups: int, resamples: int, workers: int) -> None:
+    print(f"{groups} groups, {resamples:,} resamples\n")
+    print(
+        f"{'rows':>10} | {'per group':>10} | {'batched':>10} | "
+        f"{f'{workers} workers':>10} | {'max CI diff':>11}"
+    )
+    for rows in rows_list:
+        values, codes = _data(rows, groups)
+        start = time.perf_counter()
+        low, high = (
+            _per_group(values, codes, groups, resamples)
+            if rows * resamples <= 2 * 10**9
+            else (None, None)
+        )
+        per_group = time.perf_counter() - start
+
+        start = time.perf_counter()
+        ci = bootstrap.bootstrap_mean_ci(values, codes, groups, resamples)
+        batched = time.perf_counter() - start
+        start = time.perf_counter()
+        parallel = bootstrap.bootstrap_mean_ci(
+            values, codes, groups, resamples, workers=workers
+        )
+        in_workers = time.perf_counter() - start
+        assert np.array_equal(
+            ci.low, parallel.low, equal_nan=True
+        ), "workers changed the intervals"
+
+        diff = (
+            "n/a"
+            if low is None
+            else f"{np.nanmax(np.abs(np.r_[ci.low - low, ci.high - high])):.3f}"
+        )
+        baseline = "skipped" if low is None else f"{per_group:.2f}s"
+        print(
+            f"{rows:>10,} | {baseline:>10} | {batched:>9.2f}s | {in_workers:>9.2f}s | "
+            f"{diff:>11}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Bootstrap confidence interval benchmark"
+    )
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[17_000, 1_000_000], help="rows per case"
+    )
+    parser.add_argument(
+        "--groups", type=int, default=100, help="groups (years) (default: 100)"
+    )
+    parser.add_argument(
+        "--resamples",
+        type=int,
+        default=10_000,
+        help="bootstrap resamples (default: 10000)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="worker processes of the parallel run"
+    )
+    args = parser.parse_args(argv)
+    run(args.rows, args.groups, args.resamples, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Memory-mapped .npy store vs the processed-data cache, per fresh process.
+
+Run from the project root:
+    python -m benchmarks.bench_mmap [--rows 1000000]
+
+Every case runs in a new (spawned) process: open the data, then produce one output from
+it -> the insights report, or the heatmap + runtime plots. Reported: time to open, time
+to the output and the resident / anonymous memory of the process afterwards (Linux, from
+/proc). Mapped pages belong to the page cache (shared with any other process reading the
+same store, dropped by the OS under pressure), they count as resident but not as
+anonymous memory. Outputs have to match first.
+"""
+import argparse
+import multiprocessing
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Tuple
+
+from benchmarks.synthetic import synthetic_csv
+from src.data_analysis.data_processing import read_movie_data
+from src.data_analysis.mmap_store import open_mmap_store, write_mmap_store
+from src.data_analysis.render_cache import INSIGHT_COLUMNS
+from src.utils.types import PlotConfig
+
+# What the heatmap and runtime plots read
+HEATMAP_RUNTIME_COLUMNS = [
+    "tomatometer_rating",
+    "audience_rating",
+    "runtime_in_minutes",
+]
+
+
+def _memory() -> Tuple[int, int]:
+    """(resident, anonymous) bytes of this process, zeros where /proc is not
+    available"""
+    try:
+        lines = Path("/proc/self/smaps_rollup").read_text().splitlines()
+    except OSError:
+        return 0, 0
+    sizes = {line.split(":")[0]: int(line.split()[1]) * 1024 for line in lines[1:]}
+    return sizes.get("Rss", 0), sizes.get("Anonymous", 0)
+
+
+def _case(
+    source: str,
+    path: Path,
+    cache_dir: Path,
+    columns: Optional[Sequence[str]],
+    output: str,
+    output_dir: Path,
+) -> tuple:
+    start = time.perf_counter()
+    data = (
+        read_movie_data(path, cache_dir=cache_dir)
+        if source == "cache"
+        else open_mmap_store(path, columns)
+    )
+    opened = time.perf_counter() - start
+
+    if output == "insights":
+        from src.data_analysis.data_insights import generate_key_insights
+
+        generate_key_insights(data, output_dir)
+        written = [output_dir / "movie_insights.md"]
+    else:
+        from src.data_analysis.visualization import (
+            create_heatmap,
+            create_runtime_analysis,
+            plot_filename,
+            save_plot,
+        )
+
+        written = []
+        for name, func in (
+            ("heatmap", create_heatmap),
+            ("runtime", create_runtime_analysis),
+        ):
+            save_plot(func(data, PlotConfig()), name, output_dir, PlotConfig())
+            written.append(output_dir / plot_filename(name))
+    done = time.perf_counter() - start
+    return opened, done, *_memory(), [Path(file).read_bytes() for file in written]
+
+
+def _in_fresh_process(*args: Any) -> tuple:
+    with ProcessPoolExecutor(
+        max_workers=1, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        return pool.submit(_case, *args).result()
+
+
+def run(rows: int, data_dir: Optional[Path] = None) -> None:
+    csv_path = synthetic_csv(rows, data_dir)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp = Path(tmp_dir)
+        # fills the cache -> the baseline reads are warm
+        data = read_movie_data(csv_path, cache_dir=tmp / "cache")
+        start = time.perf_counter()
+        write_mmap_store(data, tmp / "mmap")
+        print(
+            f"{rows:,} rows, memory-mapped store written in "
+            f"{time.perf_counter() - start:.2f}s\n"
+        )
+        del data
+
+        print(
+            f"{'output':>8} | {'source':>18} | {'open':>7} | {'output':>7} | "
+            f"{'resident':>9} | {'anonymous':>9}"
+        )
+        for output, columns in (
+            ("insights", INSIGHT_COLUMNS),
+            ("plots", HEATMAP_RUNTIME_COLUMNS),
+        ):
+            cases = [
+                ("cache", csv_path, None),
+                ("mmap, all columns", tmp / "mmap", None),
+                (f"mmap, {len(columns)} columns", tmp / "mmap", columns),
+            ]
+            results = [
+                _in_fresh_process(
+                    source.split(",")[0],
+                    path,
+                    tmp / "cache",
+                    cols,
+                    output,
+                    tmp / f"out{i}",
+                )
+                for i, (source, path, cols) in enumerate(cases)
+            ]
+            assert all(
+                result[4] == results[0][4] for result in results
+            ), f"{output} differ between sources"
+            for (source, _, _), (opened, done, resident, anonymous, _) in zip(
+                cases, results
+            ):
+                print(
+                    f"{output:>8} | {source:>18} | {opened:>6.3f}s | {done:>6.2f}s | "
+                    f"{resident / 2**20:>5.0f} MiB | {anonymous / 2**20:>5.0f} MiB"
+                )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Memory-mapped store benchmark")
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=1_000_000,
+        help="rows of the synthetic CSV (default: 1000000)",
+    )
+    parser.add_argument(
+        "--data-dir",
+        type=Path,
+        default=None,
+        help="where synthetic CSVs are generated/reused",
+    )
+    args = parser.parse_args(argv)
+    run(args.rows, args.data_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Partitioned store vs reading the whole processed frame, for year / genre restricted
+runs.
+
+Run from the project root:
+    python -m benchmarks.bench_partitions [--rows 1000000] [--partition-by decade genre]
+
+The baseline is the processed-data cache (read_movie_data, warm) filtered in memory, the
+store reads only the partitions its manifest can't rule out. Both results have to be
+identical before timings are printed.
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_csv
+from src.data_analysis.data_processing import read_movie_data
+from src.data_analysis.partitioned_store import (
+    DEFAULT_PARTITION_BY,
+    PartitionFilter,
+    filter_rows,
+    prune_partitions,
+    read_partitioned,
+    write_partitioned,
+)
+
+QUERIES = [
+    ("everything", PartitionFilter()),
+    ("one decade", PartitionFilter(years=(1990, 1999))),
+    ("five years", PartitionFilter(years=(2005, 2009))),
+    ("one genre", PartitionFilter(genres=("Western",))),
+    ("genre + decade", PartitionFilter(years=(2000, 2009), genres=("Animation",))),
+    ("fresh + recent", PartitionFilter(years=(2015, 2020), tomatometer=(90, 100))),
+]
+
+
+def _best_of(func: Callable[[], object], repeat: int) -> float:
+    def _once() -> float:
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
+
+    return min(_once() for _ in range(repeat))
+
+
+def run(rows: int, by: List[str], repeat: int, data_dir: Optional[Path] = None) -> None:
+    csv_path = synthetic_csv(rows, data_dir)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir, root = Path(tmp) / "cache", Path(tmp) / "store"
+        # fills the cache -> the baseline reads are warm
+        data = read_movie_data(csv_path, cache_dir=cache_dir)
+        start = time.perf_counter()
+        manifest = write_partitioned(data, root, by)
+        print(
+            f"{rows:,} rows, {len(manifest['partitions'])} partitions by {by}, "
+            f"written in {time.perf_counter() - start:.2f}s\n"
+        )
+
+        print(
+            f"{'query':>15} | {'partitions':>10} | {'rows read':>10} | "
+            f"{'full read':>9} | {'store':>8} | {'speedup':>7}"
+        )
+        for name, filters in QUERIES:
+            selected = prune_partitions(manifest, filters)
+            pd.testing.assert_frame_equal(
+                read_partitioned(root, filters).df,
+                filter_rows(read_movie_data(csv_path, cache_dir=cache_dir).df, filters),
+            )
+
+            full = _best_of(
+                lambda: filter_rows(
+                    read_movie_data(csv_path, cache_dir=cache_dir).df, filters
+                ),
+                repeat,
+            )
+            store = _best_of(lambda: read_partitioned(root, filters), repeat)
+            share = sum(entry["rows"] for entry in selected) / max(manifest["rows"], 1)
+            print(
+                f"{name:>15} | {len(selected):>4}/{len(manifest['partitions']):<5} | "
+                f"{share:>9.1%} | "
+                f"{full:>8.3f}s | {store:>7.3f}s | {full / store:>6.1f}x"
+            )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Partitioned store benchmark")
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=1_000_000,
+        help="rows of the synthetic CSV (default: 1000000)",
+    )
+    parser.add_argument(
+        "--partition-by",
+        nargs="+",
+        default=list(DEFAULT_PARTITION_BY),
+        help="partition keys (default: decade)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="runs per query, best one is kept"
+    )
+    parser.add_argument(
+        "--data-dir",
+        type=Path,
+        default=None,
+        help="where synthetic CSVs are generated/reused",
+    )
+    args = parser.parse_args(argv)
+    run(args.rows, args.partition_by, args.repeat, args.data_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""Request latency of `main.py serve` vs running `main.py insights` per request.
+
+Run from the project root:
+    python -m benchmarks.bench_server [--rows 1000000] [--requests 200]
+        [--plot-workers 1]
+
+Starts the server on a free port in a subprocess, then per scenario sends requests over
+a few keep-alive connections and reports p50 / p99 / max latency:
+- repeated insights: the same query again -> answered from the response cache
+- new insight queries: a different k / year range every time -> computed on the
+  single query thread, so with several connections the latency includes waiting for
+  the queries ahead
+- insights during plots: new insight queries while distinct plots are rendering ->
+  shows they are not queued behind the plot workers
+- new plots: a different year range every time (preview profile)
+The baseline is the wall time of one `main.py insights` run on the same CSV
+(processed-data cache warm).
+"""
+import argparse
+import asyncio
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_csv
+from src.utils.config import ProjectConfig
+
+CONNECTIONS = 4
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port: int = sock.getsockname()[1]
+        return port
+
+
+async def _get(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter, path: str
+) -> Tuple[int, bytes]:
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+    return status, await reader.readexactly(length)
+
+
+async def _latencies(
+    port: int, paths: Sequence[str], connections: int = CONNECTIONS
+) -> List[float]:
+    """Milliseconds per request, paths are spread over keep-alive connections"""
+
+    async def _client(own: Sequence[str]) -> List[float]:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        timings = []
+        for path in own:
+            start = time.perf_counter()
+            status, _ = await _get(reader, writer, path)
+            timings.append((time.perf_counter() - start) * 1000)
+            assert status == 200, f"{path} -> {status}"
+        writer.close()
+        return timings
+
+    results = await asyncio.gather(
+        *(_client(paths[i::connections]) for i in range(connections))
+    )
+    return [timing for timings in results for timing in timings]
+
+
+async def _during_plots(
+    port: int, insight_paths: Sequence[str], plot_paths: Sequence[str]
+) -> List[float]:
+    plots = asyncio.ensure_future(_latencies(port, plot_paths, connections=2))
+    await asyncio.sleep(0.05)  # plots are queued first
+    timings = await _latencies(port, insight_paths)
+    await plots
+    return timings
+
+
+async def _wait_until_up(port: int, timeout: float) -> float:
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            await _get(reader, writer, "/health")
+            writer.close()
+            return time.perf_counter() - start
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise TimeoutError(f"server did not start within {timeout}s")
+
+
+def _report(name: str, timings: Sequence[float]) -> None:
+    p50, p99 = np.percentile(timings, [50, 99])
+    print(
+        f"{name:>24} | {len(timings):>8} | {p50:>8.2f} | {p99:>8.2f} | "
+        f"{max(timings):>8.2f}"
+    )
+
+
+def run(
+    rows: int, requests: int, plot_workers: int, data_dir: Optional[Path] = None
+) -> None:
+    csv_path = synthetic_csv(rows, data_dir)
+    main_py = str(ProjectConfig.PROJECT_ROOT / "src" / "main.py")
+    with tempfile.TemporaryDirectory() as tmp:
+        # baseline, the second run has a warm processed-data cache
+        for _ in range(2):
+            start = time.perf_counter()
+            subprocess.run(
+                [
+                    sys.executable,
+                    main_py,
+                    "insights",
+                    "--data",
+                    str(csv_path),
+                    "--output",
+                    tmp,
+                    "--force",
+                ],
+                check=True,
+                capture_output=True,
+                cwd=ProjectConfig.PROJECT_ROOT,
+            )
+            baseline = time.perf_counter() - start
+
+        port = _free_port()
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                main_py,
+                "serve",
+                "--data",
+                str(csv_path),
+                "--port",
+                str(port),
+                "--plot-workers",
+                str(plot_workers),
+                "--render-profile",
+                "preview",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            cwd=ProjectConfig.PROJECT_ROOT,
+        )
+        try:
+            startup = asyncio.run(_wait_until_up(port, timeout=300))
+            print(
+                f"{rows:,} rows, {plot_workers} plot workers, server up in "
+                f"{startup:.1f}s, "
+                f"`main.py insights` takes {baseline * 1000:.0f} ms per call\n"
+            )
+            print(
+                f"{'scenario':>24} | {'requests':>8} | {'p50 ms':>8} | {'p99 ms':>8} | "
+                f"{'max ms':>8}"
+            )
+
+            years = [
+                (low, low + span) for span in (5, 10, 20) for low in range(1930, 2015)
+            ]
+            new_insights = [
+                f"/insights?k={10 + i % 20}&years={low},{high}"
+                for i, (low, high) in enumerate(years)
+            ]
+            # computed once, cached from here on
+            asyncio.run(_latencies(port, ["/insights?k=10"], connections=1))
+            _report(
+                "repeated insights",
+                asyncio.run(_latencies(port, ["/insights?k=10"] * requests)),
+            )
+            _report(
+                "new insight queries",
+                asyncio.run(_latencies(port, new_insights[:requests])),
+            )
+
+            plot_paths = [
+                f"/plots/{name}?years={low},{high}"
+                for low, high in years[::7]
+                for name in ("heatmap", "trends")
+            ][:24]
+            during = [
+                f"/insights/top_rated?k={5 + i % 40}&years={low},{high}"
+                for i, (low, high) in enumerate(reversed(years))
+            ][:requests]
+            _report(
+                "insights during plots",
+                asyncio.run(_during_plots(port, during, plot_paths)),
+            )
+            _report(
+                "new plots",
+                asyncio.run(
+                    _latencies(
+                        port,
+                        [
+                            f"/plots/runtime?years={low},{high}"
+                            for low, high in years[3::11]
+                        ][:12],
+                        connections=2,
+                    )
+                ),
+            )
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Analysis server latency benchmark")
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=1_000_000,
+        help="rows of the synthetic CSV (default: 1000000)",
+    )
+    parser.add_argument(
+        "--requests",
+        type=int,
+        default=200,
+        help="requests per insight scenario (default: 200)",
+    )
+    parser.add_argument(
+        "--plot-workers",
+        type=int,
+        default=1,
+        help="plot worker processes of the server",
+    )
+    parser.add_argument(
+        "--data-dir",
+        type=Path,
+        default=None,
+        help="where synthetic CSVs are generated/reused",
+    )
+    args = parser.parse_args(argv)
+    run(args.rows, args.requests, args.plot_workers, args.data_dir)
+
+
+if __name__ == "__main__":
+    main()
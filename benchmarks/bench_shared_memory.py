@@ -0,0 +1,168 @@
+"""Shipping the processed frame to worker processes: a pickled copy per worker vs one
+shared memory segment.
+
+Run from the project root:
+    python -m benchmarks.bench_shared_memory [--rows 1000000] [--workers 4]
+        [--start-method spawn]
+
+Every worker runs the per-genre top-rated table for a few genres. Reported per mode:
+bytes sent to each worker, wall time of the whole pool and the private memory of the
+workers (Linux, from /proc) -> the pickled mode grows with the worker count, the shared
+one does not. Results have to match first.
+
+spawn (default here, and on macOS / Windows) pickles the initializer arguments for every
+worker. With fork the pickled frame is inherited copy-on-write instead, which only stays
+shared until pandas touches the objects.
+"""
+import argparse
+import multiprocessing
+import os
+import pickle
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Union
+
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_csv
+from src.data_analysis.data_insights import top_rated_frame
+from src.data_analysis.data_processing import read_movie_data
+from src.data_analysis.genre_index import genre_mask
+from src.data_analysis.shared_frame import (
+    SharedFrameDescriptor,
+    attach_movie_data,
+    share_movie_data,
+)
+from src.utils.types import MovieData
+
+GENRES = [
+    "Drama",
+    "Comedy",
+    "Action & Adventure",
+    "Horror",
+    "Documentary",
+    "Animation",
+    "Western",
+    "Romance",
+]
+
+_data: Optional[MovieData] = None
+
+
+def _init(payload: Union[SharedFrameDescriptor, pd.DataFrame]) -> None:
+    global _data
+    _data = (
+        attach_movie_data(payload)
+        if isinstance(payload, SharedFrameDescriptor)
+        else MovieData(df=payload)
+    )
+
+
+def _genre_top(genre: str) -> tuple:
+    if _data is None:
+        raise RuntimeError("Worker was started without _init")
+    rows = _data.df[genre_mask(_data.view("genre_index"), genre)]
+    return genre, top_rated_frame(rows, 10)["movie_title"].tolist(), _private_bytes()
+
+
+def _private_bytes() -> int:
+    """Private (not shared) resident memory of this process, 0 where /proc is not
+    available"""
+    try:
+        lines = Path("/proc/self/smaps_rollup").read_text().splitlines()
+    except OSError:
+        return 0
+    return sum(
+        int(line.split()[1]) * 1024
+        for line in lines
+        if line.startswith(("Private_Clean", "Private_Dirty"))
+    )
+
+
+def _run_pool(
+    payload: Union[SharedFrameDescriptor, pd.DataFrame], workers: int, start_method: str
+) -> tuple:
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init,
+        initargs=(payload,),
+        mp_context=multiprocessing.get_context(start_method),
+    ) as pool:
+        results = list(pool.map(_genre_top, GENRES))
+    return time.perf_counter() - start, results
+
+
+def run(
+    rows: int,
+    workers: int,
+    start_method: str = "spawn",
+    data_dir: Optional[Path] = None,
+) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        data = read_movie_data(synthetic_csv(rows, data_dir), cache_dir=Path(tmp))
+    print(
+        f"{rows:,} rows, {workers} {start_method} workers, {len(GENRES)} per-genre "
+        "tables\n"
+    )
+    print(
+        f"{'mode':>8} | {'sent per worker':>15} | {'wall':>7} | "
+        f"{'max worker private':>18}"
+    )
+
+    pickled_seconds, pickled = _run_pool(data.df, workers, start_method)
+    with share_movie_data(data) as shared:
+        shared_seconds, from_shared = _run_pool(
+            shared.descriptor, workers, start_method
+        )
+        sent = {
+            "pickled": len(pickle.dumps(data.df)),
+            "shared": len(pickle.dumps(shared.descriptor)),
+        }
+
+    assert [r[:2] for r in pickled] == [
+        r[:2] for r in from_shared
+    ], "shared memory results differ"
+    for mode, seconds, results in (
+        ("pickled", pickled_seconds, pickled),
+        ("shared", shared_seconds, from_shared),
+    ):
+        print(
+            f"{mode:>8} | {sent[mode] / 2**20:>11.2f} MiB | {seconds:>6.2f}s | "
+            f"{max(r[2] for r in results) / 2**20:>14.1f} MiB"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Shared memory vs pickled frames for worker processes"
+    )
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=1_000_000,
+        help="rows of the synthetic CSV (default: 1000000)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=min(4, os.cpu_count() or 1), help="pool size"
+    )
+    parser.add_argument(
+        "--start-method",
+        choices=multiprocessing.get_all_start_methods(),
+        default="spawn",
+        help="how workers are started (default: spawn)",
+    )
+    parser.add_argument(
+        "--data-dir",
+        type=Path,
+        default=None,
+        help="where synthetic CSVs are generated/reused",
+    )
+    args = parser.parse_args(argv)
+    run(args.rows, args.workers, args.start_method, args.data_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Start-up cost of every CLI command, measured the way cron runs it: a fresh
+interpreter per call.
+
+Run from the project root:
+    python -m benchmarks.bench_startup [--rows 2000] [--repeat 5]
+
+Each command runs --repeat times under `python -X importtime`, the best wall time is
+kept and the import time is the sum of the self times reported by the interpreter. The
+first run of every command also fills the processed-data cache, so the best run is the
+warm one. Exits with code 1 when the insights command imports a plotting library.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from benchmarks.synthetic import synthetic_csv
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+MAIN = PROJECT_ROOT / "src" / "main.py"
+COMMANDS = ["insights", "plots", "all"]
+PLOTTING_MODULES = {"matplotlib", "seaborn"}
+
+
+def _import_report(stderr: str) -> Dict[str, float]:
+    """Top-level package -> seconds spent importing it (self times), from -X importtime
+    output.
+
+    Lines look like 'import time:       123 |      4567 |   pandas.core', the header
+    line is skipped.
+    """
+    packages: Dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0.0) + int(self_us) / 1e6
+    return packages
+
+
+def run_command(
+    command: str,
+    csv_path: Path,
+    output_dir: Path,
+    cache_dir: Path,
+    options: Sequence[str] = (),
+) -> tuple[float, Dict[str, float]]:
+    """Wall time and import report of one fresh `main.py command` process, options are
+    passed on to main.py."""
+    env = {**os.environ, "PYTHONPATH": str(PROJECT_ROOT)}
+    start = time.perf_counter()
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            str(MAIN),
+            command,
+            "--data",
+            str(csv_path),
+            "--output",
+            str(output_dir),
+            "--cache-dir",
+            str(cache_dir),
+            *options,
+        ],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    seconds = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"{command} failed:\n{result.stderr[-2000:]}")
+    return seconds, _import_report(result.stderr)
+
+
+def run(rows: int, repeat: int, data_dir: Optional[Path] = None) -> List[str]:
+    """Print one row per command, return the commands that imported a plotting library
+    without drawing."""
+    csv_path = synthetic_csv(rows, data_dir)
+    offenders = []
+
+    print(
+        f"{'command':>9} | {'best wall':>9} | {'imports':>8} | {'pandas':>7} | "
+        f"{'matplotlib':>10} | {'seaborn':>7}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for command in COMMANDS:
+            runs = [
+                run_command(command, csv_path, Path(tmp) / command, Path(tmp) / "cache")
+                for _ in range(repeat)
+            ]
+            seconds, imports = min(runs, key=lambda r: r[0])
+            print(
+                f"{command:>9} | {seconds:>8.3f}s | {sum(imports.values()):>7.3f}s | "
+                f"{imports.get('pandas', 0):>6.3f}s | "
+                f"{imports.get('matplotlib', 0):>9.3f}s | "
+                f"{imports.get('seaborn', 0):>6.3f}s"
+            )
+            if command == "insights" and PLOTTING_MODULES & imports.keys():
+                offenders.append(command)
+    return offenders
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="CLI start-up benchmark")
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=2_000,
+        help="rows of the synthetic CSV (default: 2000)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="fresh processes per command, best one is kept",
+    )
+    parser.add_argument(
+        "--data-dir",
+        type=Path,
+        default=None,
+        help="where synthetic CSVs are generated/reused",
+    )
+    args = parser.parse_args(argv)
+
+    offenders = run(args.rows, args.repeat, args.data_dir)
+    if offenders:
+        print(f"Plotting libraries imported by: {', '.join(offenders)}")
+    return 1 if offenders else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,427 @@
+"""Benchmark suite: every pipeline stage, insight and plot on synthetic data.
+
+Rows in the table are the synthetic input rows, insights and plots run on what survives
+filtering.
+
+Run from the project root:
+    python -m benchmarks.run_benchmarks --rows 10000 100000 1000000
+    python -m benchmarks.run_benchmarks --rows 100000 --save-baseline
+    python -m benchmarks.run_benchmarks --rows 100000 \
+        --baseline benchmarks/baseline.json
+
+Every measurement is timed without tracing (best of --repeat runs) and then run once
+more under tracemalloc for the peak of Python-side allocations (numpy and pandas buffers
+included). The bytes of the ingested frame (plain read_csv vs the declared ingest
+schema, per column) are recorded as well. Results are written as JSON; with --baseline
+the run fails (exit code 1) when a measurement got slower or hungrier, or the ingested
+frame bigger, than the baseline by more than --tolerance.
+"""
+import argparse
+import json
+import logging
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import matplotlib
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_csv
+from src.data_analysis import data_processing
+from src.data_analysis.aggregation import RATING_COLUMNS
+from src.data_analysis.data_insights import (
+    find_rating_discrepancies,
+    generate_key_insights,
+    get_genre_statistics,
+    get_top_rated_movies,
+    ranked_movies,
+)
+from src.data_analysis.ranking import TOP_RATED
+from src.data_analysis.reporting import (
+    REPORT_FORMATS,
+    Report,
+    frame_table,
+    write_report,
+)
+from src.data_analysis.visualization import (
+    create_genre_comparison,
+    create_heatmap,
+    create_runtime_analysis,
+    create_yearly_trends,
+    save_plot,
+)
+from src.utils.types import RENDER_PROFILES, MovieData, PlotConfig, render_profile
+
+plt.switch_backend("Agg")  # benchmarks never open windows
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+DEFAULT_RESULTS = BENCHMARK_DIR / "results" / "latest.json"
+DEFAULT_BASELINE = BENCHMARK_DIR / "baseline.json"
+
+# Differences below these are noise, never reported as regressions
+MIN_SECONDS = 0.005
+MIN_BYTES = 1 << 20
+
+Measurement = Dict[str, Any]
+
+
+def _measure(
+    func: Callable[..., Any], repeat: int, setup: Optional[Callable[[], Any]] = None
+) -> Tuple[float, int]:
+    """Best wall time of repeat runs and the tracemalloc peak of one extra run.
+
+    setup runs before every call and is not measured, its result is passed to func.
+    """
+
+    def _once() -> float:
+        argument = setup() if setup else None
+        start = time.perf_counter()
+        func(argument) if setup else func()
+        return time.perf_counter() - start
+
+    seconds = min(_once() for _ in range(repeat))
+
+    argument = setup() if setup else None
+    tracemalloc.start()
+    try:
+        func(argument) if setup else func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return seconds, peak
+
+
+def _record(group: str, name: str, rows: int, seconds: float, peak: int) -> Measurement:
+    print(
+        f"{group:>9} | {name:<28} | {rows:>11,} | {seconds:>9.4f}s | "
+        f"{peak / 2 ** 20:>9.1f} MiB",
+        flush=True,
+    )
+    return {
+        "group": group,
+        "name": name,
+        "rows": rows,
+        "seconds": seconds,
+        "peak_bytes": peak,
+    }
+
+
+def benchmark_stages(
+    csv_path: Path, rows: int, repeat: int
+) -> Tuple[List[Measurement], pd.DataFrame]:
+    """Ingest plus every processing stage, each stage gets the output of the previous
+    one."""
+    results = [
+        _record(
+            "ingest",
+            "read_csv",
+            rows,
+            *_measure(lambda: data_processing._read_csv(csv_path), repeat),
+        )
+    ]
+
+    frame = data_processing._read_csv(csv_path)
+    for stage in data_processing._processing_stages():
+        results.append(
+            _record(
+                "stage", stage.__name__, rows, *_measure(lambda: stage(frame), repeat)
+            )
+        )
+        frame = stage(frame)
+    return results, frame
+
+
+def ingest_memory(csv_path: Path, rows: int) -> Dict[str, Any]:
+    """Per-column bytes of a plain pd.read_csv vs the ingest schema
+    (data_processing.ingest_memory_report)."""
+    report = data_processing.ingest_memory_report(csv_path)
+    before, after = (
+        int(report.loc["total", col]) for col in ("bytes_before", "bytes_after")
+    )
+    print(
+        f"{'memory':>9} | {'ingest_schema':<28} | {rows:>11,} | "
+        f"{before / 2 ** 20:>8.1f} MiB -> "
+        f"{after / 2 ** 20:.1f} MiB",
+        flush=True,
+    )
+    return {
+        "rows": rows,
+        "bytes_before": before,
+        "bytes_after": after,
+        "columns": report.drop(index="total").to_dict(orient="index"),
+    }
+
+
+def benchmark_insights(
+    processed: pd.DataFrame, rows: int, output_dir: Path, repeat: int
+) -> List[Measurement]:
+    """Each insight on a fresh MovieData, so memoized views are part of the
+    measurement."""
+    insights: List[Tuple[str, Callable[[MovieData], Any]]] = [
+        ("get_genre_statistics", get_genre_statistics),
+        ("get_top_rated_movies", get_top_rated_movies),
+        ("find_rating_discrepancies", find_rating_discrepancies),
+        ("generate_key_insights", lambda data: generate_key_insights(data, output_dir)),
+        (
+            "top_rated_per_genre_year",
+            lambda data: ranked_movies(
+                data, TOP_RATED._replace(by=("genre", "release_year"))
+            ),
+        ),
+        ("report_all_formats", lambda data: _write_ranking_report(data, output_dir)),
+    ]
+    fresh = lambda: MovieData(df=processed)  # noqa: E731
+    return [
+        _record("insight", name, rows, *_measure(func, repeat, setup=fresh))
+        for name, func in insights
+    ]
+
+
+def benchmark_aggregates(
+    processed: pd.DataFrame, rows: int, repeat: int
+) -> List[Measurement]:
+    """The shared group-by views (bincount kernel) next to the pandas groupby they
+    replace."""
+    columns = [*RATING_COLUMNS, "runtime_in_minutes"]
+    aggregates: List[Tuple[str, Callable[[MovieData], Any]]] = [
+        ("yearly_aggregates", lambda data: data.view("yearly_aggregates")),
+        ("genre_aggregates", lambda data: data.view("genre_aggregates")),
+        (
+            "pandas_yearly_groupby",
+            lambda data: data.df[columns]
+            .astype("float64")
+            .groupby(data.df["release_year"])
+            .agg(["mean", "count", "std", "min", "max"]),
+        ),
+    ]
+    fresh = lambda: MovieData(df=processed)  # noqa: E731
+    return [
+        _record("aggregate", name, rows, *_measure(func, repeat, setup=fresh))
+        for name, func in aggregates
+    ]
+
+
+def _write_ranking_report(data: MovieData, output_dir: Path) -> List[Path]:
+    # a big table (top k per genre and year) in every report format
+    ranked = ranked_movies(data, TOP_RATED._replace(by=("genre", "release_year")))
+    report = Report(
+        "Top rated per genre and year", [frame_table("top_rated", "Top rated", ranked)]
+    )
+    return write_report(report, output_dir / "ranking_report.md", REPORT_FORMATS)
+
+
+def benchmark_plots(
+    processed: pd.DataFrame, rows: int, output_dir: Path, repeat: int
+) -> List[Measurement]:
+    """Every create_* function, then save_plot on the figure it produced."""
+    config = PlotConfig()
+    plots = [
+        ("heatmap", create_heatmap),
+        ("genres", create_genre_comparison),
+        ("trends", create_yearly_trends),
+        ("runtime", create_runtime_analysis),
+    ]
+    results = []
+    for plot_name, create in plots:
+        fresh = lambda: MovieData(df=processed)  # noqa: E731
+
+        def _create(data: MovieData) -> None:
+            plt.close(create(data, config))
+
+        results.append(
+            _record(
+                "plot", create.__name__, rows, *_measure(_create, repeat, setup=fresh)
+            )
+        )
+        results.append(
+            _record(
+                "save_plot",
+                plot_name,
+                rows,
+                *_measure(
+                    lambda fig: save_plot(fig, plot_name, output_dir, config),
+                    repeat,
+                    setup=lambda: create(MovieData(df=processed), config),
+                ),
+            )
+        )
+        # the other render profiles, drawn and saved in one go (annotations etc. change
+        # the drawing too)
+        for profile in sorted(RENDER_PROFILES.keys() - {"final"}):
+            profile_config = render_profile(profile)
+            results.append(
+                _record(
+                    "render_profile",
+                    f"{plot_name}/{profile}",
+                    rows,
+                    *_measure(
+                        lambda data: save_plot(
+                            create(data, profile_config),
+                            plot_name,
+                            output_dir,
+                            profile_config,
+                        ),
+                        repeat,
+                        setup=fresh,
+                    ),
+                )
+            )
+    return results
+
+
+def run_suite(
+    row_counts: List[int], repeat: int, data_dir: Optional[Path] = None
+) -> Dict[str, Any]:
+    """Run every benchmark for every row count."""
+    measurements: List[Measurement] = []
+    memory: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        output_dir = Path(tmp)
+        for rows in row_counts:
+            csv_path = synthetic_csv(rows, data_dir)
+            stage_results, processed = benchmark_stages(csv_path, rows, repeat)
+            measurements += stage_results
+            memory.append(ingest_memory(csv_path, rows))
+            measurements += benchmark_aggregates(processed, rows, repeat)
+            measurements += benchmark_insights(processed, rows, output_dir, repeat)
+            measurements += benchmark_plots(processed, rows, output_dir, repeat)
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "matplotlib": matplotlib.__version__,
+            "machine": platform.machine(),
+            "pipeline_version": data_processing.PIPELINE_VERSION,
+        },
+        "repeat": repeat,
+        "measurements": measurements,
+        "ingest_memory": memory,
+    }
+
+
+def compare_to_baseline(
+    results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """Human readable regressions, empty when nothing got worse than baseline * (1 +
+    tolerance)."""
+    key = lambda m: (m["group"], m["name"], m["rows"])  # noqa: E731
+    previous = {key(m): m for m in baseline["measurements"]}
+
+    def _check(current: Measurement) -> List[str]:
+        before = previous.get(key(current))
+        if before is None:
+            return []
+        label = f"{current['group']}/{current['name']} @ {current['rows']:,} rows"
+        return [
+            f"{label}: {metric} {before[metric]:.4g} -> {current[metric]:.4g}"
+            for metric, noise in (("seconds", MIN_SECONDS), ("peak_bytes", MIN_BYTES))
+            if current[metric] > before[metric] * (1 + tolerance)
+            and current[metric] - before[metric] > noise
+        ]
+
+    def _check_memory(current: Dict[str, Any]) -> List[str]:
+        before = previous_memory.get(current["rows"])
+        if before is None or current["bytes_after"] <= before["bytes_after"] * (
+            1 + tolerance
+        ):
+            return []
+        return [
+            f"ingested frame @ {current['rows']:,} rows: bytes "
+            f"{before['bytes_after']:,} -> "
+            f"{current['bytes_after']:,}"
+        ]
+
+    previous_memory = {
+        entry["rows"]: entry for entry in baseline.get("ingest_memory", [])
+    }
+    return [line for current in results["measurements"] for line in _check(current)] + [
+        line
+        for current in results.get("ingest_memory", [])
+        for line in _check_memory(current)
+    ]
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Pipeline benchmarks on synthetic data"
+    )
+    parser.add_argument(
+        "--rows",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000],
+        help="row counts to benchmark (default: 10000 100000)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="timed runs per measurement, best one is kept",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=DEFAULT_RESULTS,
+        help="where to write the JSON results",
+    )
+    parser.add_argument(
+        "--data-dir",
+        type=Path,
+        default=None,
+        help="where synthetic CSVs are generated/reused",
+    )
+    parser.add_argument(
+        "--baseline", type=Path, default=None, help="baseline JSON to compare against"
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help=f"also store the results as {DEFAULT_BASELINE}",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="allowed relative slowdown / memory growth before failing (default: 0.25)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    # keep the table readable, warnings and errors still show up
+    logging.disable(logging.INFO)
+    warnings.filterwarnings("ignore", category=FutureWarning)  # same as main.py
+    results = run_suite(args.rows, args.repeat, args.data_dir)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {args.output}")
+    if args.save_baseline:
+        DEFAULT_BASELINE.write_text(json.dumps(results, indent=2))
+        print(f"Baseline written to {DEFAULT_BASELINE}")
+
+    if args.baseline is None:
+        return 0
+    regressions = compare_to_baseline(
+        results, json.loads(args.baseline.read_text()), args.tolerance
+    )
+    print(
+        "\n".join(["Regressions:", *regressions])
+        if regressions
+        else "No regressions against baseline."
+    )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""Synthetic Rotten-Tomatoes-shaped data for benchmarks.
+
+Same columns and value shapes as "Rotten Tomatoes Movies.csv": ISO release dates that
+repeat a lot, comma separated genre lists, missing values in every column the pipeline
+touches and a few garbage values the pipeline has to coerce. Generation is vectorized
+and chunked, so 10M+ rows can be written without holding them in memory.
+"""
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+GENRES = [
+    "Action & Adventure",
+    "Animation",
+    "Anime & Manga",
+    "Art House & International",
+    "Classics",
+    "Comedy",
+    "Cult Movies",
+    "Documentary",
+    "Drama",
+    "Faith & Spirituality",
+    "Gay & Lesbian",
+    "Horror",
+    "Kids & Family",
+    "Musical & Performing Arts",
+    "Mystery & Suspense",
+    "Romance",
+    "Science Fiction & Fantasy",
+    "Special Interest",
+    "Sports & Fitness",
+    "Television",
+    "Western",
+]
+
+# Distinct genre lists / release dates, the real export has a few hundred / a few
+# thousand
+GENRE_COMBOS = 600
+RELEASE_DATES = 8_000
+
+
+def _genre_pool(rng: np.random.Generator) -> np.ndarray:
+    sizes = rng.choice([1, 2, 3, 4], size=GENRE_COMBOS, p=[0.35, 0.35, 0.2, 0.1])
+    return np.array(
+        [", ".join(sorted(rng.choice(GENRES, size, replace=False))) for size in sizes],
+        dtype=object,
+    )
+
+
+def _date_pool(rng: np.random.Generator) -> np.ndarray:
+    # skewed towards recent years like the real catalogue
+    years = np.clip(2020 - rng.exponential(18, RELEASE_DATES).astype(int), 1914, 2020)
+    days = rng.integers(0, 365, RELEASE_DATES)
+    dates = pd.to_datetime(years.astype(str), format="%Y") + pd.to_timedelta(
+        days, unit="D"
+    )
+    pool: np.ndarray = dates.strftime("%Y-%m-%d").to_numpy(dtype=object)
+    return pool
+
+
+def _with_missing(
+    rng: np.random.Generator, values: np.ndarray, share: float
+) -> np.ndarray:
+    values = (
+        values.astype(object)
+        if values.dtype.kind in "OU"
+        else values.astype(np.float64)
+    )
+    values[rng.random(len(values)) < share] = None if values.dtype == object else np.nan
+    return values
+
+
+def generate_movies(rows: int, seed: int = 0, offset: int = 0) -> pd.DataFrame:
+    """rows synthetic movies, offset keeps titles unique across chunks."""
+    rng = np.random.default_rng(seed)
+    pool_rng = np.random.default_rng(12345)  # same genre/date pools for every chunk
+    genre_pool, date_pool = _genre_pool(pool_rng), _date_pool(pool_rng)
+
+    # Zipf-like popularity of genre lists and release dates
+    genre_weights = 1 / np.arange(1, len(genre_pool) + 1)
+    date_weights = 1 / np.sqrt(np.arange(1, len(date_pool) + 1))
+
+    critics = np.clip(rng.normal(60, 25, rows), 0, 100).round()
+    audience = np.clip(critics + rng.normal(0, 18, rows), 0, 100).round()
+    dates = _with_missing(
+        rng, rng.choice(date_pool, rows, p=date_weights / date_weights.sum()), 0.02
+    )
+    dates[rng.random(rows) < 0.001] = "TBA"  # unparseable -> NaT
+
+    return pd.DataFrame(
+        {
+            "rotten_tomatoes_link": "m/"
+            + pd.Series(np.arange(offset, offset + rows)).astype(str),
+            "movie_title": "Movie "
+            + pd.Series(np.arange(offset, offset + rows)).astype(str),
+            "movie_info": "A synthetic plot summary that is only here to make the rows "
+            "as wide as the real export.",
+            "critics_consensus": _with_missing(
+                rng, np.full(rows, "Critics mostly agree.", dtype=object), 0.5
+            ),
+            "content_rating": rng.choice(["G", "PG", "PG-13", "R", "NR"], rows),
+            "genre": _with_missing(
+                rng,
+                rng.choice(genre_pool, rows, p=genre_weights / genre_weights.sum()),
+                0.01,
+            ),
+            "directors": "Some Director",
+            "cast": "Actor One, Actor Two, Actor Three, Actor Four",
+            "in_theaters_date": dates,
+            "on_streaming_date": rng.choice(date_pool, rows),
+            "runtime_in_minutes": _with_missing(
+                rng, np.clip(rng.normal(102, 22, rows), 3, 300).round(), 0.02
+            ),
+            "studio_name": rng.choice(["Studio A", "Studio B", "Studio C"], rows),
+            "tomatometer_status": rng.choice(
+                ["Rotten", "Fresh", "Certified Fresh"], rows
+            ),
+            "tomatometer_rating": _with_missing(rng, critics, 0.01),
+            "tomatometer_count": _with_missing(rng, rng.integers(5, 500, rows), 0.01),
+            "audience_rating": _with_missing(rng, audience, 0.02),
+            "audience_count": _with_missing(
+                rng, rng.lognormal(8, 2.5, rows).round().clip(0, 35_000_000), 0.02
+            ),
+        }
+    )
+
+
+def write_synthetic_csv(
+    path: Path, rows: int, seed: int = 0, chunk_rows: int = 500_000
+) -> Path:
+    """Write rows synthetic movies to path in chunks (bounded memory), reuses an
+    existing file of the same size."""
+    marker = path.with_suffix(".rows")
+    if path.exists() and marker.exists() and marker.read_text() == f"{rows}:{seed}":
+        return path
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for start in range(0, rows, chunk_rows):
+        chunk = generate_movies(
+            min(chunk_rows, rows - start), seed=seed + start, offset=start
+        )
+        chunk.to_csv(
+            path, mode="w" if start == 0 else "a", header=start == 0, index=False
+        )
+    marker.write_text(f"{rows}:{seed}")
+    return path
+
+
+def synthetic_csv(rows: int, directory: Optional[Path] = None, seed: int = 0) -> Path:
+    """Path of a (cached) synthetic CSV with the given number of rows."""
+    directory = directory or Path(__file__).resolve().parent / "data"
+    return write_synthetic_csv(directory / f"synthetic_{rows}.csv", rows, seed)
@@ -1,11 +1,13 @@
 from .data_processing import (
     DataProcessingError,
-    read_movie_data,
     process_raw_data,
+    read_movie_data,
+    stream_movie_data,
 )
 
-all = [
-    'DataProcessingError',
-    'read_movie_data',
-    'process_raw_data',
-]
\ No newline at end of file
+__all__ = [
+    "DataProcessingError",
+    "read_movie_data",
+    "process_raw_data",
+    "stream_movie_data",
+]
@@ -0,0 +1,112 @@
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.data_analysis.genre_index import genre_group_stats
+from src.data_analysis.grouping import (
+    MOMENT_STATS,
+    GroupKey,
+    GroupStats,
+    factorize_key,
+    group_stats,
+    stats_frame,
+)
+from src.utils.config import ProjectConfig
+from src.utils.logger import setup_logger
+from src.utils.types import MovieData, register_view
+
+logger = setup_logger("aggregation", ProjectConfig.get_log_file("aggregation"))
+
+RATING_COLUMNS = ["tomatometer_rating", "audience_rating"]
+
+
+class AggregationError(Exception):
+    """Custom exception for aggregation errors."""
+
+    pass
+
+
+def group_moments(df: pd.DataFrame, key: str, columns: Sequence[str]) -> pd.DataFrame:
+    """Per-group count/sum/sumsq of the given columns, columns labelled (column,
+    stat)."""
+    try:
+        # plain label index (factorize_key) -> chunks with different genre categories
+        # still line up when merged
+        return stats_frame(
+            group_stats(factorize_key(df[key]), df, columns, extrema=False),
+            MOMENT_STATS,
+        ).sort_index(axis=1)
+    except Exception as e:
+        logger.error(f"Error calculating group moments: {str(e)}")
+        raise AggregationError(f"Error calculating group moments: {str(e)}")
+
+
+def merge_moments(left: pd.DataFrame, right: pd.DataFrame) -> pd.DataFrame:
+    """Merge two moment frames (union of groups, stats added)."""
+    return left.add(right, fill_value=0)
+
+
+def finalize_moments(moments: pd.DataFrame) -> pd.DataFrame:
+    """Turn moments into mean/count/std columns, same layout as groupby().agg(['mean',
+    'count', 'std'])."""
+    try:
+
+        def _column_stats(col: str) -> pd.DataFrame:
+            count = moments[(col, "count")].astype("int64")
+            total = moments[(col, "sum")]
+            mean = total / count.where(count > 0)
+            # ddof=1 like pandas, clip tiny negative values coming from float rounding
+            variance = (
+                (moments[(col, "sumsq")] - total * mean) / (count - 1).where(count > 1)
+            ).clip(lower=0)
+            return pd.DataFrame(
+                {
+                    (col, "mean"): mean,
+                    (col, "count"): count,
+                    (col, "std"): np.sqrt(variance),
+                }
+            )
+
+        columns = moments.columns.get_level_values(0).unique()
+        return pd.concat(list(map(_column_stats, columns)), axis=1).sort_index()
+    except Exception as e:
+        logger.error(f"Error finalizing moments: {str(e)}")
+        raise AggregationError(f"Error finalizing moments: {str(e)}")
+
+
+@register_view("genre_group_stats")
+def _genre_group_stats_view(data: MovieData) -> GroupStats:
+    """count/sum/sumsq/min/max of ratings and runtime per individual genre, one scan for
+    every genre report
+
+    A movie listed as "Comedy, Drama" counts for both genres.
+    """
+    return genre_group_stats(
+        data.view("genre_index"), data.df, [*RATING_COLUMNS, "runtime_in_minutes"]
+    )
+
+
+@register_view("genre_aggregates")
+def genre_aggregates(data: MovieData) -> pd.DataFrame:
+    """mean/count/std of ratings and runtime per individual genre, shared by the genre
+    insights and the genre plot"""
+    return stats_frame(data.view("genre_group_stats"))
+
+
+@register_view("year_key")
+def _year_key_view(data: MovieData) -> GroupKey:
+    """release_year factorized once for every yearly aggregate (and the bootstrap
+    CIs)"""
+    return factorize_key(data.df["release_year"])
+
+
+@register_view("yearly_group_stats")
+def _yearly_group_stats_view(data: MovieData) -> GroupStats:
+    return group_stats(data.view("year_key"), data.df, RATING_COLUMNS)
+
+
+@register_view("yearly_aggregates")
+def yearly_aggregates(data: MovieData) -> pd.DataFrame:
+    """mean/count/std of ratings per release year"""
+    return stats_frame(data.view("yearly_group_stats"))
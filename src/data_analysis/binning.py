@@ -0,0 +1,122 @@
+from typing import Optional
+
+import numpy as np
+
+from src.utils.config import ProjectConfig
+from src.utils.logger import setup_logger
+
+logger = setup_logger("binning", ProjectConfig.get_log_file("binning"))
+
+
+class BinningError(Exception):
+    """Custom exception for binning errors."""
+
+    pass
+
+
+def uniform_edges(start: float, stop: float, bins: int) -> np.ndarray:
+    """bins + 1 evenly spaced edges: uniform_edges(0, 100, 10) -> 0, 10, ..., 100"""
+    return np.linspace(start, stop, bins + 1)
+
+
+RATING_DECILE_EDGES = uniform_edges(0, 100, 10)
+
+# Runtime plot: 30-minute runtime ranges x 5-point critics rating bins
+RUNTIME_EDGES = uniform_edges(30, 240, 7)
+RUNTIME_RATING_EDGES = uniform_edges(0, 100, 20)
+
+
+def bin_codes(
+    values: np.ndarray, edges: np.ndarray, clip: bool = True, right: bool = False
+) -> np.ndarray:
+    """Integer bin index of every value, -1 for values that don't land in any bin.
+
+    Bins are [e0, e1), [e1, e2), ..., [e(n-1), en].
+    right=True -> (e0, e1], (e1, e2], ..., (e(n-1), en] like pd.cut
+    clip=True  -> values below/above the edges go to the first/last bin
+                  (the old min(x // 10, 9) behaviour)
+    clip=False -> values outside the edges are dropped (np.histogram behaviour)
+    NaN never lands in a bin.
+    """
+    try:
+        values = np.asarray(values, dtype=np.float64)
+        edges = np.asarray(edges, dtype=np.float64)
+        n_bins = len(edges) - 1
+        if n_bins < 1 or np.any(np.diff(edges) <= 0):
+            raise BinningError(
+                "Bin edges must be strictly increasing and contain at least two values"
+            )
+
+        if right:
+            codes = np.searchsorted(edges, values, side="left") - 1
+        else:
+            codes = np.searchsorted(edges, values, side="right") - 1
+            codes[values == edges[-1]] = n_bins - 1  # last bin is closed on the right
+
+        if clip:
+            codes = np.clip(codes, 0, n_bins - 1)
+        else:
+            codes[(codes < 0) | (codes >= n_bins)] = -1
+
+        codes[np.isnan(values)] = -1
+        return codes
+    except BinningError:
+        raise
+    except Exception as e:
+        logger.error(f"Failed calculating bin codes: {str(e)}")
+        raise BinningError(f"Error calculating bin codes: {str(e)}")
+
+
+def count_grid(
+    x: np.ndarray,
+    y: np.ndarray,
+    x_edges: np.ndarray,
+    y_edges: np.ndarray,
+    weights: Optional[np.ndarray] = None,
+    clip: bool = True,
+) -> np.ndarray:
+    """2-D (weighted) counts, shape (len(x_edges) - 1, len(y_edges) - 1), same layout as
+    np.histogram2d.
+
+    One bincount over the flattened cell index instead of a Python loop over rows.
+    """
+    try:
+        nx, ny = len(x_edges) - 1, len(y_edges) - 1
+        x_codes = bin_codes(x, x_edges, clip)
+        y_codes = bin_codes(y, y_edges, clip)
+
+        inside = (x_codes >= 0) & (y_codes >= 0)
+        cells = x_codes[inside] * ny + y_codes[inside]
+        cell_weights = (
+            None if weights is None else np.asarray(weights, dtype=np.float64)[inside]
+        )
+
+        return (
+            np.bincount(cells, weights=cell_weights, minlength=nx * ny)
+            .astype(np.float64)
+            .reshape(nx, ny)
+        )
+    except BinningError:
+        raise
+    except Exception as e:
+        logger.error(f"Failed calculating count grid: {str(e)}")
+        raise BinningError(f"Error calculating count grid: {str(e)}")
+
+
+def rating_heatmap_counts(critics: np.ndarray, audience: np.ndarray) -> np.ndarray:
+    """10x10 critics vs audience decile counts as drawn by the heatmap: rows = audience,
+    highest decile first.
+
+    Lives here and not in visualization so streaming/insights runs never import
+    matplotlib.
+    """
+    # clip=True keeps the old min(rating // 10, 9) binning
+    counts = count_grid(critics, audience, RATING_DECILE_EDGES, RATING_DECILE_EDGES)
+    # Lecimy od gory do dolu, bo od najwiekszej do najm. oceny (rows = audience)
+    return counts.T[::-1]
+
+
+def runtime_rating_counts(runtime: np.ndarray, critics: np.ndarray) -> np.ndarray:
+    """(runtime ranges x critics rating bins) counts of the runtime heatmap"""
+    # clip=False -> same as np.histogram2d, runtimes outside 30-240 are left out
+    return count_grid(runtime, critics, RUNTIME_EDGES, RUNTIME_RATING_EDGES, clip=False)
@@ -0,0 +1,346 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.data_analysis.aggregation import RATING_COLUMNS
+from src.data_analysis.genre_index import GenreIndex
+from src.data_analysis.grouping import GroupKey
+from src.utils.config import ProjectConfig
+from src.utils.logger import log_synchronously, setup_logger
+from src.utils.profiling import profiled
+from src.utils.types import MovieData, register_view
+
+logger = setup_logger("bootstrap", ProjectConfig.get_log_file("bootstrap"))
+
+# Resamples of the trend / genre confidence intervals, and their seed -> the same data
+# always draws the same bands
+BOOTSTRAP_RESAMPLES = 1000
+BOOTSTRAP_SEED = 20240101
+CONFIDENCE = 0.95
+
+# Resamples are drawn in chunks with their own child seed, results don't depend on the
+# worker count
+CHUNK_RESAMPLES = 250
+
+# Resamples x rows drawn at once -> the random numbers, indexes and gathered values stay
+# in cache
+BATCH_ELEMENTS = 1 << 20
+
+# Row groups up to this size draw float32 uniforms (picks every row with at most ~0.03%
+# bias)
+SMALL_GROUP_ROWS = 1 << 12
+
+# Multinomial draws cost ~20 uniform draws each (numpy, per distinct value), a group
+# with more rows than that many times its distinct values is resampled by counts
+COUNTS_COST = 20
+
+
+class BootstrapError(Exception):
+    """Custom exception for bootstrap errors."""
+
+    pass
+
+
+class BootstrapCI(NamedTuple):
+    """Percentile confidence interval of the mean of every group, NaN for groups without
+    values"""
+
+    low: np.ndarray
+    high: np.ndarray
+    resamples: int
+    confidence: float
+
+
+class _Groups(NamedTuple):
+    """Everything one resample needs, built once and shared by every chunk / worker.
+
+    Row groups: values sorted by group, resampled by drawing row indexes inside each
+    group and summing every group with one np.add.reduceat. Count groups (many rows, few
+    distinct values -> ratings of large groups): resampling n rows with replacement
+    draws multinomial(n, frequencies) counts of the distinct values, the same
+    distribution at a cost that doesn't grow with n.
+    """
+
+    n_groups: int
+    sizes: np.ndarray  # rows per group
+    row_groups: np.ndarray  # ids of the groups resampled by rows
+    row_values: np.ndarray  # float64 values of the row groups, grouped
+    row_starts: np.ndarray  # first position of every row group in row_values
+    row_size: np.ndarray  # float64 size of the group of every position
+    row_offset: np.ndarray  # int64 start of the group of every position
+    count_groups: np.ndarray  # ids of the groups resampled by counts
+    support: np.ndarray  # (count groups x distinct values) values, zero padded
+    # (count groups x distinct values) probabilities, zero padded
+    frequencies: np.ndarray
+
+
+def _prepare(values: np.ndarray, codes: np.ndarray, n_groups: int) -> _Groups:
+    keep = (codes >= 0) & ~np.isnan(values)
+    values, codes = values[keep], codes[keep].astype(np.int64)
+    # by group, then value -> distinct values are runs
+    order = np.lexsort((values, codes))
+    values, codes = values[order], codes[order]
+
+    sizes = np.bincount(codes, minlength=n_groups)
+    new_value = np.ones(len(values), dtype=bool)
+    new_value[1:] = (values[1:] != values[:-1]) | (codes[1:] != codes[:-1])
+    distinct = np.bincount(codes[new_value], minlength=n_groups)
+
+    by_counts = (sizes > COUNTS_COST * distinct) & (sizes > 0)
+    # reduceat can't express empty groups -> they are left out
+    by_rows = ~by_counts & (sizes > 0)
+
+    on_rows = by_rows[codes]
+    row_values = values[on_rows]
+    row_groups = np.flatnonzero(by_rows)
+    row_sizes = sizes[row_groups]
+    row_starts = np.concatenate([[0], np.cumsum(row_sizes)[:-1]]).astype(np.int64)
+    position_group = np.repeat(np.arange(len(row_groups)), row_sizes)
+
+    count_groups = np.flatnonzero(by_counts)
+    width = int(distinct[count_groups].max()) if len(count_groups) else 0
+    support = np.zeros((len(count_groups), width))
+    frequencies = np.zeros((len(count_groups), width))
+    group_starts = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+    for slot, group in enumerate(count_groups):
+        # values are sorted by group -> every group is one run, no scan over all rows
+        # per group
+        start = group_starts[group]
+        group_values, group_counts = np.unique(
+            values[start : start + sizes[group]], return_counts=True
+        )
+        support[slot, : len(group_values)] = group_values
+        frequencies[slot, : len(group_values)] = group_counts / group_counts.sum()
+
+    return _Groups(
+        n_groups=n_groups,
+        sizes=sizes,
+        row_groups=row_groups,
+        row_values=row_values,
+        row_starts=row_starts,
+        row_size=row_sizes[position_group].astype(np.float64),
+        row_offset=row_starts[position_group],
+        count_groups=count_groups,
+        support=support,
+        frequencies=frequencies,
+    )
+
+
+def _resample_means(
+    groups: _Groups, seed: np.random.SeedSequence, resamples: int
+) -> np.ndarray:
+    """(resamples x groups) means of resampled groups"""
+    rng = np.random.default_rng(seed)
+    sums = np.full((resamples, groups.n_groups), np.nan)
+
+    rows = len(groups.row_values)
+    if rows:
+        # float32 uniforms are cheaper to draw, their 24 bits only pick rows evenly in
+        # small groups
+        small = groups.row_size.max() <= SMALL_GROUP_ROWS
+        dtype = np.float32 if small else np.float64
+        row_size = groups.row_size.astype(dtype)
+        row_last = groups.row_offset + groups.row_size.astype(np.int64) - 1
+        batch = max(1, min(resamples, BATCH_ELEMENTS // rows))
+        uniform = np.empty((batch, rows), dtype=dtype)
+        positions = np.empty((batch, rows), dtype=np.int64)
+        drawn = np.empty((batch, rows))
+        for first in range(0, resamples, batch):
+            count = min(batch, resamples - first)
+            # one index draw for the whole batch: uniform position inside the row's own
+            # group
+            u, p, d = uniform[:count], positions[:count], drawn[:count]
+            rng.random(out=u, dtype=dtype)
+            u *= row_size
+            p[...] = u
+            p += groups.row_offset
+            if small:
+                # u * size can round up to size in float32
+                np.minimum(p, row_last, out=p)
+            np.take(groups.row_values, p, out=d)
+            sums[first : first + count, groups.row_groups] = np.add.reduceat(
+                d, groups.row_starts, axis=1
+            )
+
+    if len(groups.count_groups):
+        cells = groups.support.size
+        batch = max(1, BATCH_ELEMENTS // cells)
+        n = groups.sizes[groups.count_groups]
+        for first in range(0, resamples, batch):
+            count = min(batch, resamples - first)
+            counts = rng.multinomial(n, groups.frequencies, size=(count, len(n)))
+            sums[first : first + count, groups.count_groups] = np.einsum(
+                "bgk,gk->bg", counts, groups.support
+            )
+
+    means: np.ndarray = sums / np.where(groups.sizes > 0, groups.sizes, np.nan)
+    return means
+
+
+# Set once per worker by _init_worker
+_worker_groups: Optional[_Groups] = None
+
+
+def _init_worker(groups: _Groups) -> None:
+    global _worker_groups
+    # workers end with os._exit, queued log records would never be written
+    log_synchronously()
+    _worker_groups = groups
+
+
+def _resample_in_worker(seed: np.random.SeedSequence, resamples: int) -> np.ndarray:
+    if _worker_groups is None:
+        raise BootstrapError("Worker was started without _init_worker")
+    return _resample_means(_worker_groups, seed, resamples)
+
+
+def bootstrap_mean_ci(
+    values: np.ndarray,
+    codes: np.ndarray,
+    n_groups: int,
+    resamples: int = BOOTSTRAP_RESAMPLES,
+    confidence: float = CONFIDENCE,
+    seed: int = BOOTSTRAP_SEED,
+    workers: int = 1,
+) -> BootstrapCI:
+    """Percentile bootstrap CI of the mean of values per group (codes 0..n_groups-1, -1
+    and NaN are left out).
+
+    Every group is resampled from its own rows, all groups at once. The same seed gives
+    the same interval whatever the number of workers; workers > 1 spreads the chunks of
+    resamples over a process pool (for very large resamples or data).
+    """
+    try:
+        if not 0 < confidence < 1:
+            raise BootstrapError(
+                f"confidence has to be between 0 and 1, got {confidence}"
+            )
+        with profiled("bootstrap/mean_ci", rows_in=len(values)) as probe:
+            groups = _prepare(
+                np.asarray(values, dtype=np.float64), np.asarray(codes), n_groups
+            )
+            chunks = [
+                min(CHUNK_RESAMPLES, resamples - first)
+                for first in range(0, resamples, CHUNK_RESAMPLES)
+            ]
+            seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+
+            workers = min(workers, len(chunks), os.cpu_count() or 1)
+            if workers > 1:
+                with ProcessPoolExecutor(
+                    max_workers=workers, initializer=_init_worker, initargs=(groups,)
+                ) as pool:
+                    means = np.vstack(
+                        list(pool.map(_resample_in_worker, seeds, chunks))
+                    )
+            else:
+                means = np.vstack(
+                    [
+                        _resample_means(groups, chunk_seed, count)
+                        for chunk_seed, count in zip(seeds, chunks)
+                    ]
+                )
+
+            tail = (1 - confidence) / 2
+            low, high = np.full(n_groups, np.nan), np.full(n_groups, np.nan)
+            filled = groups.sizes > 0  # empty groups keep NaN
+            if len(means) and filled.any():
+                low[filled], high[filled] = np.quantile(
+                    means[:, filled], [tail, 1 - tail], axis=0
+                )
+            probe.rows_out = n_groups
+        return BootstrapCI(
+            low=low, high=high, resamples=resamples, confidence=confidence
+        )
+    except BootstrapError:
+        raise
+    except Exception as e:
+        logger.error(f"Error bootstrapping confidence intervals: {str(e)}")
+        raise BootstrapError(f"Error bootstrapping confidence intervals: {str(e)}")
+
+
+def _ci_frame(
+    intervals: Sequence[Tuple[str, BootstrapCI]], index: pd.Index
+) -> pd.DataFrame:
+    """(column, ci_low) / (column, ci_high) columns, joinable with the aggregate
+    frames"""
+    return pd.DataFrame(
+        {
+            (col, stat): values
+            for col, ci in intervals
+            for stat, values in (("ci_low", ci.low), ("ci_high", ci.high))
+        },
+        index=index,
+    )
+
+
+def yearly_rating_ci(
+    key: GroupKey,
+    df: pd.DataFrame,
+    resamples: int = BOOTSTRAP_RESAMPLES,
+    workers: int = 1,
+) -> pd.DataFrame:
+    """Bootstrap CI of the mean critics / audience rating per release year (key: the
+    factorized release_year), indexed like yearly_aggregates"""
+    intervals = [
+        (
+            col,
+            bootstrap_mean_ci(
+                df[col].to_numpy(dtype=np.float64, na_value=np.nan),
+                key.codes,
+                len(key.labels),
+                resamples,
+                workers=workers,
+            ),
+        )
+        for col in RATING_COLUMNS
+    ]
+    return _ci_frame(intervals, pd.Index(key.labels, name=key.name))
+
+
+def genre_rating_ci(
+    index: GenreIndex,
+    df: pd.DataFrame,
+    columns: Sequence[str] = ("tomatometer_rating",),
+    resamples: int = BOOTSTRAP_RESAMPLES,
+    workers: int = 1,
+) -> pd.DataFrame:
+    """Bootstrap CI of the mean rating per individual genre, indexed like
+    genre_aggregates.
+
+    A movie listed under several genres is resampled in each of them, every genre from
+    its own movies.
+    """
+    # code -1 -> none
+    membership = np.vstack(
+        [index.membership, np.zeros((1, len(index.genres)), dtype=bool)]
+    )
+    # (genre, row) pairs, grouped by genre
+    genre_codes, rows = np.nonzero(membership[index.codes].T)
+    intervals: List[Tuple[str, BootstrapCI]] = [
+        (
+            col,
+            bootstrap_mean_ci(
+                df[col].to_numpy(dtype=np.float64, na_value=np.nan)[rows],
+                genre_codes,
+                len(index.genres),
+                resamples,
+                workers=workers,
+            ),
+        )
+        for col in columns
+    ]
+    return _ci_frame(intervals, pd.Index(index.genres, name="genre"))
+
+
+@register_view("yearly_rating_ci")
+def _yearly_rating_ci_view(data: MovieData) -> pd.DataFrame:
+    return yearly_rating_ci(data.view("year_key"), data.df)
+
+
+@register_view("genre_rating_ci")
+def _genre_rating_ci_view(data: MovieData) -> pd.DataFrame:
+    return genre_rating_ci(data.view("genre_index"), data.df)
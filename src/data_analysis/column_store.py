@@ -0,0 +1,140 @@
+import json
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.data_analysis.shared_frame import INDEX_COLUMN, decode_column, encode_column
+from src.utils.config import ProjectConfig
+from src.utils.logger import setup_logger
+
+logger = setup_logger("column_store", ProjectConfig.get_log_file("column_store"))
+
+SCHEMA_FILE = "schema.json"
+
+# 2: one .npy per array of a column (values, NA mask, dictionary text / offsets),
+# nothing but names in the schema
+STORE_VERSION = 2
+
+
+class ColumnStoreError(Exception):
+    """Custom exception for column store errors."""
+
+    pass
+
+
+def _array_file(directory: Path, position: int, role: str) -> Path:
+    # position instead of name -> column names may contain spaces, slashes etc.
+    return directory / f"col_{position:03d}_{role}.npy"
+
+
+def write_columns(
+    df: pd.DataFrame, directory: Path, metadata: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Write a DataFrame as plain .npy arrays (encode_column, the layout of shared
+    frames) plus a JSON schema, return the schema.
+
+    Every array is a plain little-endian ndarray, so read_columns can map the files
+    instead of reading them.
+    """
+    tmp_dir = directory.with_name(directory.name + ".tmp")
+    try:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        columns: List[Dict[str, Any]] = []
+        for position, (name, series) in enumerate(
+            [(INDEX_COLUMN, df.index.to_series()), *df.items()]
+        ):
+            arrays, meta = encode_column(series)
+            for role, array in arrays.items():
+                np.save(
+                    _array_file(tmp_dir, position, role),
+                    np.ascontiguousarray(array),
+                    allow_pickle=False,
+                )
+            columns.append({"name": name, "roles": list(arrays), **meta})
+
+        schema = {
+            "version": STORE_VERSION,
+            "columns": columns,
+            "rows": len(df),
+            "metadata": metadata or {},
+        }
+        (tmp_dir / SCHEMA_FILE).write_text(json.dumps(schema))
+
+        # swap in one go so a crashed write never leaves a half-valid store behind
+        shutil.rmtree(directory, ignore_errors=True)
+        tmp_dir.rename(directory)
+        logger.info(
+            f"Wrote {len(columns) - 1} columns ({len(df)} rows) to {directory}."
+        )
+        return schema
+    except Exception as e:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        logger.error(f"Error writing column store: {str(e)}")
+        raise ColumnStoreError(f"Error writing column store: {str(e)}")
+
+
+def read_schema(directory: Path) -> Dict[str, Any]:
+    """Return the schema of a column store directory."""
+    try:
+        schema: Dict[str, Any] = json.loads((directory / SCHEMA_FILE).read_text())
+    except Exception as e:
+        raise ColumnStoreError(f"Error reading column store schema: {str(e)}")
+    if schema.get("version") != STORE_VERSION:
+        raise ColumnStoreError(
+            f'Unsupported column store version {schema.get("version")}, write the data '
+            "again"
+        )
+    return schema
+
+
+def _load(path: Path, mmap: bool) -> np.ndarray:
+    if not mmap:
+        return np.asarray(np.load(path, allow_pickle=False))
+    # plain ndarray view of the read-only mapping -> results of arithmetic on it are not
+    # np.memmap
+    return np.asarray(np.load(path, mmap_mode="r", allow_pickle=False))
+
+
+def read_columns(
+    directory: Path, columns: Optional[Sequence[str]] = None, mmap: bool = False
+) -> pd.DataFrame:
+    """Read a column store directory back into a DataFrame (only the given columns, all
+    by default).
+
+    mmap=True maps the files read-only instead of reading them: numeric columns,
+    nullable columns and categorical codes stay views of the mapping, pages are loaded
+    by the OS when something touches them. Only dictionaries are decoded either way.
+    """
+    try:
+        schema = read_schema(directory)
+        wanted = None if columns is None else {INDEX_COLUMN, *columns}
+        decoded = {
+            meta["name"]: decode_column(
+                meta["kind"],
+                {
+                    role: _load(_array_file(directory, position, role), mmap)
+                    for role in meta["roles"]
+                },
+                meta.get("dtype", ""),
+                meta.get("ordered", False),
+            )
+            for position, meta in enumerate(schema["columns"])
+            if wanted is None or meta["name"] in wanted
+        }
+        index = pd.Index(decoded.pop(INDEX_COLUMN), copy=False)
+        df = pd.DataFrame(decoded, index=index, copy=False)
+        logger.info(
+            f"Read {len(df.columns)} columns ({len(df)} rows) from {directory}"
+            f'{" as memory maps" if mmap else ""}.'
+        )
+        return df
+    except ColumnStoreError:
+        raise
+    except Exception as e:
+        logger.error(f"Error reading column store: {str(e)}")
+        raise ColumnStoreError(f"Error reading column store: {str(e)}")
@@ -1,132 +1,360 @@
 from pathlib import Path
-from typing import Dict, List, NamedTuple, Any
-from functools import reduce
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
 import pandas as pd
-from src.utils.types import MovieData
-from src.utils.logger import setup_logger
+
+from src.data_analysis.ranking import (
+    RATING_DISCREPANCIES,
+    TOP_RATED,
+    RankingSpec,
+    rank_frame,
+)
+from src.data_analysis.render_cache import RenderCache, insights_key
+from src.data_analysis.reporting import Report, ReportTable, frame_table, write_report
 from src.utils.config import ProjectConfig
+from src.utils.logger import setup_logger
+from src.utils.profiling import profiled
+from src.utils.types import MovieData
+
+logger = setup_logger("data_insights", ProjectConfig.get_log_file("data_insights"))
 
-logger = setup_logger('data_insights', ProjectConfig.get_log_file("data_insights"))
 
 class GenreStats(NamedTuple):
     genre: str
     avg_rating: float
     movie_count: int
     avg_runtime: float
+    # bootstrap 95% CI of avg_rating, NaN where it wasn't computed (streaming)
+    rating_ci_low: float = float("nan")
+    rating_ci_high: float = float("nan")
+
 
 def get_genre_statistics(data: MovieData, min_movies: int = 10) -> List[GenreStats]:
     """Get statistics for each genre with minimum number of movies"""
     try:
-        genre_stats = (data.df.groupby('genre')
-                      .agg({
-                          'tomatometer_rating': ['mean', 'count'],
-                          'runtime_in_minutes': 'mean'
-                      })
-                      .pipe(lambda x: x[x[('tomatometer_rating', 'count')] >= min_movies]))
-
-        return list(map(
-            lambda x: GenreStats(
-                genre=x[0],
-                avg_rating=x[1][('tomatometer_rating', 'mean')],
-                movie_count=int(x[1][('tomatometer_rating', 'count')]),
-                avg_runtime=x[1][('runtime_in_minutes', 'mean')]
-            ),
-            genre_stats.iterrows()
-        ))
+        stats = data.view("genre_group_stats")
+        ci = data.view("genre_rating_ci")  # same genre order as the stats
+        rating, runtime = stats.column("tomatometer_rating"), stats.column(
+            "runtime_in_minutes"
+        )
+        return build_genre_stats(
+            stats.labels,
+            stats.mean()[:, rating],
+            stats.count[:, rating],
+            stats.mean()[:, runtime],
+            min_movies,
+            ci[("tomatometer_rating", "ci_low")].to_numpy(),
+            ci[("tomatometer_rating", "ci_high")].to_numpy(),
+        )
     except Exception as e:
         logger.error(f"Error calculating genre statistics: {e}")
         raise
 
+
+def genre_stats_from_frame(
+    genre_stats: pd.DataFrame, min_movies: int = 10
+) -> List[GenreStats]:
+    """Build GenreStats from a (column, stat) aggregate frame indexed by genre
+    (streaming partials)"""
+    return build_genre_stats(
+        genre_stats.index.to_numpy(),
+        genre_stats[("tomatometer_rating", "mean")].to_numpy(),
+        genre_stats[("tomatometer_rating", "count")].to_numpy(),
+        genre_stats[("runtime_in_minutes", "mean")].to_numpy(),
+        min_movies,
+    )
+
+
+def build_genre_stats(
+    genres: np.ndarray,
+    avg_rating: np.ndarray,
+    movie_count: np.ndarray,
+    avg_runtime: np.ndarray,
+    min_movies: int = 10,
+    rating_ci_low: Optional[np.ndarray] = None,
+    rating_ci_high: Optional[np.ndarray] = None,
+) -> List[GenreStats]:
+    """GenreStats of the genres with at least min_movies rated movies, from per-genre
+    arrays"""
+    keep = movie_count >= min_movies
+    missing = np.full(len(genres), np.nan)
+    return list(
+        map(
+            GenreStats._make,
+            zip(
+                genres[keep].tolist(),
+                avg_rating[keep].tolist(),
+                movie_count[keep].astype(int).tolist(),
+                avg_runtime[keep].tolist(),
+                (missing if rating_ci_low is None else rating_ci_low)[keep].tolist(),
+                (missing if rating_ci_high is None else rating_ci_high)[keep].tolist(),
+            ),
+        )
+    )
+
+
 def get_movie_table_header() -> List[str]:
     return [
         "| Title | Year | Critics | Critics Votes | Audience | Audience Votes |\n",
-        "|-------|------|---------|---------------|----------|----------------|\n"
+        "|-------|------|---------|---------------|----------|----------------|\n",
     ]
 
+
 def get_controversy_table_header() -> List[str]:
     return [
-        "| Title | Year | Critics | Critics Votes | Audience | Audience Votes | Difference |\n",
-        "|-------|------|---------|---------------|----------|----------------|------------|\n"
+        "| Title | Year | Critics | Critics Votes | Audience | Audience Votes "
+        "| Difference |\n",
+        "|-------|------|---------|---------------|----------|----------------"
+        "|------------|\n",
     ]
 
-def format_movie_row(row) -> str:
-    return (f"| {row.movie_title:<30} | {row.release_year:>4.0f} | "
-            f"{row.tomatometer_rating:>6.1f}% | {int(row.tomatometer_count):>12,} | "
-            f"{row.audience_rating:>6.1f}% | {int(row.audience_count):>12,} |\n")
 
-def format_controversy_row(row) -> str:
-    return (f"| {row.movie_title:<30} | {row.release_year:>4.0f} | "
-            f"{row.tomatometer_rating:>6.1f}% | {int(row.tomatometer_count):>12,} | "
-            f"{row.audience_rating:>6.1f}% | {int(row.audience_count):>12,} | "
-            f"{abs(row.tomatometer_rating - row.audience_rating):>6.1f}% |\n")
+def format_count(count: Any) -> str:
+    """Vote count with thousands separators, missing counts (NaN / NA) as n/a"""
+    return f"{int(count):>12,}" if pd.notna(count) else f"{'n/a':>12}"
+
+
+def format_movie_row(row: Any) -> str:
+    return (
+        f"| {row.movie_title:<30} | {row.release_year:>4.0f} | "
+        f"{row.tomatometer_rating:>6.1f}% | {format_count(row.tomatometer_count)} | "
+        f"{row.audience_rating:>6.1f}% | {format_count(row.audience_count)} |\n"
+    )
+
+
+def format_controversy_row(row: Any) -> str:
+    return (
+        f"| {row.movie_title:<30} | {row.release_year:>4.0f} | "
+        f"{row.tomatometer_rating:>6.1f}% | {format_count(row.tomatometer_count)} | "
+        f"{row.audience_rating:>6.1f}% | {format_count(row.audience_count)} | "
+        f"{abs(row.tomatometer_rating - row.audience_rating):>6.1f}% |\n"
+    )
+
+
+def top_rated_frame(
+    df: pd.DataFrame, k: int = 20, by: Tuple[str, ...] = ()
+) -> pd.DataFrame:
+    """Rows of the k best movies by the mean of critics and audience rating (per group
+    with by, see ranking)"""
+    return rank_frame(df, TOP_RATED._replace(k=k, by=by))
+
+
+def rating_discrepancies_frame(
+    df: pd.DataFrame, threshold: float = 30.0, k: int = 20, by: Tuple[str, ...] = ()
+) -> pd.DataFrame:
+    """Rows of the k movies with the largest critics/audience gap above threshold"""
+    return rank_frame(
+        df, RATING_DISCREPANCIES._replace(threshold=threshold, k=k, by=by)
+    )
+
+
+def ranked_movies(data: MovieData, spec: RankingSpec) -> pd.DataFrame:
+    """Any ranking over the movies with valid ratings, e.g. top 20 per genre for each
+    year: ranked_movies(data, TOP_RATED._replace(by=('genre', 'release_year')))"""
+    return rank_frame(data.valid_ratings, spec)
 
-def get_top_rated_movies(data: MovieData) -> List[str]:
+
+def get_top_rated_movies(data: MovieData, k: int = 20) -> List[str]:
     """Get top rated movies by both critics and audience"""
     try:
         # i dont know whats wrong with the types here and in the one below ;c
-        return list(map(
-            format_movie_row,
-            data.valid_ratings
-            .assign(avg_rating=lambda x: (x['tomatometer_rating'] + x['audience_rating']) / 2)
-            .nlargest(20, 'avg_rating')
-            .itertuples(index=False)
-        ))
+        return list(
+            map(
+                format_movie_row,
+                top_rated_frame(data.valid_ratings, k).itertuples(index=False),
+            )
+        )
     except Exception as e:
         logger.error(f"Error getting top rated movies: {e}")
         raise
 
-def find_rating_discrepancies(data: MovieData, threshold: float = 30.0) -> List[str]:
+
+def find_rating_discrepancies(
+    data: MovieData, threshold: float = 30.0, k: int = 20
+) -> List[str]:
     """Find movies with big differences between critic and audience ratings"""
     try:
-        return list(map(
-            format_controversy_row,
-            data.valid_ratings
-            .assign(rating_diff=lambda x: abs(x['tomatometer_rating'] - x['audience_rating']))
-            .query(f'rating_diff >= {threshold}')
-            .nlargest(20, 'rating_diff')
-            .itertuples(index=False)
-        ))
+        return list(
+            map(
+                format_controversy_row,
+                rating_discrepancies_frame(data.valid_ratings, threshold, k).itertuples(
+                    index=False
+                ),
+            )
+        )
     except Exception as e:
         logger.error(f"Error finding rating discrepancies: {e}")
         raise
 
+
+def format_ci(low: float, high: float) -> str:
+    return (
+        f"{low:>5.1f} - {high:>5.1f}"
+        if pd.notna(low) and pd.notna(high)
+        else f"{'n/a':>13}"
+    )
+
+
 def format_genre_row(stat: GenreStats) -> str:
-    return f"| {stat.genre:<20} | {stat.avg_rating:>6.1f}% | {stat.movie_count:>5} | {stat.avg_runtime:>6.1f} min |\n"
+    return (
+        f"| {stat.genre:<25} | {stat.avg_rating:>6.1f}% | "
+        f"{format_ci(stat.rating_ci_low, stat.rating_ci_high)} | "
+        f"{stat.movie_count:>5} | {stat.avg_runtime:>6.1f} min |\n"
+    )
+
 
 def get_genre_table_header() -> List[str]:
     return [
-        "| Genre                | Rating  | Count | Runtime |\n",
-        "|----------------------|---------|-------|----------|\n"
+        "| Genre                     | Rating  | 95% CI        | Count | Runtime |\n",
+        "|---------------------------|---------|---------------|-------|----------|\n",
     ]
 
-def format_table_section(items: List[str], headers: List[str]) -> str:
-    return reduce(lambda acc, section: acc + section, [*headers, *("".join(items))], "")
 
-def generate_key_insights(data: MovieData, output_dir: Path) -> Dict[str, Any]:
+# (attribute, label) of the insight tables in CSV / JSON / HTML reports
+MOVIE_FIELDS = [
+    ("movie_title", "title"),
+    ("release_year", "year"),
+    ("tomatometer_rating", "critics"),
+    ("tomatometer_count", "critics_votes"),
+    ("audience_rating", "audience"),
+    ("audience_count", "audience_votes"),
+]
+GENRE_FIELDS = [
+    ("genre", "genre"),
+    ("avg_rating", "avg_rating"),
+    ("rating_ci_low", "avg_rating_ci_low"),
+    ("rating_ci_high", "avg_rating_ci_high"),
+    ("movie_count", "movie_count"),
+    ("avg_runtime", "avg_runtime"),
+]
+
+
+def insights_report(
+    top_rated: pd.DataFrame,
+    rating_discrepancies: pd.DataFrame,
+    genre_stats: List[GenreStats],
+    k: int = 20,
+) -> Report:
+    """The insight tables as a report, rows are only formatted while a writer streams
+    them"""
+    return Report(
+        title="Movie Analysis Insights",
+        tables=[
+            frame_table(
+                "top_rated",
+                f"Top {k} Highest Rated Movies",
+                top_rated,
+                [*MOVIE_FIELDS, ("avg_rating", "avg_rating")],
+                markdown_header=get_movie_table_header(),
+                markdown_row=format_movie_row,
+            ),
+            frame_table(
+                "rating_discrepancies",
+                "Most Controversial Movies",
+                rating_discrepancies,
+                [*MOVIE_FIELDS, ("rating_diff", "difference")],
+                markdown_header=get_controversy_table_header(),
+                markdown_row=format_controversy_row,
+            ),
+            ReportTable(
+                "genre_stats",
+                "Genre Statistics",
+                GENRE_FIELDS,
+                rows=lambda: genre_stats,
+                markdown_header=get_genre_table_header(),
+                markdown_row=format_genre_row,
+            ),
+        ],
+    )
+
+
+def write_insights(
+    report: Report, output_dir: Path, formats: Sequence[str] = ("md",)
+) -> List[Path]:
+    """movie_insights.md / .json / .html / movie_insights_<table>.csv in output_dir"""
+    paths = write_report(report, output_dir / "movie_insights.md", formats)
+    logger.info(f"Insights saved to {', '.join(map(str, paths))}")
+    return paths
+
+
+def generate_key_insights(
+    data: MovieData,
+    output_dir: Path,
+    formats: Sequence[str] = ("md",),
+    cache: Optional[RenderCache] = None,
+) -> Dict[str, Any]:
     """Generate all insights using functional programming patterns"""
     try:
-        insights = {
-            "top_rated": get_top_rated_movies(data),
-            "genre_stats": get_genre_statistics(data),
-            "rating_discrepancies": find_rating_discrepancies(data)
+        insight_functions = {
+            "top_rated": lambda d: top_rated_frame(d.valid_ratings),
+            "genre_stats": get_genre_statistics,
+            "rating_discrepancies": lambda d: rating_discrepancies_frame(
+                d.valid_ratings
+            ),
         }
-
-        markdown_sections = [
-            "# Movie Analysis Insights\n",
-            "\n## Top 20 Highest Rated Movies\n",
-            format_table_section(insights["top_rated"], get_movie_table_header()),
-            "\n## Most Controversial Movies\n",
-            format_table_section(insights["rating_discrepancies"], get_controversy_table_header()),
-            "\n## Genre Statistics\n",
-            format_table_section(map(format_genre_row, insights["genre_stats"]), get_genre_table_header())
-        ]
-
-        markdown_content = reduce(lambda acc, section: acc + section, markdown_sections, "")
-        output_path = output_dir / "movie_insights.md"
-        output_path.write_text(markdown_content)
-        logger.info(f"Insights saved to {output_path}")
-
-        return insights
+        return cached_insights(
+            data,
+            output_dir,
+            formats,
+            cache,
+            lambda: {
+                name: _profiled_insight(name, func, data)
+                for name, func in insight_functions.items()
+            },
+        )
     except Exception as e:
         logger.error(f"Error generating insights: {e}")
-        raise
\ No newline at end of file
+        raise
+
+
+def cached_insights(
+    source: Any,
+    output_dir: Path,
+    formats: Sequence[str],
+    cache: Optional[RenderCache],
+    compute: Callable[[], Dict[str, Any]],
+) -> Dict[str, Any]:
+    """Compute and write the insights, unless the cache says the files were written from
+    the same inputs.
+
+    compute returns the top_rated / rating_discrepancies frames and the genre_stats
+    list, the returned summary is stored in the manifest so a skipped run still returns
+    it.
+    """
+    key = insights_key(source, formats) if cache is not None else ""
+    if cache is not None and cache.is_fresh("insights", key):
+        cached = cache.result("insights")
+        return {
+            **cached,
+            "genre_stats": [GenreStats(*row) for row in cached["genre_stats"]],
+        }
+
+    results = compute()
+    with profiled("insight/write_report"):
+        paths = write_insights(insights_report(**results), output_dir, formats)
+
+    summary = {
+        "top_rated": list(
+            map(format_movie_row, results["top_rated"].itertuples(index=False))
+        ),
+        "genre_stats": results["genre_stats"],
+        "rating_discrepancies": list(
+            map(
+                format_controversy_row,
+                results["rating_discrepancies"].itertuples(index=False),
+            )
+        ),
+    }
+    if cache is not None:
+        cache.record("insights", key, paths, result=summary)
+    return summary
+
+
+def _profiled_insight(
+    name: str, func: Callable[[MovieData], Any], data: MovieData
+) -> Any:
+    with profiled(f"insight/{name}", rows_in=len(data.df)) as probe:
+        result = func(data)
+        probe.rows_out = len(result)
+    return result
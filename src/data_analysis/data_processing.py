@@ -1,108 +1,487 @@
+import hashlib
+import json
+import re
+import shutil
 from functools import partial, reduce
-from typing import Callable, List, Dict, Any
-import pandas as pd
 from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
-from src.utils.types import MovieData
-from src.utils.logger import (setup_logger)
+import numpy as np
+import pandas as pd
+
+from src.data_analysis.column_store import (
+    ColumnStoreError,
+    read_columns,
+    read_schema,
+    write_columns,
+)
 from src.utils.config import ProjectConfig
+from src.utils.logger import setup_logger
+from src.utils.profiling import profiled
+from src.utils.types import MovieData
+from src.utils.validation import apply_rules, rules_fingerprint
+
+logger = setup_logger("data_analysis", ProjectConfig.get_log_file("data_processing"))
+
+# Bump whenever a processing stage changes its output -> invalidates every cached frame
+PIPELINE_VERSION = 4
+
+# Cache entries are <csv stem>-<key>, the key being this many bytes of the fingerprint
+# hash in hex
+CACHE_KEY_BYTES = 8
+
+try:
+    import pyarrow  # noqa: F401 -> optional, titles fall back to plain python strings
+
+    TITLE_DTYPE = "string[pyarrow]"
+except ImportError:
+    TITLE_DTYPE = "object"
+
+# Declared ingest schema: the only columns the pipeline reads -> everything else is
+# never parsed. None lets read_csv infer, the numeric stage then converts those columns
+# to their compact dtype.
+INGEST_SCHEMA: Dict[str, Optional[str]] = {
+    "movie_title": TITLE_DTYPE,
+    "in_theaters_date": "category",  # release dates repeat a lot
+    "genre": "category",  # a few hundred distinct genre lists -> 1-2 byte codes per row
+    "tomatometer_rating": None,
+    "tomatometer_count": None,
+    "audience_rating": None,
+    "audience_count": None,
+    "runtime_in_minutes": None,
+}
+
+# Compact dtypes of the numeric columns, float32 keeps NaN for missing ratings/runtimes
+NUMERIC_DTYPES: Dict[str, str] = {
+    "tomatometer_rating": "float32",
+    "audience_rating": "float32",
+    "runtime_in_minutes": "float32",
+    # nullable, audience counts go past int16/uint16 and float32 precision
+    "tomatometer_count": "UInt32",
+    "audience_count": "UInt32",
+}
 
-logger = setup_logger('data_analysis', ProjectConfig.get_log_file('data_processing'))
+# Release date formats tried in order on the distinct date strings, empty -> pandas
+# format inference (slow)
+DATE_FORMATS: Tuple[str, ...] = ("%Y-%m-%d",)
+
+# Columns derived from the parsed release date in the same pass: year -> release_year,
+# decade, month
+DATE_PARTS: Tuple[str, ...] = ("year",)
+
+# Rows per chunk in streaming mode
+DEFAULT_CHUNK_SIZE = 100_000
 
 
 class DataProcessingError(Exception):
     """Custom exception for data processing errors."""
+
     pass
 
 
-def read_movie_data(file_path: Path) -> MovieData:
+def read_movie_data(
+    file_path: Path, use_cache: bool = True, cache_dir: Optional[Path] = None
+) -> MovieData:
     """Read and validate data from file -> after processed"""
     try:
         logger.info("Data processing module initialized")  # Test logging
-        logger.info(f'Reading movie data from {file_path}.')
-        df = pd.read_csv(file_path)
-        processed_data = process_raw_data(df)
+        logger.info(f"Reading movie data from {file_path}.")
+        if not use_cache:
+            return MovieData(df=process_raw_data(_profiled_read_csv(file_path)))
+
+        with profiled("ingest/cache_lookup") as probe:
+            cache_path = _cache_path(file_path, cache_dir or ProjectConfig.CACHE_DIR)
+            cached = _load_cached(cache_path)
+            probe.rows_out = None if cached is None else len(cached)
+        if cached is not None:
+            return MovieData(df=cached)
+
+        processed_data = process_raw_data(_profiled_read_csv(file_path))
+        with profiled("ingest/cache_store", rows_in=len(processed_data)):
+            _store_cached(processed_data, cache_path, file_path)
         return MovieData(df=processed_data)
     except Exception as e:
-        logger.error(f'Error reading movie data: {str(e)}')
-        raise DataProcessingError(f'Error reading movie data: {str(e)}')
+        logger.error(f"Error reading movie data: {str(e)}")
+        raise DataProcessingError(f"Error reading movie data: {str(e)}")
+
+
+def read_csv_options() -> Dict[str, Any]:
+    """pd.read_csv keyword arguments implementing the declared ingest schema."""
+    return {
+        "usecols": list(INGEST_SCHEMA.keys()),
+        "dtype": {
+            col: dtype for col, dtype in INGEST_SCHEMA.items() if dtype is not None
+        },
+    }
+
+
+def _read_csv(file_path: Path, **kwargs: Any) -> Any:
+    """pd.read_csv with column projection and the ingest dtypes, extra kwargs go
+    straight to pandas."""
+    return pd.read_csv(file_path, **read_csv_options(), **kwargs)
+
+
+def _profiled_read_csv(file_path: Path) -> pd.DataFrame:
+    with profiled("ingest/read_csv") as probe:
+        df = _read_csv(file_path)
+        probe.rows_out = len(df)
+    return df
+
+
+def ingest_memory_report(file_path: Path, nrows: Optional[int] = None) -> pd.DataFrame:
+    """Per-column memory of a plain pd.read_csv (before) vs the declared ingest schema
+    (after).
+
+    Both sides hold the same rows, the after side is taken once the dtypes are converted
+    but before filtering.
+    """
+    try:
+        before = pd.read_csv(file_path, nrows=nrows)
+        after = _convert_numeric_columns(
+            _convert_dates(_read_csv(file_path, nrows=nrows))
+        )
+
+        report = pd.DataFrame(
+            {
+                "dtype_before": before.dtypes.astype(str),
+                "bytes_before": before.memory_usage(deep=True, index=False),
+                "dtype_after": after.dtypes.astype(str),
+                "bytes_after": after.memory_usage(deep=True, index=False),
+            }
+        )
+        report = report.fillna(
+            {
+                "dtype_before": "-",
+                "dtype_after": "-",
+                "bytes_before": 0,
+                "bytes_after": 0,
+            }
+        )
+        report.loc["total"] = [
+            "",
+            report["bytes_before"].sum(),
+            "",
+            report["bytes_after"].sum(),
+        ]
+        report = report.astype({"bytes_before": "int64", "bytes_after": "int64"})
+        logger.info(
+            f"Ingest memory: {int(report.loc['total', 'bytes_before']):,} B -> "
+            f"{int(report.loc['total', 'bytes_after']):,} B."
+        )
+        return report
+    except Exception as e:
+        logger.error(f"Error building memory report: {str(e)}")
+        raise DataProcessingError(f"Error building memory report: {str(e)}")
+
+
+def _file_fingerprint(file_path: Path, block_size: int = 1 << 20) -> Dict[str, Any]:
+    """Size, mtime and content hash of the source file plus the pipeline version and
+    validation rules."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        for block in iter(partial(f.read, block_size), b""):  # read until empty bytes
+            digest.update(block)
+
+    stat = file_path.stat()
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "content_hash": digest.hexdigest(),
+        "pipeline_version": PIPELINE_VERSION,
+        "validation_rules": rules_fingerprint(),
+    }
+
+
+def _cache_path(file_path: Path, cache_dir: Path) -> Path:
+    """Cache directory for a source file, keyed on its fingerprint."""
+    fingerprint = _file_fingerprint(file_path)
+    key = hashlib.blake2b(
+        json.dumps(fingerprint, sort_keys=True).encode(), digest_size=CACHE_KEY_BYTES
+    ).hexdigest()
+    return cache_dir / f"{file_path.stem}-{key}"
+
+
+def _load_cached(cache_path: Path) -> Optional[pd.DataFrame]:
+    """Return the cached frame or None if there is no usable cache entry."""
+    if not cache_path.exists():
+        logger.info(f"No processed-data cache at {cache_path}.")
+        return None
+    try:
+        df = read_columns(cache_path)
+        logger.info(f"Loaded processed data from cache {cache_path}.")
+        return df
+    except Exception as e:
+        # a broken cache is never fatal, we just rebuild it
+        logger.warning(f"Ignoring unreadable cache {cache_path}: {str(e)}")
+        shutil.rmtree(cache_path, ignore_errors=True)
+        return None
+
+
+def _stale_entries(cache_path: Path, file_path: Path) -> List[Path]:
+    """Other cache entries of the same source file -> exactly <stem>-<key> and recording
+    this file as source, so movies.csv never drops the entries of movies-2024.csv or of
+    a movies.csv in another directory.
+    """
+    if not cache_path.parent.exists():
+        return []
+    pattern = re.compile(
+        rf"{re.escape(file_path.stem)}-[0-9a-f]{{{2 * CACHE_KEY_BYTES}}}"
+    )
+    source = str(file_path.resolve())
+
+    def _same_source(entry: Path) -> bool:
+        try:
+            return bool(read_schema(entry)["metadata"].get("source") == source)
+        except ColumnStoreError:
+            return True  # unreadable -> no use to any source
+
+    return [
+        entry
+        for entry in cache_path.parent.iterdir()
+        if entry.is_dir()
+        and entry != cache_path
+        and pattern.fullmatch(entry.name)
+        and _same_source(entry)
+    ]
+
+
+def _store_cached(df: pd.DataFrame, cache_path: Path, file_path: Path) -> None:
+    """Store the processed frame and drop stale entries for the same source file."""
+    try:
+        stale = _stale_entries(cache_path, file_path)
+        list(map(partial(shutil.rmtree, ignore_errors=True), stale))
+
+        write_columns(
+            df,
+            cache_path,
+            metadata={
+                "source": str(file_path.resolve()),
+                "pipeline_version": PIPELINE_VERSION,
+            },
+        )
+        logger.info(
+            f"Cached processed data in {cache_path} (removed {len(stale)} stale "
+            "entries)."
+        )
+    except Exception as e:
+        logger.warning(f"Could not cache processed data: {str(e)}")
 
 
 def process_raw_data(df: pd.DataFrame) -> pd.DataFrame:
     """Process raw data."""
     try:
-        processing_functions: List[Callable[[pd.DataFrame], pd.DataFrame]] = [
-            # list of functions to apply to the data in order, first dataFrame is the input, second is the output
-            _convert_dates,
-            _convert_numeric_columns,
-            _filter_valid_data,
-            _clean_genres
-        ]
-        return reduce(lambda data, func: func(data), processing_functions,
-                      df)  # 3 args: function(lambda), iterable, initial value
+        # 3 args: function, iterable, initial value
+        return reduce(_run_stage, _processing_stages(), df)
+    except Exception as e:
+        logger.error(f"Error processing pipline failed: {str(e)}")
+        raise DataProcessingError(f"Processing pipline error: {str(e)}")
+
+
+def stream_movie_data(
+    file_path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[MovieData]:
+    """Read the CSV lazily in chunks, each chunk goes through the same stages as
+    process_raw_data.
+
+    Only one raw chunk is alive at a time, so memory is bounded by chunk_size and not by
+    the file size. Consumers fold the chunks into mergeable partial results (see
+    data_analysis.streaming).
+    """
+    if chunk_size <= 0:
+        raise DataProcessingError(f"Chunk size must be positive, got {chunk_size}")
+    try:
+        logger.info(
+            f"Streaming movie data from {file_path} in chunks of {chunk_size} rows."
+        )
+        with _read_csv(file_path, chunksize=chunk_size) as reader:
+            yield from map(lambda chunk: MovieData(df=process_raw_data(chunk)), reader)
+    except DataProcessingError:
+        raise
     except Exception as e:
-        logger.error(f'Error processing pipline failed: {str(e)}')
-        raise DataProcessingError(f'Processing pipline error: {str(e)}')
+        logger.error(f"Error streaming movie data: {str(e)}")
+        raise DataProcessingError(f"Error streaming movie data: {str(e)}")
+
 
+def _run_stage(
+    data: pd.DataFrame, func: Callable[[pd.DataFrame], pd.DataFrame]
+) -> pd.DataFrame:
+    """Apply one stage, instrumented when profiling is enabled (utils.profiling)."""
+    with profiled(f"processing/{func.__name__}", rows_in=len(data)) as probe:
+        result = func(data)
+        probe.rows_out = len(result)
+    return result
 
-def _convert_dates(df: pd.DataFrame) -> pd.DataFrame:
-    """Convert dates"""
+
+def _processing_stages() -> List[Callable[[pd.DataFrame], pd.DataFrame]]:
+    """Stages applied to the data in order, shared by the in-memory and streaming
+    readers."""
+    return [
+        # list of functions to apply to the data in order, first dataFrame is the input,
+        # second is the output
+        _convert_dates,
+        _convert_numeric_columns,
+        _filter_valid_data,
+        _clean_genres,
+        _compact_dtypes,
+    ]
+
+
+def _convert_dates(
+    df: pd.DataFrame,
+    formats: Tuple[str, ...] = DATE_FORMATS,
+    parts: Tuple[str, ...] = DATE_PARTS,
+) -> pd.DataFrame:
+    """Convert dates
+
+    Release dates repeat a lot -> only the distinct strings are parsed and the results
+    are taken back to the rows by their codes. Adds release_<part> for every part in
+    parts (release_year, release_decade, release_month).
+    """
     try:
+        column = df["in_theaters_date"]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            codes, uniques = column.cat.codes.to_numpy(), column.cat.categories
+        else:
+            codes, uniques = pd.factorize(column, use_na_sentinel=True)
+        parsed = parse_dates(pd.Index(uniques).astype(str), formats)
+
+        coerced = np.bincount(codes[codes >= 0], minlength=len(uniques))[
+            parsed.isna()
+        ].sum()
+        if coerced:
+            logger.info(
+                f"Coerced {coerced} of {int((codes >= 0).sum())} release dates to NaT "
+                f"({int(parsed.isna().sum())} distinct unparseable values)."
+            )
+
+        part_values = {
+            "year": lambda: parsed.year,
+            "decade": lambda: parsed.year // 10 * 10,
+            "month": lambda: parsed.month,
+        }
         return df.assign(
-            release_year=pd.to_datetime(
-                df['in_theaters_date'], errors='coerce'  # if error, return NaT
-            ).dt.year  # extract year
+            **{
+                # extra NaN slot -> code -1 (missing date) takes it
+                f"release_{part}": np.append(
+                    np.asarray(part_values[part](), dtype=np.float64), np.nan
+                )[codes]
+                for part in parts
+            }
         )
     except Exception as e:
-        logger.error(f'Data conversion failed: {str(e)}')
-        raise DataProcessingError(f'Data conversion error: {str(e)}')
+        logger.error(f"Data conversion failed: {str(e)}")
+        raise DataProcessingError(f"Data conversion error: {str(e)}")
+
+
+def parse_dates(
+    values: pd.Index, formats: Tuple[str, ...] = DATE_FORMATS
+) -> pd.DatetimeIndex:
+    """Parse date strings with the first format that fits each of them.
+
+    Strings no format fits fall back to pandas format inference, per string (NaT if that
+    fails too), so formats only speed up the usual layouts and never drop dates pandas
+    could read. No formats -> inference for everything (what the stage did before, much
+    slower on big inputs).
+    """
+    if not formats:
+        # if error, return NaT
+        return pd.DatetimeIndex(pd.to_datetime(values, errors="coerce"))
+
+    parsed = np.full(len(values), np.datetime64("NaT"), dtype="datetime64[ns]")
+    pending = np.arange(len(values))
+    for date_format in formats:
+        attempt = pd.to_datetime(values[pending], format=date_format, errors="coerce")
+        matched = ~attempt.isna()
+        parsed[pending[matched]] = attempt[matched].to_numpy(dtype="datetime64[ns]")
+        pending = pending[~matched]
+        if len(pending) == 0:
+            break
+    if len(pending):
+        # leftovers don't share one layout -> 'mixed' infers the format of every string
+        # on its own
+        inferred = pd.to_datetime(values[pending], format="mixed", errors="coerce")
+        parsed[pending] = inferred.to_numpy(dtype="datetime64[ns]")
+    return pd.DatetimeIndex(parsed)
 
 
 def _convert_numeric_columns(df: pd.DataFrame) -> pd.DataFrame:
     """Convert numeric columns."""
     try:
-        numeric_columns = {
-            'tomatometer_rating': 'float64',
-            'audience_rating': 'float64',
-            'runtime_in_minutes': 'float64',
-        }
-
         conversion_results = {
-            col: pd.to_numeric(df[col], errors='coerce')  # if error, return NaN
-            for col in numeric_columns.keys()  # for each column in the dict
+            col: _to_compact_numeric(df[col], dtype)
+            for col, dtype in NUMERIC_DTYPES.items()  # for each column in the dict
+            if col in df.columns
         }
 
-        return df.assign(
-            **conversion_results)  # the double asterisk unpacks the dictionary: example: {'a': 1, 'b': 2} -> a=1, b=2
+        # the double asterisk unpacks the dictionary: {'a': 1, 'b': 2} -> a=1, b=2
+        return df.assign(**conversion_results)
 
     except Exception as e:
-        logger.error(f'Error converting numeric columns: {str(e)}')
-        raise DataProcessingError(f'Error converting numeric columns: {str(e)}')
+        logger.error(f"Error converting numeric columns: {str(e)}")
+        raise DataProcessingError(f"Error converting numeric columns: {str(e)}")
+
+
+def _to_compact_numeric(series: pd.Series, dtype: str) -> pd.Series:
+    """pd.to_numeric + downcast, anything that doesn't fit an integer dtype becomes
+    NA."""
+    numeric = pd.to_numeric(series, errors="coerce")  # if error, return NaN
+    if pd.api.types.is_integer_dtype(dtype):
+        limits = np.iinfo(pd.api.types.pandas_dtype(dtype).numpy_dtype)
+        numeric = numeric.where(
+            numeric.between(limits.min, limits.max) & (numeric % 1 == 0)
+        )
+    return numeric.astype(dtype)
 
 
 def _filter_valid_data(df: pd.DataFrame) -> pd.DataFrame:
-    """Filter out rows with invalid data."""
+    """Filter out rows with invalid data -> the active validation rules
+    (utils.validation), fused into one pass."""
     try:
-        conditions = [
-            df['release_year'].between(1900, 2024),
-            df['tomatometer_rating'].between(0, 100),
-            df['audience_rating'].between(0, 100),
-            df['runtime_in_minutes'].between(0, 280),
-        ]
-
-        return df[reduce(lambda x, y: x & y, conditions)]  # all conditions must be true
+        return apply_rules(df)
     except Exception as e:
-        logger.error(f'Error filtering data: {str(e)}')
-        raise DataProcessingError(f'Error filtering data: {str(e)}')
+        logger.error(f"Error filtering data: {str(e)}")
+        raise DataProcessingError(f"Error filtering data: {str(e)}")
 
 
 def _clean_genres(df: pd.DataFrame) -> pd.DataFrame:
     """Clean genres column."""
     try:
-        return df.assign(
-            genre=df['genre'].fillna('Unknown')  # fill NaN with 'Unknown'
-        )
+        genre = df["genre"]
+        if isinstance(genre.dtype, pd.CategoricalDtype):
+            # categorical fillna only accepts known categories, unused ones (filtered
+            # rows) are dropped too
+            genre = genre.cat.remove_unused_categories()
+            if "Unknown" not in genre.cat.categories:
+                genre = genre.cat.add_categories("Unknown")
+
+        return df.assign(genre=genre.fillna("Unknown"))  # fill NaN with 'Unknown'
 
     except Exception as e:
-        logger.error(f'Error cleaning genres: {str(e)}')
-        raise DataProcessingError(f'Error cleaning genres: {str(e)}')
+        logger.error(f"Error cleaning genres: {str(e)}")
+        raise DataProcessingError(f"Error cleaning genres: {str(e)}")
+
+
+def _compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Downcast columns whose range is only known after filtering.
+
+    release_year becomes int16 only when every year is there and fits, which the default
+    rules guarantee (1900-2024). Rule files without a release_year rule (or with wider
+    bounds) keep float64 years.
+    """
+    try:
+        years = df["release_year"].to_numpy(dtype=np.float64)
+        limits = np.iinfo(np.int16)
+        if len(years) and not (
+            np.isfinite(years).all()
+            and limits.min <= years.min()
+            and years.max() <= limits.max
+        ):
+            logger.info(
+                "release_year kept as float64: missing or out of int16 range years "
+                "passed validation."
+            )
+            return df
+        return df.assign(release_year=df["release_year"].astype("int16"))
+    except Exception as e:
+        logger.error(f"Error compacting dtypes: {str(e)}")
+        raise DataProcessingError(f"Error compacting dtypes: {str(e)}")
@@ -0,0 +1,198 @@
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.data_analysis.grouping import GroupKey, GroupStats, group_stats
+from src.utils.config import ProjectConfig
+from src.utils.logger import setup_logger
+from src.utils.types import MovieData, register_view
+
+logger = setup_logger("genre_index", ProjectConfig.get_log_file("genre_index"))
+
+GENRE_SEPARATOR = ","
+
+
+class GenreIndexError(Exception):
+    """Custom exception for genre index errors."""
+
+    pass
+
+
+class GenreIndex(NamedTuple):
+    """Row -> genre membership without exploding the frame.
+
+    The genre column holds a few hundred distinct lists ("Action & Adventure, Comedy"),
+    so every row keeps one code of its list and the lists are expanded once into a small
+    (lists x genres) boolean matrix. Per-genre numbers are computed per list first
+    (bincount over the row codes) and then spread over the genres with one tiny matrix
+    product.
+    """
+
+    genres: np.ndarray  # genre id -> name
+    combos: np.ndarray  # list id -> original genre string
+    membership: np.ndarray  # bool (lists x genres), membership[list, genre]
+    codes: np.ndarray  # list id of every row, -1 for missing
+
+
+def split_genres(combo: str) -> List[str]:
+    """'Action & Adventure, Comedy' -> ['Action & Adventure', 'Comedy']"""
+    return [
+        genre.strip() for genre in str(combo).split(GENRE_SEPARATOR) if genre.strip()
+    ]
+
+
+def _membership(combos: Sequence[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Genre names and the (combos x genres) membership matrix."""
+    split = list(map(split_genres, combos))
+    genres = np.array(
+        sorted({genre for genre_list in split for genre in genre_list}), dtype=object
+    )
+    lookup = {genre: genre_id for genre_id, genre in enumerate(genres)}
+
+    membership = np.zeros((len(split), len(genres)), dtype=bool)
+    rows = np.repeat(np.arange(len(split)), list(map(len, split)))
+    cols = np.fromiter(
+        (lookup[genre] for genre_list in split for genre in genre_list),
+        dtype=np.intp,
+        count=len(rows),
+    )
+    membership[rows, cols] = True
+    return genres, membership
+
+
+def build_genre_index(genre: pd.Series) -> GenreIndex:
+    """Factorize the genre column once and expand its distinct lists."""
+    try:
+        if isinstance(genre.dtype, pd.CategoricalDtype):
+            codes, combos = genre.cat.codes.to_numpy(), genre.cat.categories.to_numpy(
+                dtype=object
+            )
+        else:
+            codes, combos = pd.factorize(genre, use_na_sentinel=True)
+            combos = np.asarray(combos, dtype=object)
+
+        genres, membership = _membership(combos)
+        logger.info(
+            f"Built genre index: {len(genre)} rows, {len(combos)} genre lists, "
+            f"{len(genres)} genres."
+        )
+        return GenreIndex(
+            genres=genres,
+            combos=combos,
+            membership=membership,
+            codes=codes.astype(np.int32),
+        )
+    except Exception as e:
+        logger.error(f"Error building genre index: {str(e)}")
+        raise GenreIndexError(f"Error building genre index: {str(e)}")
+
+
+def genre_mask(index: GenreIndex, genre: str) -> np.ndarray:
+    """Boolean row mask of rows listing the genre."""
+    matches = np.flatnonzero(index.genres == genre)
+    if len(matches) == 0:
+        return np.zeros(len(index.codes), dtype=bool)
+    # extra slot -> code -1 is never a match
+    combo_has_genre = np.append(index.membership[:, matches[0]], False)
+    mask: np.ndarray = combo_has_genre[index.codes]
+    return mask
+
+
+def genre_group_stats(
+    index: GenreIndex,
+    df: pd.DataFrame,
+    columns: Sequence[str],
+    mask: Optional[np.ndarray] = None,
+) -> GroupStats:
+    """Per-genre count/sum/sumsq/min/max of the columns (grouping.group_stats keyed by
+    genre).
+
+    One scan per genre list, then spread over the genres. A movie listed under several
+    genres counts once in each of them. df has to be the frame the index was built on.
+    """
+    try:
+        lists = group_stats(
+            GroupKey(name="genre", labels=index.combos, codes=index.codes),
+            df,
+            columns,
+            mask,
+        )
+        if lists.min is None or lists.max is None:
+            raise GenreIndexError("Per-list stats are missing min/max")
+        member = index.membership.T  # (genres x lists)
+        spread = member.astype(np.float64)
+        # (genres x lists x columns)
+        listed = member[:, :, None] & (lists.count > 0)[None]
+        count = member.astype(np.int64) @ lists.count
+        return GroupStats(
+            key="genre",
+            labels=index.genres,
+            columns=lists.columns,
+            count=count,
+            sum=spread @ lists.sum,
+            sumsq=spread @ lists.sumsq,
+            min=np.where(
+                count > 0, np.where(listed, lists.min[None], np.inf).min(axis=1), np.nan
+            ),
+            max=np.where(
+                count > 0,
+                np.where(listed, lists.max[None], -np.inf).max(axis=1),
+                np.nan,
+            ),
+        )
+    except Exception as e:
+        logger.error(f"Error calculating genre stats: {str(e)}")
+        raise GenreIndexError(f"Error calculating genre stats: {str(e)}")
+
+
+def combos_to_genres(moments: pd.DataFrame) -> pd.DataFrame:
+    """Re-key moments grouped by genre list (e.g. streaming partials) to individual
+    genres."""
+    genres, membership = _membership(moments.index)
+    return pd.DataFrame(
+        membership.T.astype(np.float64) @ moments.to_numpy(dtype=np.float64),
+        index=pd.Index(genres, name="genre"),
+        columns=moments.columns,
+    )
+
+
+def genre_cooccurrence(
+    index: GenreIndex, mask: Optional[np.ndarray] = None
+) -> pd.DataFrame:
+    """(genres x genres) number of movies listing both genres, the diagonal is the
+    per-genre movie count.
+
+    Rows -> M.T @ M over the row membership, computed on the lists instead: each list
+    weighted by its number of rows, so the frame is never expanded.
+    """
+    try:
+        selected = index.codes >= 0 if mask is None else (index.codes >= 0) & mask
+        combo_counts = np.bincount(
+            index.codes[selected], minlength=len(index.combos)
+        ).astype(np.int64)
+        membership = index.membership.astype(np.int64)
+        return pd.DataFrame(
+            membership.T @ (membership * combo_counts[:, None]),
+            index=pd.Index(index.genres, name="genre"),
+            columns=pd.Index(index.genres, name="genre"),
+        )
+    except Exception as e:
+        logger.error(f"Error calculating genre co-occurrence: {str(e)}")
+        raise GenreIndexError(f"Error calculating genre co-occurrence: {str(e)}")
+
+
+@register_view("genre_index")
+def _genre_index_view(data: MovieData) -> GenreIndex:
+    return build_genre_index(data.df["genre"])
+
+
+@register_view("genre")
+def _genre_slice(data: MovieData, genre: str) -> pd.DataFrame:
+    """Rows listing the genre"""
+    return data.df[genre_mask(data.view("genre_index"), genre)]
+
+
+@register_view("genre_cooccurrence")
+def _genre_cooccurrence_view(data: MovieData) -> pd.DataFrame:
+    return genre_cooccurrence(data.view("genre_index"))
@@ -0,0 +1,155 @@
+from typing import NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.utils.config import ProjectConfig
+from src.utils.logger import setup_logger
+
+logger = setup_logger("grouping", ProjectConfig.get_log_file("grouping"))
+
+# What group_stats computes, mean / std / etc. are derived from these
+GROUP_STATS = ("count", "sum", "sumsq", "min", "max")
+
+# count / sum / sum of squares rebuild mean and std -> and they simply add up
+MOMENT_STATS = ("count", "sum", "sumsq")
+
+
+class GroupingError(Exception):
+    """Custom exception for grouping errors."""
+
+    pass
+
+
+class GroupKey(NamedTuple):
+    """A key column factorized once, shared by every aggregate over it:
+    labels[codes[row]] is the row's key"""
+
+    name: str
+    labels: np.ndarray  # sorted distinct keys
+    codes: np.ndarray  # int64 group of every row, -1 for a missing key
+
+
+class GroupStats(NamedTuple):
+    """count/sum/sumsq/min/max per group and column, every array (groups x columns).
+
+    Missing values don't count, min/max are NaN for groups without values (None when not
+    computed).
+    """
+
+    key: str
+    labels: np.ndarray
+    columns: Tuple[str, ...]
+    count: np.ndarray  # type: ignore[assignment]  # int64, shadows tuple.count
+    sum: np.ndarray
+    sumsq: np.ndarray
+    min: Optional[np.ndarray]
+    max: Optional[np.ndarray]
+
+    def column(self, col: str) -> int:
+        return self.columns.index(col)
+
+    def mean(self) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 0, self.sum / self.count, np.nan)
+
+    def std(self) -> np.ndarray:
+        """ddof=1 like pandas, NaN below two values"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            variance = (self.sumsq - self.sum * self.mean()) / (self.count - 1)
+            # clip tiny negative values coming from float rounding
+            return np.where(self.count > 1, np.sqrt(np.clip(variance, 0, None)), np.nan)
+
+
+def factorize_key(keys: pd.Series, name: Optional[str] = None) -> GroupKey:
+    """Factorize a key column (sorted labels, NaN keys -> -1)"""
+    codes, labels = pd.factorize(keys, sort=True)
+    return GroupKey(
+        name=name or keys.name, labels=np.asarray(labels), codes=codes.astype(np.int64)
+    )
+
+
+def group_stats(
+    key: GroupKey,
+    df: pd.DataFrame,
+    columns: Sequence[str],
+    mask: Optional[np.ndarray] = None,
+    extrema: bool = True,
+) -> GroupStats:
+    """Aggregate many columns over one factorized key in one scan.
+
+    The (rows x columns) values are flattened to one bin per (group, column), so each
+    statistic is a single np.bincount (np.minimum.at / np.maximum.at for min/max)
+    whatever the number of columns. df has to be the frame the key was factorized on;
+    mask optionally limits the rows. extrema=False skips min/max (the slowest two), e.g.
+    for moments that only get merged.
+    """
+    try:
+        n_groups, n_columns = len(key.labels), len(columns)
+        selected = key.codes >= 0 if mask is None else (key.codes >= 0) & mask
+        everything = bool(selected.all())  # usual case -> no row copies
+        # float64 -> sums of float32/UInt32 columns would lose precision
+        values = np.column_stack(
+            [
+                column if everything else column[selected]
+                for column in (
+                    df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+                    for col in columns
+                )
+            ]
+        ).ravel()
+        codes = key.codes if everything else key.codes[selected]
+        bins = (codes[:, None] * n_columns + np.arange(n_columns)).ravel()
+        valid = ~np.isnan(values)
+        if not valid.all():
+            bins, values = bins[valid], values[valid]
+
+        size = n_groups * n_columns
+        count = np.bincount(bins, minlength=size)
+
+        def _shaped(stat: np.ndarray) -> np.ndarray:
+            return stat.reshape(n_groups, n_columns)
+
+        def _extreme(ufunc: np.ufunc, start: float) -> Optional[np.ndarray]:
+            if not extrema:
+                return None
+            stat = np.full(size, start)
+            ufunc.at(stat, bins, values)
+            return _shaped(np.where(count > 0, stat, np.nan))
+
+        return GroupStats(
+            key=key.name,
+            labels=key.labels,
+            columns=tuple(columns),
+            count=_shaped(count),
+            sum=_shaped(np.bincount(bins, weights=values, minlength=size)),
+            sumsq=_shaped(np.bincount(bins, weights=values * values, minlength=size)),
+            min=_extreme(np.minimum, np.inf),
+            max=_extreme(np.maximum, -np.inf),
+        )
+    except Exception as e:
+        logger.error(f"Error calculating group stats: {str(e)}")
+        raise GroupingError(f"Error calculating group stats: {str(e)}")
+
+
+def stats_frame(
+    stats: GroupStats, names: Sequence[str] = ("mean", "count", "std")
+) -> pd.DataFrame:
+    """(column, stat) frame indexed by the group labels, the layout of
+    groupby().agg([...]).
+
+    names are GROUP_STATS or the derived 'mean' / 'std'.
+    """
+    derived = {"mean": stats.mean, "std": stats.std}
+    arrays = {
+        name: derived[name]() if name in derived else getattr(stats, name)
+        for name in names
+    }
+    return pd.DataFrame(
+        {
+            (col, name): arrays[name][:, position]
+            for position, col in enumerate(stats.columns)
+            for name in names
+        },
+        index=pd.Index(stats.labels, name=stats.key),
+    )
@@ -0,0 +1,328 @@
+import hashlib
+import io
+import itertools
+import json
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data_analysis.data_processing import (
+    DEFAULT_CHUNK_SIZE,
+    PIPELINE_VERSION,
+    process_raw_data,
+    read_csv_options,
+)
+from src.data_analysis.sketches import HistogramSketch
+from src.data_analysis.streaming import (
+    PartialResults,
+    collect_partial_results,
+    merge_partial_results,
+)
+from src.utils.config import ProjectConfig
+from src.utils.logger import setup_logger
+from src.utils.types import MovieData
+from src.utils.validation import rules_fingerprint
+
+logger = setup_logger("incremental", ProjectConfig.get_log_file("incremental"))
+
+# Bump when the layout of the state file changes (4: the anchor hashes the first and
+# the last ANCHOR_BYTES of the folded prefix only)
+STATE_VERSION = 4
+
+# Block size of the backward scan for the last complete row
+SCAN_BYTES = 64 * 1024
+
+# Bytes hashed at both ends of the folded prefix -> the header and the rows right before
+# the old offset
+ANCHOR_BYTES = 64 * 1024
+
+
+class IncrementalError(Exception):
+    """Custom exception for incremental update errors."""
+
+    pass
+
+
+class IncrementalState(NamedTuple):
+    """Mergeable statistics of the first `offset` bytes of the source file."""
+
+    partials: PartialResults
+    offset: int  # bytes already folded in, always at a row boundary
+    anchor: str  # hash of the first and the last ANCHOR_BYTES before offset
+    columns: List[str]
+    discrepancy_threshold: float
+
+
+class _ByteRange(io.RawIOBase):
+    """Read-only view of [start, end) of a binary file, lets pandas parse just the
+    appended rows."""
+
+    def __init__(self, handle: io.BufferedReader, start: int, end: int):
+        self._handle = handle
+        self._end = end
+        self._handle.seek(start)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        size = min(len(buffer), self._end - self._handle.tell())
+        if size <= 0:
+            return 0
+        data = self._handle.read(size)
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def default_state_path(file_path: Path) -> Path:
+    """Where the incremental state of a source file lives."""
+    return ProjectConfig.CACHE_DIR / f"{file_path.stem}-incremental.json"
+
+
+def update_incremental_state(
+    file_path: Path,
+    state_path: Optional[Path] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    discrepancy_threshold: float = 30.0,
+) -> PartialResults:
+    """Fold only the rows appended since the last run into the persisted state and
+    return the merged results.
+
+    A refresh reads the new bytes plus ANCHOR_BYTES at both ends of the folded prefix,
+    so its cost follows the appended delta and not the file size. A shorter file, a new
+    header, rewritten rows right before the old offset or a new pipeline version
+    trigger a full rebuild. Edits deeper inside the folded rows are not noticed, delete
+    the state file (default_state_path) to rebuild after rewriting the file.
+    """
+    state_path = state_path or default_state_path(file_path)
+    try:
+        end = _complete_rows_end(file_path)
+        state = _load_state(state_path)
+        if state is not None and not _can_extend(state, end, discrepancy_threshold):
+            state = None
+        if state is not None and state.anchor == _anchor(file_path, state.offset):
+            if state.offset == end:
+                logger.info(
+                    f"No new rows in {file_path}, reusing state from {state_path}."
+                )
+                return state.partials
+
+            logger.info(
+                f"Folding {end - state.offset} new bytes of {file_path} into the "
+                "incremental state."
+            )
+            delta = _fold_range(
+                file_path,
+                state.offset,
+                end,
+                state.columns,
+                chunk_size,
+                discrepancy_threshold,
+            )
+            partials = (
+                state.partials
+                if delta is None
+                else merge_partial_results(state.partials, delta, discrepancy_threshold)
+            )
+            columns = state.columns
+        else:
+            logger.info(f"Building incremental state for {file_path} from scratch.")
+            columns = list(pd.read_csv(file_path, nrows=0).columns)
+            rebuilt = _fold_range(
+                file_path, 0, end, None, chunk_size, discrepancy_threshold
+            )
+            if rebuilt is None:
+                raise IncrementalError(f"No rows to analyse in {file_path}")
+            partials = rebuilt
+
+        _save_state(
+            IncrementalState(
+                partials=partials,
+                offset=end,
+                anchor=_anchor(file_path, end),
+                columns=columns,
+                discrepancy_threshold=discrepancy_threshold,
+            ),
+            state_path,
+        )
+        return partials
+    except IncrementalError:
+        raise
+    except Exception as e:
+        logger.error(f"Error updating incremental state: {str(e)}")
+        raise IncrementalError(f"Error updating incremental state: {str(e)}")
+
+
+def _complete_rows_end(file_path: Path) -> int:
+    """Offset right after the last newline -> a row that is still being written is left
+    for the next run."""
+    size = file_path.stat().st_size
+    with open(file_path, "rb") as f:
+        position = size
+        while position > 0:
+            start = max(0, position - SCAN_BYTES)
+            f.seek(start)
+            block = f.read(position - start)
+            newline = block.rfind(b"\n")
+            if newline >= 0:
+                return start + newline + 1
+            position = start
+    return 0
+
+
+def _anchor(file_path: Path, offset: int) -> str:
+    """Hash of the first and the last ANCHOR_BYTES before offset (once when they
+    overlap)"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(offset).encode())
+    with open(file_path, "rb") as f:
+        digest.update(f.read(min(ANCHOR_BYTES, offset)))
+        tail = max(ANCHOR_BYTES, offset - ANCHOR_BYTES)
+        if tail < offset:
+            f.seek(tail)
+            digest.update(f.read(offset - tail))
+    return digest.hexdigest()
+
+
+def _can_extend(
+    state: IncrementalState, end: int, discrepancy_threshold: float
+) -> bool:
+    """True when the state could be extended to end, the caller still checks its
+    anchor."""
+    return state.offset <= end and state.discrepancy_threshold == discrepancy_threshold
+
+
+def _fold_range(
+    file_path: Path,
+    start: int,
+    end: int,
+    columns: Optional[List[str]],
+    chunk_size: int,
+    discrepancy_threshold: float,
+) -> Optional[PartialResults]:
+    """Parse and summarize bytes [start, end), columns=None means the range starts with
+    the header."""
+    if start >= end:
+        return None
+
+    header_options: Dict[str, Any] = (
+        {} if columns is None else {"header": None, "names": columns}
+    )
+    with open(file_path, "rb") as f:
+        reader = pd.read_csv(
+            io.BufferedReader(_ByteRange(f, start, end)),
+            chunksize=chunk_size,
+            **read_csv_options(),
+            **header_options,
+        )
+        first = next(reader, None)
+        if first is None:  # only a header / blank lines in the range
+            return None
+        chunks = map(
+            lambda chunk: MovieData(df=process_raw_data(chunk)),
+            itertools.chain([first], reader),
+        )
+        return collect_partial_results(chunks, discrepancy_threshold)
+
+
+def _frame_to_json(df: pd.DataFrame) -> Dict[str, Any]:
+    return {
+        "columns": [list(col) if isinstance(col, tuple) else col for col in df.columns],
+        "index": json.loads(df.index.to_series().to_json(orient="values")),
+        "data": json.loads(df.to_json(orient="values")),
+        "dtypes": [str(dtype) for dtype in df.dtypes],
+    }
+
+
+def _frame_from_json(obj: Dict[str, Any]) -> pd.DataFrame:
+    columns = obj["columns"]
+    if columns and isinstance(columns[0], list):
+        columns = pd.MultiIndex.from_tuples(map(tuple, columns))
+    df = pd.DataFrame(obj["data"], index=obj["index"], columns=columns)
+    df = df.astype(dict(zip(df.columns, obj["dtypes"]))) if len(df.columns) else df
+    return df
+
+
+def _save_state(state: IncrementalState, state_path: Path) -> None:
+    partials = state.partials
+    payload = {
+        "state_version": STATE_VERSION,
+        "pipeline_version": PIPELINE_VERSION,
+        "validation_rules": rules_fingerprint(),
+        "offset": state.offset,
+        "anchor": state.anchor,
+        "columns": state.columns,
+        "discrepancy_threshold": state.discrepancy_threshold,
+        "partials": {
+            "rows": partials.rows,
+            "valid_rating_rows": partials.valid_rating_rows,
+            "genre_moments": _frame_to_json(partials.genre_moments),
+            "yearly_moments": _frame_to_json(partials.yearly_moments),
+            "heatmap_counts": partials.heatmap_counts.tolist(),
+            "runtime_counts": partials.runtime_counts.tolist(),
+            "runtime_sketches": {
+                col: {
+                    "low": sketch.low,
+                    "resolution": sketch.resolution,
+                    "counts": sketch.counts.tolist(),
+                }
+                for col, sketch in partials.runtime_sketches.items()
+            },
+            "top_rated": _frame_to_json(partials.top_rated),
+            "rating_discrepancies": _frame_to_json(partials.rating_discrepancies),
+        },
+    }
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = state_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(payload))
+    tmp_path.replace(state_path)  # atomic, a crash never leaves half a state behind
+    logger.info(
+        f"Saved incremental state ({partials.rows} rows, offset {state.offset}) to "
+        f"{state_path}."
+    )
+
+
+def _load_state(state_path: Path) -> Optional[IncrementalState]:
+    """Return the saved state or None when there is none or it can't be used anymore."""
+    if not state_path.exists():
+        return None
+    try:
+        payload = json.loads(state_path.read_text())
+        if (
+            payload["state_version"] != STATE_VERSION
+            or payload["pipeline_version"] != PIPELINE_VERSION
+            or payload.get("validation_rules") != rules_fingerprint()
+        ):
+            logger.info(f"Incremental state {state_path} is outdated, rebuilding.")
+            return None
+
+        partials = payload["partials"]
+        return IncrementalState(
+            partials=PartialResults(
+                rows=partials["rows"],
+                valid_rating_rows=partials["valid_rating_rows"],
+                genre_moments=_frame_from_json(partials["genre_moments"]),
+                yearly_moments=_frame_from_json(partials["yearly_moments"]),
+                heatmap_counts=np.asarray(partials["heatmap_counts"], dtype=np.float64),
+                runtime_counts=np.asarray(partials["runtime_counts"], dtype=np.float64),
+                runtime_sketches={
+                    col: HistogramSketch(
+                        low=sketch["low"],
+                        resolution=sketch["resolution"],
+                        counts=np.asarray(sketch["counts"], dtype=np.int64),
+                    )
+                    for col, sketch in partials["runtime_sketches"].items()
+                },
+                top_rated=_frame_from_json(partials["top_rated"]),
+                rating_discrepancies=_frame_from_json(partials["rating_discrepancies"]),
+            ),
+            offset=payload["offset"],
+            anchor=payload["anchor"],
+            columns=payload["columns"],
+            discrepancy_threshold=payload["discrepancy_threshold"],
+        )
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable incremental state {state_path}: {str(e)}")
+        return None
@@ -0,0 +1,68 @@
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+from src.data_analysis.column_store import (
+    ColumnStoreError,
+    read_columns,
+    read_schema,
+    write_columns,
+)
+from src.data_analysis.data_processing import PIPELINE_VERSION, read_movie_data
+from src.utils.config import ProjectConfig
+from src.utils.logger import setup_logger
+from src.utils.profiling import profiled
+from src.utils.types import MovieData
+
+logger = setup_logger("mmap_store", ProjectConfig.get_log_file("mmap_store"))
+
+
+class MmapStoreError(Exception):
+    """Custom exception for memory-mapped store errors."""
+
+    pass
+
+
+def write_mmap_store(
+    data: MovieData, directory: Path, metadata: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Write the processed frame as a column store (plain .npy arrays, one per column
+    plus code dictionaries for titles and genres), return its schema."""
+    try:
+        return write_columns(data.df, directory, metadata)
+    except ColumnStoreError as e:
+        logger.error(f"Error writing memory-mapped store: {str(e)}")
+        raise MmapStoreError(f"Error writing memory-mapped store: {str(e)}")
+
+
+def convert_csv(file_path: Path, directory: Path) -> Dict[str, Any]:
+    """Process the CSV (through the processed-data cache) and write it as a
+    memory-mapped store."""
+    return write_mmap_store(
+        read_movie_data(file_path),
+        directory,
+        metadata={"source": str(file_path), "pipeline_version": PIPELINE_VERSION},
+    )
+
+
+def open_mmap_store(
+    directory: Path, columns: Optional[Sequence[str]] = None
+) -> MovieData:
+    """MovieData whose numeric columns, nullable columns and categorical codes are
+    read-only memory maps.
+
+    Opening reads no column data: pages are loaded by the OS when a view or report
+    touches them and are shared through the page cache with every other process mapping
+    the same files. Only dictionaries are decoded (genre lists, release dates and
+    titles), columns limits the frame to what a command needs, e.g. the plots never read
+    the titles.
+    """
+    try:
+        with profiled(
+            "ingest/open_mmap_store", rows_in=read_schema(directory)["rows"]
+        ) as probe:
+            df = read_columns(directory, columns, mmap=True)
+            probe.rows_out = len(df)
+        return MovieData(df=df)
+    except ColumnStoreError as e:
+        logger.error(f"Error opening memory-mapped store: {str(e)}")
+        raise MmapStoreError(f"Error opening memory-mapped store: {str(e)}")
@@ -0,0 +1,222 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import matplotlib.pyplot as plt
+
+from src.data_analysis.render_cache import PLOT_COLUMNS, RenderCache, plot_key
+from src.data_analysis.shared_frame import (
+    SharedFrameError,
+    init_worker,
+    share_movie_data,
+    worker_data,
+)
+from src.data_analysis.visualization import plot_filename, save_plot
+from src.utils.config import ProjectConfig
+from src.utils.logger import setup_logger
+from src.utils.profiling import profiled
+from src.utils.types import MovieData, PlotConfig
+
+logger = setup_logger(
+    "parallel_rendering", ProjectConfig.get_log_file("parallel_rendering")
+)
+
+PlotFunction = Tuple[str, Callable[[Any, PlotConfig], plt.Figure]]
+
+# Columns each plot is drawn from -> a plot is only redrawn when one of its own inputs
+# changed
+PLOT_INPUTS = {
+    "heatmap": ["tomatometer_rating", "audience_rating"],
+    "genres": ["genre", "tomatometer_rating", "audience_rating", "runtime_in_minutes"],
+    "trends": ["release_year", "tomatometer_rating", "audience_rating"],
+    "runtime": ["runtime_in_minutes", "tomatometer_rating", "audience_rating"],
+}
+
+
+def _setup_worker() -> None:
+    plt.switch_backend("Agg")  # no GUI in workers
+
+
+def _render_in_worker(
+    plot_name: str,
+    plot_func: Callable[[MovieData, PlotConfig], plt.Figure],
+    output_dir: Path,
+    config: PlotConfig,
+) -> Optional[str]:
+    """Render and save one plot, return the error message instead of raising (failure
+    isolation)."""
+    try:
+        fig = plot_func(worker_data(), config)
+        save_plot(fig, plot_name, output_dir, config)
+        return None
+    except Exception as e:
+        return str(e)
+
+
+def _stale_plots(
+    plot_functions: List[PlotFunction],
+    source: Any,
+    config: PlotConfig,
+    cache: Optional[RenderCache],
+) -> Tuple[List[PlotFunction], Dict[str, str]]:
+    """Plots whose inputs changed since they were last written, plus the cache key of
+    every plot"""
+    if cache is None:
+        return plot_functions, {}
+    keys = {
+        plot_name: plot_key(
+            plot_name, source, config, PLOT_INPUTS.get(plot_name, PLOT_COLUMNS)
+        )
+        for plot_name, _ in plot_functions
+    }
+    return [
+        (plot_name, plot_func)
+        for plot_name, plot_func in plot_functions
+        if not cache.is_fresh(f"plot/{plot_name}", keys[plot_name])
+    ], keys
+
+
+def _record_plots(
+    results: Dict[str, Optional[str]],
+    keys: Dict[str, str],
+    config: PlotConfig,
+    cache: Optional[RenderCache],
+) -> None:
+    if cache is None:
+        return
+    for plot_name, error in results.items():
+        if error is None:
+            cache.record(
+                f"plot/{plot_name}",
+                keys[plot_name],
+                [plot_filename(plot_name, config.file_format)],
+            )
+        else:
+            cache.forget(f"plot/{plot_name}")
+
+
+def _render_serial(
+    plot_functions: List[PlotFunction],
+    source: Any,
+    output_dir: Path,
+    config: PlotConfig,
+) -> Dict[str, Optional[str]]:
+    def _render(
+        plot_name: str, plot_func: Callable[[Any, PlotConfig], plt.Figure]
+    ) -> Optional[str]:
+        try:
+            with profiled(f"plot/{plot_name}"):
+                fig = plot_func(source, config)
+                save_plot(fig, plot_name, output_dir, config)
+            logger.info(f"Generated {plot_name} plot")
+            return None
+        except Exception as e:
+            logger.error(f"Failed to generate {plot_name}: {str(e)}")
+            return str(e)
+
+    return {
+        plot_name: _render(plot_name, plot_func)
+        for plot_name, plot_func in plot_functions
+    }
+
+
+def render_plots_serial(
+    plot_functions: List[PlotFunction],
+    source: Any,
+    output_dir: Path,
+    config: PlotConfig,
+    cache: Optional[RenderCache] = None,
+) -> Dict[str, Optional[str]]:
+    """Render plots one after another, returns plot name -> error message (None when it
+    worked).
+
+    source is whatever the plot functions take -> MovieData, or PartialResults in
+    streaming mode. With a cache, plots whose inputs did not change since the last run
+    are skipped (and reported as None).
+    """
+    stale, keys = _stale_plots(plot_functions, source, config, cache)
+    results = _render_serial(stale, source, output_dir, config)
+    _record_plots(results, keys, config, cache)
+    return {**{plot_name: None for plot_name, _ in plot_functions}, **results}
+
+
+def render_plots_parallel(
+    plot_functions: List[PlotFunction],
+    movie_data: MovieData,
+    output_dir: Path,
+    config: PlotConfig,
+    workers: int,
+    cache: Optional[RenderCache] = None,
+) -> Dict[str, Optional[str]]:
+    """Render plots in a process pool, falls back to serial rendering for workers <= 1
+    or when no pool can be started.
+
+    Only the plots the cache can't skip are sent to the pool, the manifest is only
+    touched by this process.
+    """
+    stale, keys = _stale_plots(plot_functions, movie_data, config, cache)
+    # more processes than cores only adds overhead
+    workers = min(workers, len(stale), os.cpu_count() or 1)
+    if workers <= 1:
+        results = _render_serial(stale, movie_data, output_dir, config)
+    else:
+        results = _render_parallel(stale, movie_data, output_dir, config, workers)
+    _record_plots(results, keys, config, cache)
+    return {**{plot_name: None for plot_name, _ in plot_functions}, **results}
+
+
+def _render_parallel(
+    plot_functions: List[PlotFunction],
+    movie_data: MovieData,
+    output_dir: Path,
+    config: PlotConfig,
+    workers: int,
+) -> Dict[str, Optional[str]]:
+    try:
+        # one copy of the plot columns for all workers
+        shared = share_movie_data(movie_data, PLOT_COLUMNS)
+    except SharedFrameError as e:
+        logger.warning(f"Could not share the plot data ({str(e)}), rendering serially.")
+        return _render_serial(plot_functions, movie_data, output_dir, config)
+
+    try:
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(shared.descriptor, _setup_worker),
+        )
+    except (OSError, NotImplementedError) as e:
+        shared.close()
+        logger.warning(
+            f"Could not start {workers} render workers ({str(e)}), rendering serially."
+        )
+        return _render_serial(plot_functions, movie_data, output_dir, config)
+
+    logger.info(f"Rendering {len(plot_functions)} plots on {workers} workers...")
+    results: Dict[str, Optional[str]] = {}
+    # workers are not instrumented, the pool shows up as one step in the parent
+    with shared, pool, profiled(
+        f"plot/parallel_{workers}_workers", rows_in=len(movie_data.df)
+    ):
+        futures = {
+            pool.submit(
+                _render_in_worker, plot_name, plot_func, output_dir, config
+            ): plot_name
+            for plot_name, plot_func in plot_functions
+        }
+        for future in as_completed(futures):
+            plot_name = futures[future]
+            try:
+                results[plot_name] = future.result()
+            except (
+                Exception
+            ) as e:  # worker died (BrokenProcessPool, pickling errors, ...)
+                results[plot_name] = str(e)
+
+            if results[plot_name] is None:
+                logger.info(f"Generated {plot_name} plot")
+            else:
+                logger.error(f"Failed to generate {plot_name}: {results[plot_name]}")
+
+    return results
@@ -0,0 +1,358 @@
+import json
+import shutil
+from functools import reduce
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from src.data_analysis.column_store import read_columns, write_columns
+from src.data_analysis.data_processing import PIPELINE_VERSION, read_movie_data
+from src.data_analysis.genre_index import build_genre_index, genre_mask, split_genres
+from src.utils.config import ProjectConfig
+from src.utils.logger import setup_logger
+from src.utils.profiling import profiled
+from src.utils.types import MovieData
+
+logger = setup_logger(
+    "partitioned_store", ProjectConfig.get_log_file("partitioned_store")
+)
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 2  # 2: partitions in column store version 2
+
+# decade -> release_year // 10 * 10, genre -> the movie's genre list (e.g. "Comedy,
+# Drama")
+PARTITION_KEYS = ("decade", "release_year", "genre")
+DEFAULT_PARTITION_BY: Tuple[str, ...] = ("decade",)
+
+# Columns with per-partition min/max/count in the manifest -> range filters on them can
+# skip partitions
+STATS_COLUMNS = (
+    "release_year",
+    "tomatometer_rating",
+    "audience_rating",
+    "runtime_in_minutes",
+    "tomatometer_count",
+    "audience_count",
+)
+
+
+class PartitionedStoreError(Exception):
+    """Custom exception for partitioned store errors."""
+
+    pass
+
+
+class PartitionFilter(NamedTuple):
+    """Rows to load, bounds are inclusive and None / () means no restriction.
+
+    genres -> movies listing at least one of them (a movie with "Comedy, Drama" matches
+    ('Drama',)).
+    """
+
+    years: Optional[Tuple[int, int]] = None
+    genres: Tuple[str, ...] = ()
+    tomatometer: Optional[Tuple[float, float]] = None
+    audience: Optional[Tuple[float, float]] = None
+
+    def ranges(self) -> Dict[str, Tuple[float, float]]:
+        """column -> (low, high) of every range filter that is set"""
+        return {
+            col: bounds
+            for col, bounds in (
+                ("release_year", self.years),
+                ("tomatometer_rating", self.tomatometer),
+                ("audience_rating", self.audience),
+            )
+            if bounds is not None
+        }
+
+
+NO_FILTER = PartitionFilter()
+
+
+def _key_columns(df: pd.DataFrame, by: Sequence[str]) -> List[pd.Series]:
+    unknown = set(by) - set(PARTITION_KEYS)
+    if unknown:
+        raise PartitionedStoreError(
+            f"Unknown partition keys {sorted(unknown)}, expected some of "
+            f"{PARTITION_KEYS}"
+        )
+    keys = {
+        "decade": lambda: (df["release_year"] // 10 * 10).rename("decade"),
+        "release_year": lambda: df["release_year"],
+        "genre": lambda: df["genre"],
+    }
+    return [keys[key]() for key in by]
+
+
+def _partition_path(by: Sequence[str], values: tuple) -> str:
+    # hive style: decade=1990/genre=Comedy%2C%20Drama, quoted -> genre lists are safe
+    # directory names
+    return "/".join(
+        f'{key}={quote(str(value), safe="")}' for key, value in zip(by, values)
+    )
+
+
+def _plain(value: Any) -> Any:
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _partition_stats(part: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """min/max/count of the non-missing values, min/max are None for a column without
+    any."""
+
+    def _stats(col: str) -> Dict[str, Any]:
+        values = part[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        values = values[~np.isnan(values)]
+        return {
+            "min": float(values.min()) if len(values) else None,
+            "max": float(values.max()) if len(values) else None,
+            "count": int(len(values)),
+        }
+
+    return {col: _stats(col) for col in STATS_COLUMNS if col in part.columns}
+
+
+def _partition_genres(part: pd.DataFrame) -> List[str]:
+    """Individual genres listed by any row of the partition"""
+    combos = part["genre"].dropna().astype(str).unique()
+    return sorted({genre for combo in combos for genre in split_genres(combo)})
+
+
+def _categorical_columns(df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    return {
+        col: {
+            "categories": [str(x) for x in df[col].cat.categories],
+            "ordered": bool(df[col].cat.ordered),
+        }
+        for col in df.columns
+        if isinstance(df[col].dtype, pd.CategoricalDtype)
+    }
+
+
+def write_partitioned(
+    data: MovieData,
+    root: Path,
+    by: Sequence[str] = DEFAULT_PARTITION_BY,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Write the processed frame as one column store per partition plus a manifest,
+    return the manifest.
+
+    Every partition keeps the original row labels, so a filtered read comes back in the
+    source order. Categorical dictionaries (thousands of release dates) are stored once
+    in the manifest, a partition only keeps the categories its rows use.
+    """
+    df = data.df
+    by = tuple(by)
+    categorical = _categorical_columns(df)
+    tmp_root = root.with_name(root.name + ".tmp")
+    try:
+        shutil.rmtree(tmp_root, ignore_errors=True)
+        tmp_root.mkdir(parents=True)
+
+        partitions = []
+        groups = (
+            df.groupby(
+                _key_columns(df, by), observed=True, sort=True, dropna=True
+            ).indices
+            if by
+            else {(): None}
+        )
+        for values, positions in groups.items():
+            values = values if isinstance(values, tuple) else (values,)
+            part = df if positions is None else df.iloc[positions]
+            path = _partition_path(by, values) or "all"
+            write_columns(
+                part.assign(
+                    **{
+                        col: part[col].cat.remove_unused_categories()
+                        for col in categorical
+                    }
+                ),
+                tmp_root / path,
+            )
+            partitions.append(
+                {
+                    "path": path,
+                    "keys": dict(zip(by, map(_plain, values))),
+                    "rows": len(part),
+                    "genres": _partition_genres(part),
+                    "stats": _partition_stats(part),
+                }
+            )
+
+        manifest: Dict[str, Any] = {
+            "version": MANIFEST_VERSION,
+            "partition_by": list(by),
+            "rows": sum(entry["rows"] for entry in partitions),
+            "categorical": categorical,
+            "metadata": metadata or {},
+            "partitions": partitions,
+        }
+        (tmp_root / MANIFEST_FILE).write_text(json.dumps(manifest, indent=1))
+
+        # same swap as the column store -> readers never see a half-written dataset
+        shutil.rmtree(root, ignore_errors=True)
+        tmp_root.rename(root)
+        if manifest["rows"] < len(df):
+            logger.warning(
+                f'{len(df) - manifest["rows"]} rows without a partition key value were '
+                "not written."
+            )
+        logger.info(
+            f'Wrote {manifest["rows"]} rows in {len(partitions)} partitions by {by} to '
+            f"{root}."
+        )
+        return manifest
+    except PartitionedStoreError:
+        shutil.rmtree(tmp_root, ignore_errors=True)
+        raise
+    except Exception as e:
+        shutil.rmtree(tmp_root, ignore_errors=True)
+        logger.error(f"Error writing partitioned store: {str(e)}")
+        raise PartitionedStoreError(f"Error writing partitioned store: {str(e)}")
+
+
+def convert_csv(
+    file_path: Path, root: Path, by: Sequence[str] = DEFAULT_PARTITION_BY
+) -> Dict[str, Any]:
+    """Process the CSV (through the processed-data cache) and write it as a partitioned
+    store."""
+    return write_partitioned(
+        read_movie_data(file_path),
+        root,
+        by,
+        metadata={"source": str(file_path), "pipeline_version": PIPELINE_VERSION},
+    )
+
+
+def read_manifest(root: Path) -> Dict[str, Any]:
+    """Return the manifest of a partitioned store."""
+    try:
+        manifest: Dict[str, Any] = json.loads((root / MANIFEST_FILE).read_text())
+    except Exception as e:
+        raise PartitionedStoreError(f"Error reading partition manifest: {str(e)}")
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise PartitionedStoreError(
+            f'Unsupported manifest version {manifest.get("version")}, rewrite the store'
+        )
+    return manifest
+
+
+def _may_match(entry: Dict[str, Any], filters: PartitionFilter) -> bool:
+    """False only when no row of the partition can pass the filters"""
+    for col, (low, high) in filters.ranges().items():
+        stats = entry["stats"].get(col)
+        if stats is None:
+            continue  # no statistics -> the partition has to be read
+        if stats["min"] is None or stats["max"] < low or stats["min"] > high:
+            return False
+    return not filters.genres or not set(filters.genres).isdisjoint(entry["genres"])
+
+
+def prune_partitions(
+    manifest: Dict[str, Any], filters: PartitionFilter = NO_FILTER
+) -> List[Dict[str, Any]]:
+    """Manifest entries of the partitions that can hold matching rows."""
+    return [entry for entry in manifest["partitions"] if _may_match(entry, filters)]
+
+
+def filter_rows(df: pd.DataFrame, filters: PartitionFilter = NO_FILTER) -> pd.DataFrame:
+    """Exact row-level filter, pruning only skips whole partitions."""
+    try:
+        conditions = [
+            df[col].between(low, high).to_numpy(dtype=bool, na_value=False)
+            for col, (low, high) in filters.ranges().items()
+        ]
+        if filters.genres:
+            index = build_genre_index(df["genre"])
+            conditions.append(
+                reduce(
+                    np.logical_or,
+                    (genre_mask(index, genre) for genre in filters.genres),
+                )
+            )
+        if not conditions:
+            return df
+        return df[reduce(np.logical_and, conditions)]
+    except Exception as e:
+        logger.error(f"Error filtering rows: {str(e)}")
+        raise PartitionedStoreError(f"Error filtering rows: {str(e)}")
+
+
+def filter_movie_data(data: MovieData, filters: PartitionFilter) -> MovieData:
+    """Same filters on data that is already in memory"""
+    return data if filters == NO_FILTER else MovieData(df=filter_rows(data.df, filters))
+
+
+def _read_partition(path: Path, dictionaries: Dict[str, pd.Index]) -> pd.DataFrame:
+    """Partition with its categorical columns as codes into the store-wide
+    dictionaries"""
+    part = read_columns(path)
+
+    def _codes(col: str) -> np.ndarray:
+        codes = part[col].cat.codes.to_numpy()
+        # -1 -> missing stays -1
+        lookup = np.append(dictionaries[col].get_indexer(part[col].cat.categories), -1)
+        store_codes: np.ndarray = lookup[codes]
+        return store_codes
+
+    return part.assign(**{col: _codes(col) for col in dictionaries})
+
+
+def read_partitioned(root: Path, filters: PartitionFilter = NO_FILTER) -> MovieData:
+    """Read only the partitions that can match the filters, then filter their rows
+    exactly."""
+    try:
+        manifest = read_manifest(root)
+        if not manifest["partitions"]:
+            raise PartitionedStoreError(f"Partitioned store {root} has no partitions")
+
+        with profiled("ingest/read_partitioned") as probe:
+            selected = prune_partitions(manifest, filters)
+            dictionaries = {
+                col: pd.Index(meta["categories"])
+                for col, meta in manifest["categorical"].items()
+            }
+            # nothing matches -> still return the store's columns and dtypes
+            frames = [
+                _read_partition(root / entry["path"], dictionaries)
+                for entry in selected
+            ] or [
+                _read_partition(
+                    root / manifest["partitions"][0]["path"], dictionaries
+                ).iloc[:0]
+            ]
+            rows_read = sum(entry["rows"] for entry in selected)
+
+            # concatenating plain codes and building each categorical once is much
+            # cheaper than letting concat reconcile one dictionary per partition
+            df = pd.concat(frames).sort_index(kind="stable")
+            df = df.assign(
+                **{
+                    col: pd.Categorical.from_codes(
+                        df[col].to_numpy(),
+                        categories=dictionaries[col],
+                        ordered=manifest["categorical"][col]["ordered"],
+                    )
+                    for col in dictionaries
+                }
+            )
+            df = filter_rows(df, filters)
+            probe.rows_in, probe.rows_out = rows_read, len(df)
+
+        logger.info(
+            f'Read {len(selected)}/{len(manifest["partitions"])} partitions '
+            f'({rows_read}/{manifest["rows"]} rows) from {root}, {len(df)} rows match.'
+        )
+        return MovieData(df=df)
+    except PartitionedStoreError:
+        raise
+    except Exception as e:
+        logger.error(f"Error reading partitioned store: {str(e)}")
+        raise PartitionedStoreError(f"Error reading partitioned store: {str(e)}")
@@ -0,0 +1,239 @@
+import heapq
+from itertools import count
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.data_analysis.genre_index import build_genre_index, genre_mask
+from src.utils.config import ProjectConfig
+from src.utils.logger import setup_logger
+
+logger = setup_logger("ranking", ProjectConfig.get_log_file("ranking"))
+
+# Group columns in ranked frames are called by_<key>, e.g. by_genre, by_release_year
+GROUP_PREFIX = "by_"
+
+
+class RankingError(Exception):
+    """Custom exception for ranking errors."""
+
+    pass
+
+
+class RankingSpec(NamedTuple):
+    """What to rank: a score expression over the frame's columns, how many rows and per
+    which groups.
+
+    score     -> pandas expression (DataFrame.eval),
+                 e.g. '(tomatometer_rating + audience_rating) / 2'
+    name      -> column the score is stored in
+    threshold -> rows scoring below it are never ranked
+    by        -> top-k per group instead of overall, 'genre' means every individual
+                 genre of a movie (a movie can show up under several genres), any other
+                 key is a plain column, e.g. 'release_year'.
+                 ('genre', 'release_year') -> top k per genre for each year.
+    """
+
+    score: str
+    name: str
+    k: int = 20
+    threshold: Optional[float] = None
+    by: Tuple[str, ...] = ()
+
+
+TOP_RATED = RankingSpec(
+    score="(tomatometer_rating + audience_rating) / 2", name="avg_rating"
+)
+RATING_DISCREPANCIES = RankingSpec(
+    score="abs(tomatometer_rating - audience_rating)",
+    name="rating_diff",
+    threshold=30.0,
+)
+
+
+def top_k_positions(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k highest scores, best first, NaN is never picked.
+
+    np.partition finds the k-th best value in O(n), only the rows above it get sorted.
+    Ties keep the earlier position, same as DataFrame.nlargest(keep='first').
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    candidates = np.flatnonzero(~np.isnan(scores))
+    if k <= 0 or len(candidates) == 0:
+        return np.empty(0, dtype=np.intp)
+
+    values = scores[candidates]
+    if len(values) > k:
+        kth = np.partition(values, len(values) - k)[len(values) - k]  # k-th largest
+        above = np.flatnonzero(values > kth)
+        # earliest rows win the cut
+        ties = np.flatnonzero(values == kth)[: k - len(above)]
+        keep = np.sort(np.concatenate([above, ties]))
+        candidates, values = candidates[keep], values[keep]
+
+    ranked: np.ndarray = candidates[np.lexsort((candidates, -values))]
+    return ranked
+
+
+def score_rows(df: pd.DataFrame, spec: RankingSpec) -> np.ndarray:
+    """Score of every row in the expression's dtype (float32 columns stay float32)."""
+    try:
+        return np.asarray(df.eval(spec.score))
+    except Exception as e:
+        logger.error(f"Error evaluating score {spec.score!r}: {str(e)}")
+        raise RankingError(f"Error evaluating score {spec.score!r}: {str(e)}")
+
+
+def _split_groups(
+    df: pd.DataFrame, positions: np.ndarray, key: str
+) -> List[Tuple[object, np.ndarray]]:
+    """(label, positions) for every group of key among the given rows, labels sorted."""
+    ranked_key = GROUP_PREFIX + key
+    if key == "genre" and ranked_key not in df.columns:
+        index = build_genre_index(df["genre"].iloc[positions])
+        return [(genre, positions[genre_mask(index, genre)]) for genre in index.genres]
+
+    column = df[ranked_key if ranked_key in df.columns else key].iloc[positions]
+    codes, uniques = pd.factorize(column, sort=True, use_na_sentinel=True)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    return [
+        (uniques[i], positions[order[bounds[i] : bounds[i + 1]]])
+        for i in range(len(uniques))
+    ]
+
+
+def group_positions(
+    df: pd.DataFrame, by: Tuple[str, ...]
+) -> List[Tuple[tuple, np.ndarray]]:
+    """(labels, row positions) of every group, one group with all rows when by is empty.
+
+    Frames that were already ranked (by_<key> columns present) are grouped by those
+    columns, so merging ranked frames never spreads a row over more genres than it was
+    ranked in.
+    """
+    groups: List[Tuple[tuple, np.ndarray]] = [((), np.arange(len(df)))]
+    for key in by:
+        groups = [
+            (labels + (label,), positions)
+            for labels, group in groups
+            for label, positions in _split_groups(df, group, key)
+        ]
+    return groups
+
+
+class StreamingTopK:
+    """Bounded min-heaps (one per group) of the best rows seen so far.
+
+    push() takes a frame (a chunk, or an already ranked frame from another
+    StreamingTopK) and keeps at most spec.k rows per group, merging two instances is
+    pushing one's frame into the other. Only the kept rows are held, so memory is
+    bounded by k x groups whatever the input size.
+    """
+
+    def __init__(self, spec: RankingSpec):
+        self.spec = spec
+        self._heaps: Dict[
+            tuple, List[Tuple[float, int, int]]
+        ] = {}  # labels -> [(score, -seq, row)]
+        self._rows: Optional[pd.DataFrame] = None  # every row referenced by a heap
+        self._seq = count()  # arrival order -> earlier rows win ties
+
+    def push(self, df: pd.DataFrame) -> "StreamingTopK":
+        try:
+            scores = score_rows(df, self.spec)
+            ranked = np.asarray(scores, dtype=np.float64)
+            if self.spec.threshold is not None:
+                ranked = np.where(ranked >= self.spec.threshold, ranked, np.nan)
+
+            # the chunk's own top-k per group first, only those rows ever touch a heap
+            candidates = [
+                (labels, positions[top_k_positions(ranked[positions], self.spec.k)])
+                for labels, positions in group_positions(df, self.spec.by)
+            ]
+            picked = np.unique(
+                np.concatenate(
+                    [np.empty(0, dtype=np.intp), *(p for _, p in candidates)]
+                )
+            )
+            new_rows = (
+                df.iloc[picked]
+                .assign(**{self.spec.name: scores[picked]})
+                .drop(
+                    columns=[GROUP_PREFIX + key for key in self.spec.by],
+                    errors="ignore",
+                )
+            )
+
+            offset = 0 if self._rows is None else len(self._rows)
+            # empty -> keeps the columns
+            self._rows = new_rows if not offset else pd.concat([self._rows, new_rows])
+            row_of = dict(zip(picked.tolist(), range(offset, offset + len(picked))))
+            seq_of = {position: next(self._seq) for position in picked.tolist()}
+            for labels, positions in candidates:
+                heap = self._heaps.setdefault(labels, [])
+                for position in positions.tolist():
+                    entry = (ranked[position], -seq_of[position], row_of[position])
+                    if len(heap) < self.spec.k:
+                        heapq.heappush(heap, entry)
+                    elif entry > heap[0]:
+                        heapq.heapreplace(heap, entry)
+
+            self._compact()
+            return self
+        except RankingError:
+            raise
+        except Exception as e:
+            logger.error(f"Error ranking rows: {str(e)}")
+            raise RankingError(f"Error ranking rows: {str(e)}")
+
+    def _compact(self) -> None:
+        # drop rows no heap points at anymore and renumber the rest
+        if self._rows is None:
+            return
+        kept = sorted({row for heap in self._heaps.values() for _, _, row in heap})
+        renumber = {row: new for new, row in enumerate(kept)}
+        self._rows = self._rows.iloc[kept]
+        self._heaps = {
+            # order kept -> still a heap
+            labels: [(score, seq, renumber[row]) for score, seq, row in heap]
+            for labels, heap in self._heaps.items()
+        }
+
+    def to_frame(self) -> pd.DataFrame:
+        """Kept rows, groups in label order and best first inside a group, one by_<key>
+        column per group key."""
+        if self._rows is None:
+            return pd.DataFrame()
+
+        entries = [
+            (labels, row)
+            for labels in sorted(self._heaps)
+            for _, _, row in sorted(self._heaps[labels], reverse=True)
+        ]
+        frame = self._rows.iloc[[row for _, row in entries]]
+        return frame.assign(
+            **{
+                GROUP_PREFIX + key: [labels[i] for labels, _ in entries]
+                for i, key in enumerate(self.spec.by)
+            }
+        )
+
+
+def rank_frame(df: pd.DataFrame, spec: RankingSpec) -> pd.DataFrame:
+    """Top spec.k rows of df (per group when spec.by is set), see RankingSpec."""
+    return StreamingTopK(spec).push(df).to_frame()
+
+
+def merge_top_k(spec: RankingSpec, *frames: pd.DataFrame) -> pd.DataFrame:
+    """Merge ranked frames (e.g. of two chunks), earlier frames win ties."""
+    return rank_chunks(frames, spec)
+
+
+def rank_chunks(frames: Iterable[pd.DataFrame], spec: RankingSpec) -> pd.DataFrame:
+    """Top-k over a stream of frames, only the current candidates are ever kept."""
+    ranking = StreamingTopK(spec)
+    for frame in frames:
+        ranking.push(frame)
+    return ranking.to_frame()
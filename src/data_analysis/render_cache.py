@@ -0,0 +1,258 @@
+import dataclasses
+import hashlib
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from src.utils.config import ProjectConfig
+from src.utils.logger import setup_logger
+from src.utils.profiling import profiled
+from src.utils.types import MovieData, PlotConfig, register_view
+from src.utils.validation import rules_fingerprint
+
+logger = setup_logger("render_cache", ProjectConfig.get_log_file("render_cache"))
+
+MANIFEST_FILE = ".render_cache.json"
+
+# Bump when the manifest layout changes, code changes are picked up by code_fingerprint
+RENDER_CACHE_VERSION = 1
+
+# Everything generate_key_insights reads
+INSIGHT_COLUMNS = (
+    "movie_title",
+    "release_year",
+    "genre",
+    "tomatometer_rating",
+    "tomatometer_count",
+    "audience_rating",
+    "audience_count",
+    "runtime_in_minutes",
+)
+
+# Everything the create_* functions and the partition filters read, the only columns
+# shared with plot workers
+PLOT_COLUMNS = (
+    "tomatometer_rating",
+    "audience_rating",
+    "runtime_in_minutes",
+    "release_year",
+    "genre",
+)
+
+
+class RenderCacheError(Exception):
+    """Custom exception for render cache errors."""
+
+    pass
+
+
+def _feed(digest: Any, obj: Any) -> None:
+    """Hash obj into digest, containers recursively, frames by content
+    (hash_pandas_object) and dtypes."""
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        dtypes = (
+            obj.dtypes.astype(str).to_dict()
+            if isinstance(obj, pd.DataFrame)
+            else str(obj.dtype)
+        )
+        digest.update(repr((type(obj).__name__, dtypes)).encode())
+        digest.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray):
+        digest.update(repr((obj.dtype.str, obj.shape)).encode())
+        digest.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        for key in sorted(obj, key=repr):
+            digest.update(repr(key).encode())
+            _feed(digest, obj[key])
+    # NamedTuples too -> PartialResults, HistogramSketch
+    elif isinstance(obj, (list, tuple)):
+        digest.update(f"{type(obj).__name__}[{len(obj)}]".encode())
+        for item in obj:
+            _feed(digest, item)
+    else:
+        digest.update(repr(obj).encode())
+
+
+def fingerprint(*parts: Any) -> str:
+    """Content hash of frames, arrays, containers and plain values."""
+    try:
+        digest = hashlib.blake2b(digest_size=16)
+        for part in parts:
+            _feed(digest, part)
+        return digest.hexdigest()
+    except Exception as e:
+        logger.error(f"Error fingerprinting render inputs: {str(e)}")
+        raise RenderCacheError(f"Error fingerprinting render inputs: {str(e)}")
+
+
+@lru_cache(maxsize=None)
+def code_fingerprint() -> str:
+    """Hash of every module under src/ -> any code change re-renders everything once."""
+    source_root = ProjectConfig.PROJECT_ROOT / "src"
+    digest = hashlib.blake2b(digest_size=16)
+    for path in sorted(source_root.rglob("*.py")):
+        digest.update(str(path.relative_to(source_root)).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+@register_view("column_fingerprint")
+def _column_fingerprint(data: MovieData, column: str) -> str:
+    """Hash of one column (None -> the row labels), memoized -> every artifact reading
+    it shares the work"""
+    with profiled("render_cache/fingerprint", rows_in=len(data.df)):
+        if column is None:
+            return fingerprint(data.df.index.to_series().reset_index(drop=True))
+        return fingerprint(
+            data.df[column].reset_index(drop=True)
+            if column in data.df.columns
+            else None
+        )
+
+
+def source_fingerprint(source: Any, columns: Sequence[str]) -> str:
+    """Fingerprint of what an artifact is drawn from: the given columns of MovieData
+    (per column hashes, memoized on the MovieData), anything else (PartialResults) as a
+    whole."""
+    if isinstance(source, MovieData):
+        return fingerprint(
+            [source.view("column_fingerprint", col) for col in (None, *sorted(columns))]
+        )
+    return fingerprint(source)
+
+
+def config_fingerprint(config: PlotConfig) -> Dict[str, Any]:
+    """PlotConfig fields as plain JSON values (tuples -> lists, ...)"""
+    fields: Dict[str, Any] = json.loads(
+        json.dumps(dataclasses.asdict(config), sort_keys=True, default=str)
+    )
+    return fields
+
+
+def artifact_key(
+    name: str, source: Any, columns: Sequence[str], **settings: Any
+) -> str:
+    """Key of one artifact: its name, input columns, settings (PlotConfig, report
+    formats, ...), the validation rules (they decide which rows are valid) and the
+    code."""
+    return fingerprint(
+        RENDER_CACHE_VERSION,
+        code_fingerprint(),
+        rules_fingerprint(),
+        name,
+        source_fingerprint(source, columns),
+        settings,
+    )
+
+
+def plot_key(name: str, source: Any, config: PlotConfig, columns: Sequence[str]) -> str:
+    return artifact_key(
+        f"plot/{name}", source, columns, config=config_fingerprint(config)
+    )
+
+
+def insights_key(source: Any, formats: Sequence[str]) -> str:
+    return artifact_key("insights", source, INSIGHT_COLUMNS, formats=sorted(formats))
+
+
+def _plain(value: Any) -> Any:
+    # numpy scalars in stored results (GenreStats averages)
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class RenderCache:
+    """Manifest of the artifacts in an output directory: name -> key of its inputs + the
+    files it wrote.
+
+    An artifact is fresh when its key matches and all of its files still exist,
+    force=True treats every artifact as stale (the manifest is still updated). Only the
+    parent process reads or writes the manifest.
+    """
+
+    def __init__(self, output_dir: Path, force: bool = False):
+        self.output_dir = output_dir
+        self.force = force
+        self.path = output_dir / MANIFEST_FILE
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not self.path.exists():
+            return {}
+        try:
+            manifest = json.loads(self.path.read_text())
+            return (
+                manifest["artifacts"]
+                if manifest.get("version") == RENDER_CACHE_VERSION
+                else {}
+            )
+        except Exception as e:
+            # a broken manifest only costs one full render
+            logger.warning(f"Ignoring unreadable render manifest {self.path}: {str(e)}")
+            return {}
+
+    def _save(self) -> None:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps(
+                {"version": RENDER_CACHE_VERSION, "artifacts": self._entries},
+                indent=1,
+                default=_plain,
+            )
+        )
+        tmp_path.replace(self.path)
+
+    def is_fresh(self, name: str, key: str) -> bool:
+        entry = self._entries.get(name)
+        fresh = (
+            not self.force
+            and entry is not None
+            and entry["key"] == key
+            and all((self.output_dir / file).exists() for file in entry["files"])
+        )
+        if fresh:
+            logger.info(f"{name} is up to date, skipped.")
+        return fresh
+
+    def result(self, name: str) -> Any:
+        """JSON result stored with the artifact (e.g. the insights returned by
+        generate_key_insights)"""
+        return self._entries[name].get("result")
+
+    def record(
+        self,
+        name: str,
+        key: str,
+        files: Iterable[Union[str, Path]],
+        result: Any = None,
+    ) -> None:
+        """Remember a freshly written artifact, files are paths inside the output
+        directory or names relative to it."""
+        try:
+            self._entries[name] = {
+                "key": key,
+                "files": [
+                    str(
+                        Path(file).relative_to(self.output_dir)
+                        if Path(file).is_relative_to(self.output_dir)
+                        else file
+                    )
+                    for file in files
+                ],
+                "result": result,
+            }
+            self._save()
+        except Exception as e:
+            logger.error(f"Error updating render manifest: {str(e)}")
+            raise RenderCacheError(f"Error updating render manifest: {str(e)}")
+
+    def forget(self, name: str) -> None:
+        """Drop an artifact that failed, the next run renders it again"""
+        if self._entries.pop(name, None) is not None:
+            self._save()
@@ -0,0 +1,244 @@
+import csv
+import html
+import json
+import math
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+)
+
+import numpy as np
+import pandas as pd
+
+from src.utils.config import ProjectConfig
+from src.utils.logger import setup_logger
+
+logger = setup_logger("reporting", ProjectConfig.get_log_file("reporting"))
+
+REPORT_FORMATS = ("md", "csv", "json", "html")
+
+
+class ReportError(Exception):
+    """Custom exception for report writing errors."""
+
+    pass
+
+
+class ReportTable(NamedTuple):
+    """One section of a report.
+
+    rows is called once per output format and may return a generator (e.g.
+    DataFrame.itertuples), every writer consumes it row by row, so a table is never held
+    as one big string.
+    fields are (attribute, label) pairs read from every row for CSV / JSON / HTML and
+    the default markdown. markdown_header / markdown_row override the markdown layout of
+    the table.
+    """
+
+    key: str
+    title: str
+    fields: Sequence[Tuple[str, str]]
+    rows: Callable[[], Iterable[Any]]
+    markdown_header: Optional[Sequence[str]] = None
+    markdown_row: Optional[Callable[[Any], str]] = None
+
+
+class Report(NamedTuple):
+    title: str
+    tables: Sequence[ReportTable]
+
+
+def frame_table(
+    key: str,
+    title: str,
+    frame: pd.DataFrame,
+    fields: Optional[Sequence[Tuple[str, str]]] = None,
+    **markdown: Any,
+) -> ReportTable:
+    """ReportTable over the rows of a DataFrame, all columns unless fields are given."""
+    fields = fields or [(col, col) for col in frame.columns]
+    return ReportTable(
+        key=key,
+        title=title,
+        fields=fields,
+        rows=lambda: frame.itertuples(index=False),
+        **markdown,
+    )
+
+
+def _value(value: Any) -> Any:
+    """Plain python value for csv/json, missing values (NaN, NA, NaT) -> None"""
+    # itertuples already gives python scalars -> the common case first
+    if isinstance(value, float):
+        return None if math.isnan(value) else value
+    if isinstance(value, (str, int)):
+        return value
+    if isinstance(value, np.generic):
+        value = value.item()
+    if (
+        value is None
+        or value is pd.NA
+        or value is pd.NaT
+        or (isinstance(value, float) and math.isnan(value))
+    ):
+        return None
+    return value
+
+
+def _text(value: Any) -> str:
+    value = _value(value)
+    if value is None:
+        return ""
+    return f"{value:.1f}" if isinstance(value, float) else str(value)
+
+
+def _values(table: ReportTable, row: Any) -> List[Any]:
+    return [_value(getattr(row, attribute)) for attribute, _ in table.fields]
+
+
+def table_records(table: ReportTable) -> List[Dict[str, Any]]:
+    """Rows of a table as {label: plain value} dicts, the records of the JSON report"""
+    return [_record(table, row) for row in table.rows()]
+
+
+def _record(table: ReportTable, row: Any) -> Dict[str, Any]:
+    return dict(zip((label for _, label in table.fields), _values(table, row)))
+
+
+def _write_markdown(report: Report, out: TextIO) -> None:
+    out.write(f"# {report.title}\n")
+    for table in report.tables:
+        out.write(f"\n## {table.title}\n")
+        if table.markdown_row is not None:
+            out.writelines(table.markdown_header or [])
+            out.writelines(map(table.markdown_row, table.rows()))
+            continue
+        out.write("| " + " | ".join(label for _, label in table.fields) + " |\n")
+        out.write("|" + "|".join("---" for _ in table.fields) + "|\n")
+        for row in table.rows():
+            out.write(
+                "| "
+                + " | ".join(
+                    _text(getattr(row, attribute)).replace("|", "\\|")
+                    for attribute, _ in table.fields
+                )
+                + " |\n"
+            )
+
+
+def _write_json(report: Report, out: TextIO) -> None:
+    # written piece by piece instead of json.dump(whole_dict) -> the rows are never all
+    # in memory
+    out.write('{"title": ' + json.dumps(report.title) + ', "tables": {')
+    for table_no, table in enumerate(report.tables):
+        out.write(
+            (", " if table_no else "")
+            + json.dumps(table.key)
+            + ': {"title": '
+            + json.dumps(table.title)
+            + ', "rows": ['
+        )
+        for row_no, row in enumerate(table.rows()):
+            out.write(
+                (",\n" if row_no else "\n")
+                + json.dumps(_record(table, row), ensure_ascii=False, default=str)
+            )
+        out.write("\n]}")
+    out.write("}}\n")
+
+
+HTML_STYLE = """
+body { font-family: system-ui, sans-serif; margin: 2rem; color: #222; }
+table { border-collapse: collapse; margin-bottom: 2rem; }
+th, td { border: 1px solid #ccc; padding: 0.25rem 0.6rem; }
+th { background: #f0f0f0; text-align: left; }
+td.number { text-align: right; font-variant-numeric: tabular-nums; }
+tr:nth-child(even) td { background: #fafafa; }
+"""
+
+
+def _write_html(report: Report, out: TextIO) -> None:
+    # self-contained: inline style, no scripts or external assets
+    out.write(
+        f'<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n'
+        f"<title>{html.escape(report.title)}</title>\n"
+        f"<style>{HTML_STYLE}</style>\n</head>\n<body>\n"
+        f"<h1>{html.escape(report.title)}</h1>\n"
+    )
+    for table in report.tables:
+        out.write(
+            f'<h2 id="{html.escape(table.key)}">{html.escape(table.title)}</h2>\n'
+            "<table>\n<thead><tr>"
+        )
+        out.writelines(f"<th>{html.escape(label)}</th>" for _, label in table.fields)
+        out.write("</tr></thead>\n<tbody>\n")
+        for row in table.rows():
+            cells = (
+                f'<td class="number">{_text(value)}</td>'
+                if isinstance(value, (int, float)) and not isinstance(value, bool)
+                else f"<td>{html.escape(_text(value))}</td>"
+                for value in _values(table, row)
+            )
+            out.write("<tr>" + "".join(cells) + "</tr>\n")
+        out.write("</tbody>\n</table>\n")
+    out.write("</body>\n</html>\n")
+
+
+def _write_csv_tables(report: Report, base_path: Path) -> List[Path]:
+    """CSV has no sections -> one file per table, e.g. movie_insights_top_rated.csv"""
+    paths = []
+    for table in report.tables:
+        path = base_path.with_name(f"{base_path.stem}_{table.key}.csv")
+        with open(path, "w", newline="", encoding="utf-8") as out:
+            writer = csv.writer(out)
+            writer.writerow(label for _, label in table.fields)
+            writer.writerows(_values(table, row) for row in table.rows())
+        paths.append(path)
+    return paths
+
+
+# format -> function streaming the report into an open text file
+STREAM_WRITERS: Dict[str, Callable[[Report, TextIO], None]] = {
+    "md": _write_markdown,
+    "json": _write_json,
+    "html": _write_html,
+}
+
+
+def write_report(
+    report: Report, base_path: Path, formats: Sequence[str] = ("md",)
+) -> List[Path]:
+    """Write the report in every format next to base_path (its suffix is replaced),
+    return the written files."""
+    unknown = set(formats) - set(REPORT_FORMATS)
+    if unknown:
+        raise ReportError(
+            f"Unknown report formats {sorted(unknown)}, expected some of "
+            f"{REPORT_FORMATS}"
+        )
+
+    try:
+        base_path.parent.mkdir(parents=True, exist_ok=True)
+        written: List[Path] = []
+        for report_format in formats:
+            if report_format == "csv":
+                written += _write_csv_tables(report, base_path)
+                continue
+            path = base_path.with_suffix(f".{report_format}")
+            with open(path, "w", encoding="utf-8") as out:
+                STREAM_WRITERS[report_format](report, out)
+            written.append(path)
+        logger.info(f"Report written: {', '.join(map(str, written))}")
+        return written
+    except Exception as e:
+        logger.error(f"Error writing report: {str(e)}")
+        raise ReportError(f"Error writing report: {str(e)}")
@@ -0,0 +1,615 @@
+import asyncio
+import json
+import math
+import os
+import signal
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import suppress
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from src.data_analysis.data_insights import (
+    get_genre_statistics,
+    insights_report,
+    rating_discrepancies_frame,
+    top_rated_frame,
+)
+from src.data_analysis.partitioned_store import (
+    NO_FILTER,
+    PartitionFilter,
+    filter_movie_data,
+)
+from src.data_analysis.render_cache import PLOT_COLUMNS
+from src.data_analysis.reporting import table_records
+from src.data_analysis.shared_frame import (
+    SharedFrame,
+    SharedFrameError,
+    init_worker,
+    share_movie_data,
+    worker_data,
+)
+from src.utils.config import ProjectConfig
+from src.utils.logger import setup_logger
+from src.utils.types import RENDER_PROFILES, MovieData, PlotConfig, render_profile
+
+logger = setup_logger("server", ProjectConfig.get_log_file("server"))
+
+INSIGHT_SECTIONS = ("top_rated", "rating_discrepancies", "genre_stats")
+PLOTS = ("heatmap", "genres", "trends", "runtime")
+
+CONTENT_TYPES = {
+    "json": "application/json",
+    "png": "image/png",
+    "svg": "image/svg+xml",
+    "pdf": "application/pdf",
+}
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+# Filtered frames kept per process (LRU), each one memoizes its own views (valid
+# ratings, genre index, ...)
+FILTER_CACHE_SIZE = 32
+
+# Requests larger than this (request line + headers) are refused
+MAX_HEADER_BYTES = 16 * 1024
+
+# Request bodies are read and dropped (GET / HEAD only), larger ones are refused instead
+# of buffered
+MAX_BODY_BYTES = 64 * 1024
+
+# Largest k of the ranking tables, more rows than anyone reads in a response
+MAX_K = 1000
+
+
+class ServerError(Exception):
+    """Custom exception for analysis server errors."""
+
+    pass
+
+
+class BadRequest(ServerError):
+    """Invalid path or query parameters -> 400 / 404, everything else is a 500."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class Query(NamedTuple):
+    """A parsed request, defaults filled in -> equal queries are equal keys of the
+    response cache"""
+
+    kind: str  # insights | plot
+    name: str  # section ('' = all of them) or plot name
+    filters: PartitionFilter = NO_FILTER
+    k: int = 20
+    threshold: float = 30.0
+    min_movies: int = 10
+    profile: str = ""  # render profile of plots, '' -> the server's config
+
+
+class Response(NamedTuple):
+    status: int
+    content_type: str
+    body: bytes
+
+
+def _json_response(payload: Any, status: int = 200) -> Response:
+    return Response(
+        status,
+        CONTENT_TYPES["json"],
+        json.dumps(payload, ensure_ascii=False, default=str).encode(),
+    )
+
+
+def _single(params: Dict[str, List[str]], name: str) -> Optional[str]:
+    values = params.get(name)
+    return None if not values else values[-1]
+
+
+def _cast(name: str, value: str, cast: Callable[[str], Any]) -> Any:
+    """cast(value), only finite numbers (float('nan') / 'inf' parse but compare false
+    with everything)"""
+    try:
+        number = cast(value)
+    except ValueError:
+        raise BadRequest(f"{name} has to be a number, got {value!r}")
+    if not math.isfinite(number):
+        raise BadRequest(f"{name} has to be a finite number, got {value!r}")
+    return number
+
+
+def _number(
+    params: Dict[str, List[str]],
+    name: str,
+    cast: Callable[[str], Any],
+    default: Any,
+    low: float = 0,
+    high: float = math.inf,
+) -> Any:
+    value = _single(params, name)
+    if value is None:
+        return default
+    number = _cast(name, value, cast)
+    if not low <= number <= high:
+        raise BadRequest(f"{name} has to be between {low} and {high}, got {value!r}")
+    return number
+
+
+def _bounds(
+    params: Dict[str, List[str]], name: str, cast: Callable[[str], Any]
+) -> Optional[Tuple[Any, Any]]:
+    """years=1990,1999 / tomatometer=60,100 -> inclusive (low, high)"""
+    value = _single(params, name)
+    if value is None:
+        return None
+    bounds = value.split(",")
+    if len(bounds) != 2:
+        raise BadRequest(f"{name} has to be FROM,TO, got {value!r}")
+    low, high = (_cast(name, bound, cast) for bound in bounds)
+    if low > high:
+        raise BadRequest(f"{name} is empty, {low} > {high}")
+    return low, high
+
+
+def parse_query(path: str, params: Dict[str, List[str]]) -> Query:
+    """/insights[/section] or /plots/name plus query parameters (see the README) ->
+    Query"""
+    parts = [part for part in path.split("/") if part]
+    if parts[:1] == ["insights"] and len(parts) <= 2:
+        kind, name = "insights", parts[1] if len(parts) == 2 else ""
+        if name and name not in INSIGHT_SECTIONS:
+            raise BadRequest(
+                f"Unknown insight {name!r}, expected one of {list(INSIGHT_SECTIONS)}",
+                404,
+            )
+    elif parts[:1] == ["plots"] and len(parts) == 2:
+        kind, name = "plot", parts[1].rsplit(".", 1)[0]  # /plots/heatmap.png works too
+        if name not in PLOTS:
+            raise BadRequest(
+                f"Unknown plot {name!r}, expected one of {list(PLOTS)}", 404
+            )
+    else:
+        raise BadRequest(f"Unknown path {path!r}", 404)
+
+    profile = _single(params, "profile") or ""
+    if profile and profile not in RENDER_PROFILES:
+        raise BadRequest(
+            f"Unknown render profile {profile!r}, expected one of "
+            f"{list(RENDER_PROFILES)}"
+        )
+
+    genres = tuple(
+        sorted(
+            {
+                genre.strip()
+                for value in params.get("genres", [])
+                for genre in value.split(",")
+                if genre.strip()
+            }
+        )
+    )
+    filters = PartitionFilter(
+        years=_bounds(params, "years", int),
+        genres=genres,
+        tomatometer=_bounds(params, "tomatometer", float),
+        audience=_bounds(params, "audience", float),
+    )
+    return Query(
+        kind=kind,
+        name=name,
+        filters=filters,
+        k=_number(params, "k", int, 20, low=1, high=MAX_K),
+        threshold=_number(params, "threshold", float, 30.0, high=100),
+        min_movies=_number(params, "min_movies", int, 10, low=1),
+        profile=profile if kind == "plot" else "",
+    )
+
+
+def insight_payload(data: MovieData, query: Query) -> Dict[str, Any]:
+    """The insight tables of the query as JSON-ready dicts, same records as the JSON
+    report"""
+    sections = {
+        "top_rated": lambda: top_rated_frame(data.valid_ratings, query.k),
+        "rating_discrepancies": lambda: rating_discrepancies_frame(
+            data.valid_ratings, query.threshold, query.k
+        ),
+        "genre_stats": lambda: get_genre_statistics(data, query.min_movies),
+    }
+    names = [query.name] if query.name else list(INSIGHT_SECTIONS)
+    # sections that are not asked for are never computed, insights_report only formats
+    # what is iterated
+    report = insights_report(
+        **{
+            name: sections[name]() if name in names else [] for name in INSIGHT_SECTIONS
+        },
+        k=query.k,
+    )
+    tables = {
+        table.key: {"title": table.title, "rows": table_records(table)}
+        for table in report.tables
+        if table.key in names
+    }
+    return {"rows": len(data.df), "tables": tables}
+
+
+def render_plot(data: MovieData, name: str, config: PlotConfig) -> bytes:
+    """One plot as file bytes (config.file_format)"""
+    from src.data_analysis.visualization import (
+        create_genre_comparison,
+        create_heatmap,
+        create_runtime_analysis,
+        create_yearly_trends,
+        plot_bytes,
+    )
+
+    create = {
+        "heatmap": create_heatmap,
+        "genres": create_genre_comparison,
+        "trends": create_yearly_trends,
+        "runtime": create_runtime_analysis,
+    }[name]
+    return plot_bytes(create(data, config), config)
+
+
+def _setup_worker() -> None:
+    # Ctrl+C reaches the whole group, the server shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # paid at start-up, not by the first plot request
+    import src.data_analysis.visualization  # noqa: F401
+
+
+@lru_cache(maxsize=FILTER_CACHE_SIZE)
+def _worker_filtered(filters: PartitionFilter) -> MovieData:
+    return filter_movie_data(worker_data(), filters)
+
+
+def _render_in_worker(name: str, filters: PartitionFilter, config: PlotConfig) -> bytes:
+    return render_plot(_worker_filtered(filters), name, config)
+
+
+def _ready() -> bool:
+    return worker_data() is not None  # raises when the worker could not attach
+
+
+class AnalysisServer:
+    """Local HTTP service over one resident MovieData.
+
+    Insight queries run on one thread next to the event loop, plots on a pool of
+    plot_workers processes attached to a shared memory copy of the plot columns
+    (plot_workers=0 -> one render thread in this process), so slow plots never hold up
+    insight queries. The last cache_size responses are kept in memory and identical
+    requests in flight are computed once.
+    """
+
+    def __init__(
+        self,
+        data: MovieData,
+        config: PlotConfig,
+        plot_workers: int = 1,
+        cache_size: int = 256,
+    ):
+        self.data = data
+        self.config = config
+        self.plot_workers = plot_workers
+        self.cache_size = cache_size
+        # repeated filters reuse the frame and every view computed on it
+        self._filtered = lru_cache(maxsize=FILTER_CACHE_SIZE)(
+            lambda filters: filter_movie_data(data, filters)
+        )
+        self._responses: "OrderedDict[Query, Response]" = OrderedDict()
+        self._in_flight: Dict[Query, asyncio.Future] = {}
+        self._queries = ThreadPoolExecutor(max_workers=1, thread_name_prefix="insights")
+        self._plots: Optional[Executor] = None
+        self._shared: Optional[SharedFrame] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    # ---------------------------------------------------------------- lifecycle
+
+    def _start_plot_pool(self) -> None:
+        if self.plot_workers > 0:
+            try:
+                self._shared = share_movie_data(self.data, PLOT_COLUMNS)
+                self._plots = ProcessPoolExecutor(
+                    max_workers=self.plot_workers,
+                    initializer=init_worker,
+                    initargs=(self._shared.descriptor, _setup_worker),
+                )
+                # start every worker now (attach + imports) instead of on the first plot
+                # requests
+                started = [self._plots.submit(_ready) for _ in range(self.plot_workers)]
+                if not all(future.result() for future in started):
+                    raise ServerError("a plot worker did not attach the shared data")
+                logger.info(f"Started {self.plot_workers} plot workers.")
+                return
+            except (
+                SharedFrameError,
+                OSError,
+                NotImplementedError,
+                BrokenProcessPool,
+                ServerError,
+            ) as e:
+                logger.warning(
+                    f"Could not start {self.plot_workers} plot workers ({str(e)}), "
+                    f"rendering in a thread."
+                )
+                self._close_plot_pool()
+        # pyplot is not thread-safe
+        self._plots = ThreadPoolExecutor(max_workers=1, thread_name_prefix="plots")
+
+    def _close_plot_pool(self) -> None:
+        if self._plots is not None:
+            self._plots.shutdown(wait=True, cancel_futures=True)
+            self._plots = None
+        if self._shared is not None:
+            self._shared.close()
+            self._shared = None
+
+    def _restart_plot_pool(self) -> None:
+        self._close_plot_pool()
+        self._start_plot_pool()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8050) -> Tuple[str, int]:
+        """Start the plot pool, warm the default insights and listen, returns the bound
+        (host, port)."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._start_plot_pool)
+        # builds the shared views once
+        await self.respond(Query(kind="insights", name=""))
+        self._server = server = await asyncio.start_server(
+            self._handle_connection, host, port, limit=MAX_HEADER_BYTES
+        )
+        bound: Tuple[str, int] = server.sockets[0].getsockname()[:2]
+        logger.info(f"Serving {len(self.data.df)} rows on http://{bound[0]}:{bound[1]}")
+        return bound
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            raise ServerError("serve_forever() needs a started server, call start()")
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+        self._queries.shutdown(wait=False, cancel_futures=True)
+        self._close_plot_pool()
+
+    # ---------------------------------------------------------------- responses
+
+    def _remember(self, query: Query, response: Response) -> None:
+        if response.status != 200:
+            return
+        self._responses[query] = response
+        if len(self._responses) > self.cache_size:
+            self._responses.popitem(last=False)  # least recently used
+
+    async def respond(self, query: Query) -> Tuple[Response, bool]:
+        """(response, came from the cache)"""
+        cached = self._responses.get(query)
+        if cached is not None:
+            self._responses.move_to_end(query)
+            return cached, True
+
+        pending = self._in_flight.get(query)
+        if pending is not None:
+            return await asyncio.shield(pending), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[query] = future
+        try:
+            response = await self._compute(query)
+            self._remember(query, response)
+            future.set_result(response)
+            return response, False
+        except BaseException as e:
+            future.set_exception(e)
+            # retrieved -> no "never retrieved" warning when nobody else waited
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[query]
+
+    async def _compute(self, query: Query) -> Response:
+        loop = asyncio.get_running_loop()
+        if query.kind == "insights":
+            payload = await loop.run_in_executor(
+                self._queries,
+                lambda: insight_payload(self._filtered(query.filters), query),
+            )
+            return _json_response(payload)
+
+        config = render_profile(query.profile) if query.profile else self.config
+        try:
+            if isinstance(self._plots, ProcessPoolExecutor):
+                body = await asyncio.wrap_future(
+                    self._plots.submit(
+                        _render_in_worker, query.name, query.filters, config
+                    )
+                )
+            else:
+                body = await loop.run_in_executor(
+                    self._plots,
+                    lambda: render_plot(
+                        self._filtered(query.filters), query.name, config
+                    ),
+                )
+        except BrokenProcessPool:
+            # a worker died (e.g. killed for memory) -> fresh pool for the next requests
+            logger.error("Plot pool broke, restarting it.")
+            await loop.run_in_executor(None, self._restart_plot_pool)
+            raise
+        return Response(200, CONTENT_TYPES[config.file_format], body)
+
+    # ---------------------------------------------------------------- HTTP
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """HTTP/1.1 with keep-alive, GET / HEAD only, request bodies are ignored"""
+        try:
+            while True:
+                try:
+                    request_line = await reader.readline()
+                    if not request_line:
+                        break
+                    headers = {}
+                    while True:
+                        line = await reader.readline()
+                        if line in (b"\r\n", b"\n", b""):
+                            break
+                        key, _, value = line.decode("latin-1").partition(":")
+                        headers[key.strip().lower()] = value.strip()
+                # readline raises ValueError past the limit
+                except (asyncio.LimitOverrunError, ValueError):
+                    await self._write(
+                        writer,
+                        _json_response({"error": "request too large"}, 400),
+                        False,
+                        False,
+                    )
+                    break
+                try:
+                    body_length = int(headers.get("content-length", "0"))
+                except ValueError:
+                    error = f'invalid Content-Length {headers["content-length"]!r}'
+                    await self._write(
+                        writer, _json_response({"error": error}, 400), False, False
+                    )
+                    break
+                if not 0 <= body_length <= MAX_BODY_BYTES:
+                    # refused instead of buffered, the unread body makes the connection
+                    # unusable -> close
+                    error = (
+                        f"request body has to be 0-{MAX_BODY_BYTES} bytes, "
+                        f"got {body_length}"
+                    )
+                    await self._write(
+                        writer, _json_response({"error": error}, 413), False, False
+                    )
+                    break
+
+                if body_length:
+                    await reader.readexactly(body_length)
+                method, target, version = (
+                    request_line.decode("latin-1").split() + ["", "", ""]
+                )[:3]
+                keep_alive = headers.get("connection", "").lower() != "close" and (
+                    version == "HTTP/1.1"
+                    or headers.get("connection", "").lower() == "keep-alive"
+                )
+
+                start = time.perf_counter()
+                response, cached = await self._dispatch(method, target)
+                await self._write(
+                    writer, response, keep_alive, cached, head=method == "HEAD"
+                )
+                elapsed = (time.perf_counter() - start) * 1000
+                logger.info(
+                    f"{method} {target} {response.status} "
+                    f'{"hit" if cached else "miss"} {elapsed:.1f}ms'
+                )
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # client went away
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method: str, target: str) -> Tuple[Response, bool]:
+        if method not in ("GET", "HEAD"):
+            return (
+                _json_response({"error": f"{method} is not supported, use GET"}, 405),
+                False,
+            )
+        url = urlsplit(target)
+        if url.path.rstrip("/") in ("", "/health"):
+            return (
+                _json_response(
+                    {
+                        "status": "ok",
+                        "rows": len(self.data.df),
+                        "plots": list(PLOTS),
+                        "insights": list(INSIGHT_SECTIONS),
+                        "cached_responses": len(self._responses),
+                    }
+                ),
+                False,
+            )
+        try:
+            return await self.respond(parse_query(url.path, parse_qs(url.query)))
+        except BadRequest as e:
+            return _json_response({"error": str(e)}, e.status), False
+        except Exception as e:
+            logger.error(f"Error answering {target}: {str(e)}")
+            return _json_response({"error": str(e)}, 500), False
+
+    @staticmethod
+    async def _write(
+        writer: asyncio.StreamWriter,
+        response: Response,
+        keep_alive: bool,
+        cached: bool,
+        head: bool = False,
+    ) -> None:
+        header = (
+            f'HTTP/1.1 {response.status} {REASONS.get(response.status, "")}\r\n'
+            f"Content-Type: {response.content_type}\r\n"
+            f"Content-Length: {len(response.body)}\r\n"
+            f'X-Cache: {"hit" if cached else "miss"}\r\n'
+            f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'
+        )
+        writer.write(header.encode("latin-1") + (b"" if head else response.body))
+        await writer.drain()
+
+
+def run_server(
+    data: MovieData,
+    config: PlotConfig,
+    host: str = "127.0.0.1",
+    port: int = 8050,
+    plot_workers: int = 1,
+    cache_size: int = 256,
+) -> None:
+    """Serve until interrupted (Ctrl+C), the plot workers and the shared memory are
+    released on the way out."""
+    server = AnalysisServer(
+        data,
+        config,
+        plot_workers=min(plot_workers, os.cpu_count() or 1),
+        cache_size=cache_size,
+    )
+
+    async def _serve() -> None:
+        bound = await server.start(host, port)
+        with suppress(NotImplementedError):  # no signal handlers in Windows event loops
+            # SIGTERM (service managers, `kill`) stops like Ctrl+C
+            task = asyncio.current_task()
+            if task is not None:
+                asyncio.get_running_loop().add_signal_handler(
+                    signal.SIGTERM, task.cancel
+                )
+        print(f"Serving on http://{bound[0]}:{bound[1]} (Ctrl+C to stop)", flush=True)
+        try:
+            await server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+
+    try:
+        asyncio.run(_serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        logger.info("Server stopped.")
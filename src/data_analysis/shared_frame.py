@@ -0,0 +1,335 @@
+import weakref
+from multiprocessing import shared_memory
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    cast,
+)
+
+import numpy as np
+import pandas as pd
+
+from src.utils.config import ProjectConfig
+from src.utils.logger import log_synchronously, setup_logger
+from src.utils.types import MovieData
+
+logger = setup_logger("shared_frame", ProjectConfig.get_log_file("shared_frame"))
+
+# Every array starts on a cache line
+ALIGNMENT = 64
+
+INDEX_COLUMN = "__index__"
+
+
+class SharedFrameError(Exception):
+    """Custom exception for shared memory frame errors."""
+
+    pass
+
+
+class SharedArray(NamedTuple):
+    """Where one array lives inside the segment"""
+
+    dtype: str
+    offset: int
+    length: int
+
+
+class SharedColumn(NamedTuple):
+    """One column of a shared frame.
+
+    kind: numeric -> plain numpy values,
+    masked -> nullable extension array (values + NA mask),
+    category -> categorical codes,
+    dictionary -> factorized strings/objects (codes, -1 = missing).
+    The dictionary of category / dictionary columns is one UTF-8 text with character
+    offsets, so it is shared as well instead of being pickled with the descriptor.
+    """
+
+    name: str
+    kind: str
+    values: SharedArray
+    mask: Optional[SharedArray] = None
+    text: Optional[SharedArray] = None  # uint8 UTF-8 bytes of all dictionary entries
+    bounds: Optional[
+        SharedArray
+    ] = None  # int64 character offsets, entry i = text[bounds[i]:bounds[i + 1]]
+    dtype: str = ""  # pandas dtype to rebuild masked / dictionary columns
+    ordered: bool = False
+
+
+class SharedFrameDescriptor(NamedTuple):
+    """Everything a worker needs to attach, small and cheap to pickle"""
+
+    segment: str
+    size: int
+    rows: int
+    columns: Tuple[SharedColumn, ...]  # the index first
+
+
+def _dictionary_arrays(entries: Sequence[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    strings = [str(entry) for entry in entries]
+    bounds = np.zeros(len(strings) + 1, dtype=np.int64)
+    np.cumsum([len(entry) for entry in strings], out=bounds[1:])
+    return np.frombuffer("".join(strings).encode("utf-8"), dtype=np.uint8), bounds
+
+
+def encode_column(series: pd.Series) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """Column -> plain arrays by role (values, mask, text, bounds) plus kind / dtype /
+    ordered to rebuild it.
+
+    Nothing in the result needs pickling, so the arrays can live in shared memory or in
+    .npy files.
+    """
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        text, bounds = _dictionary_arrays(dtype.categories)
+        return (
+            {"values": series.cat.codes.to_numpy(), "text": text, "bounds": bounds},
+            {"kind": "category", "ordered": bool(dtype.ordered)},
+        )
+
+    if isinstance(dtype, np.dtype) and dtype.kind in "biufmM":
+        return {"values": series.to_numpy()}, {"kind": "numeric"}
+
+    if pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+        # nullable extension dtypes (UInt32, Float32, boolean, ...)
+        return (
+            {
+                "values": series.to_numpy(dtype=dtype.numpy_dtype, na_value=0),
+                "mask": series.isna().to_numpy(),
+            },
+            {"kind": "masked", "dtype": str(dtype)},
+        )
+
+    # titles and other strings -> codes into a shared dictionary
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    text, bounds = _dictionary_arrays(uniques)
+    return (
+        {"values": codes.astype(np.int32), "text": text, "bounds": bounds},
+        {"kind": "dictionary", "dtype": str(dtype)},
+    )
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _buffer(shm: shared_memory.SharedMemory) -> memoryview:
+    # None only after close()
+    if shm.buf is None:
+        raise SharedFrameError(f"Shared segment {shm.name} is closed")
+    return shm.buf
+
+
+class SharedFrame:
+    """A DataFrame copied once into a shared memory segment, owned by the process that
+    created it.
+
+    Workers attach with attach_movie_data(frame.descriptor) and read the columns in
+    place. The segment is unlinked by close(), at the end of a with block (also on
+    errors) and at interpreter exit.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: Optional[Sequence[str]] = None):
+        names = [
+            col
+            for col in (columns if columns is not None else df.columns)
+            if col in df.columns
+        ]
+        try:
+            encoded = [(INDEX_COLUMN, *encode_column(df.index.to_series()))] + [
+                (name, *encode_column(df[name])) for name in names
+            ]
+
+            # layout first -> one segment for the whole frame
+            layout, size = [], 0
+            for name, arrays, meta in encoded:
+                placed: Dict[str, Any] = {}
+                for role, array in arrays.items():
+                    size = _aligned(size)
+                    placed[role] = SharedArray(array.dtype.str, size, len(array))
+                    size += array.nbytes
+                layout.append(SharedColumn(name=name, **placed, **meta))
+
+            self._shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        except Exception as e:
+            logger.error(f"Error sharing frame: {str(e)}")
+            raise SharedFrameError(f"Error sharing frame: {str(e)}")
+
+        # from here on the segment exists -> released on any failure, on close() or at
+        # exit
+        self._finalizer = weakref.finalize(self, _release, self._shm)
+        try:
+            for (_, arrays, _), column in zip(encoded, layout):
+                for role, array in arrays.items():
+                    _view(_buffer(self._shm), getattr(column, role))[:] = array
+
+            self.descriptor = SharedFrameDescriptor(
+                segment=self._shm.name, size=size, rows=len(df), columns=tuple(layout)
+            )
+            logger.info(
+                f"Shared {len(names)} columns ({len(df)} rows, {size / 2**20:.1f} MiB) "
+                f"in segment {self._shm.name}."
+            )
+        except Exception as e:
+            self.close()
+            logger.error(f"Error sharing frame: {str(e)}")
+            raise SharedFrameError(f"Error sharing frame: {str(e)}")
+
+    def close(self) -> None:
+        """Unlink the segment, workers that are still attached keep their mapping until
+        they exit."""
+        self._finalizer()
+
+    def __enter__(self) -> "SharedFrame":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def _release(shm: shared_memory.SharedMemory) -> None:
+    try:
+        shm.close()
+        shm.unlink()
+        logger.info(f"Released shared segment {shm.name}.")
+    except FileNotFoundError:
+        pass  # already gone
+    except BufferError:
+        # arrays of this process still point into it -> only unlink, the mapping goes
+        # with the process
+        shm.unlink()
+
+
+def share_movie_data(
+    data: MovieData, columns: Optional[Sequence[str]] = None
+) -> SharedFrame:
+    """Copy the columns (all by default) of data into shared memory, use it as a context
+    manager."""
+    return SharedFrame(data.df, columns)
+
+
+def _view(buffer: memoryview, array: SharedArray) -> np.ndarray:
+    return np.ndarray(
+        (array.length,), dtype=np.dtype(array.dtype), buffer=buffer, offset=array.offset
+    )
+
+
+def _dictionary(text: np.ndarray, bounds: np.ndarray) -> List[str]:
+    # one decode for the whole dictionary, then slicing by character offsets
+    decoded = text.tobytes().decode("utf-8")
+    offsets = cast(List[int], bounds.tolist())
+    return [decoded[start:stop] for start, stop in zip(offsets, offsets[1:])]
+
+
+def decode_column(
+    kind: str, arrays: Dict[str, np.ndarray], dtype: str = "", ordered: bool = False
+) -> Any:
+    """Inverse of encode_column. values (and mask) are used as they are, no copy ->
+    views into shared memory or memory-mapped files stay views, only dictionaries are
+    decoded."""
+    values = arrays["values"]
+    if kind == "numeric":
+        return values
+    if kind == "masked":
+        return pd.api.types.pandas_dtype(dtype).construct_array_type()(
+            values, arrays["mask"]
+        )
+    if kind == "category":
+        return pd.Categorical.from_codes(
+            values,
+            categories=_dictionary(arrays["text"], arrays["bounds"]),
+            ordered=ordered,
+        )
+    if kind == "dictionary":
+        # -1 -> NaN
+        decoded = np.asarray(
+            _dictionary(arrays["text"], arrays["bounds"]) + [np.nan], dtype=object
+        )[values]
+        return pd.array(decoded, dtype=dtype) if dtype != "object" else decoded
+    raise SharedFrameError(f"Unknown shared column kind: {kind}")
+
+
+def _decode_shared(buffer: memoryview, column: SharedColumn) -> Any:
+    def _readonly(array: SharedArray) -> np.ndarray:
+        view = _view(buffer, array)
+        view.flags.writeable = False  # shared with every other process -> read-only
+        return view
+
+    arrays = {
+        role: _readonly(getattr(column, role))
+        for role in ("values", "mask", "text", "bounds")
+        if getattr(column, role) is not None
+    }
+    return decode_column(column.kind, arrays, column.dtype, column.ordered)
+
+
+# segment name -> mapping of this process, kept open as long as the process lives (the
+# frames point into it)
+_attached: Dict[str, shared_memory.SharedMemory] = {}
+
+
+def attach_frame(descriptor: SharedFrameDescriptor) -> pd.DataFrame:
+    """DataFrame whose columns are read-only views into the shared segment.
+
+    Numeric, nullable and categorical code arrays are not copied, only string
+    dictionaries are decoded (titles are materialized per process).
+    """
+    try:
+        shm = _attached.get(descriptor.segment)
+        if shm is None:
+            shm = _attached[descriptor.segment] = shared_memory.SharedMemory(
+                name=descriptor.segment
+            )
+        index, *columns = descriptor.columns
+        return pd.DataFrame(
+            {column.name: _decode_shared(_buffer(shm), column) for column in columns},
+            index=pd.Index(_decode_shared(_buffer(shm), index), copy=False),
+            copy=False,
+        )
+    except Exception as e:
+        logger.error(f"Error attaching shared frame {descriptor.segment}: {str(e)}")
+        raise SharedFrameError(
+            f"Error attaching shared frame {descriptor.segment}: {str(e)}"
+        )
+
+
+def attach_movie_data(descriptor: SharedFrameDescriptor) -> MovieData:
+    """MovieData over a shared frame, works with every insight and create_* function"""
+    return MovieData(df=attach_frame(descriptor))
+
+
+# MovieData of this worker process, set once by init_worker
+_worker_data: Optional[MovieData] = None
+
+
+def init_worker(
+    descriptor: SharedFrameDescriptor, setup: Optional[Callable[[], None]] = None
+) -> None:
+    """Pool initializer: attach once to the shared frame, tasks read it with
+    worker_data().
+
+    setup (a module level function) runs first, for whatever else the worker needs
+    (backend, imports, ...).
+    """
+    global _worker_data
+    # workers end with os._exit, queued log records would never be written
+    log_synchronously()
+    if setup is not None:
+        setup()
+    _worker_data = attach_movie_data(descriptor)
+
+
+def worker_data() -> MovieData:
+    """The shared MovieData of this worker, only inside a pool started with
+    init_worker"""
+    if _worker_data is None:
+        raise SharedFrameError("No shared frame attached in this process")
+    return _worker_data
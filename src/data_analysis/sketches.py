@@ -0,0 +1,231 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.data_analysis.aggregation import RATING_COLUMNS
+from src.data_analysis.binning import RUNTIME_EDGES, bin_codes
+from src.utils.config import ProjectConfig
+from src.utils.logger import setup_logger
+from src.utils.types import MovieData, register_view
+
+logger = setup_logger("sketches", ProjectConfig.get_log_file("sketches"))
+
+# Ratings are whole (or at most tenth) percents -> a 0.1 grid over 0-100 keeps every
+# distinct value
+RATING_RESOLUTION = 0.1
+
+# At most this many outlier markers per box, the ones farthest from the median are kept
+MAX_FLIERS = 100
+
+
+class SketchError(Exception):
+    """Custom exception for sketch errors."""
+
+    pass
+
+
+class HistogramSketch(NamedTuple):
+    """Per group counts of bounded values on a fixed grid low, low + resolution, ...,
+    high.
+
+    Memory is groups x buckets whatever the number of rows, and two sketches over the
+    same grid merge by adding their counts. Quantiles are exact for values on the grid
+    (ratings), anything else is rounded to the nearest grid point first.
+    """
+
+    low: float
+    resolution: float
+    counts: np.ndarray  # int64 (groups, buckets)
+
+    @property
+    def values(self) -> np.ndarray:
+        """Value of every bucket"""
+        return np.round(
+            self.low + np.arange(self.counts.shape[1]) * self.resolution, 10
+        )
+
+
+def empty_sketch(
+    groups: int,
+    low: float = 0.0,
+    high: float = 100.0,
+    resolution: float = RATING_RESOLUTION,
+) -> HistogramSketch:
+    buckets = int(round((high - low) / resolution)) + 1
+    return HistogramSketch(
+        low=low,
+        resolution=resolution,
+        counts=np.zeros((groups, buckets), dtype=np.int64),
+    )
+
+
+def sketch_values(
+    values: np.ndarray,
+    groups: np.ndarray,
+    n_groups: int,
+    low: float = 0.0,
+    high: float = 100.0,
+    resolution: float = RATING_RESOLUTION,
+) -> HistogramSketch:
+    """Sketch of values per group in one bincount, group -1 and NaN values are left out.
+
+    Values outside [low, high] are counted in the first / last bucket.
+    """
+    try:
+        sketch = empty_sketch(n_groups, low, high, resolution)
+        buckets = sketch.counts.shape[1]
+        values = np.asarray(values, dtype=np.float64)
+        groups = np.asarray(groups)
+
+        keep = (groups >= 0) & ~np.isnan(values)
+        positions = np.rint((values[keep] - low) / resolution)
+        outside = np.count_nonzero((positions < 0) | (positions >= buckets))
+        if outside:
+            logger.warning(
+                f"{outside} values outside [{low}, {high}] were clipped into the "
+                "sketch."
+            )
+        cells = groups[keep].astype(np.int64) * buckets + np.clip(
+            positions, 0, buckets - 1
+        ).astype(np.int64)
+
+        counts = np.bincount(cells, minlength=n_groups * buckets).reshape(
+            n_groups, buckets
+        )
+        return sketch._replace(counts=counts.astype(np.int64))
+    except SketchError:
+        raise
+    except Exception as e:
+        logger.error(f"Error building sketch: {str(e)}")
+        raise SketchError(f"Error building sketch: {str(e)}")
+
+
+def merge_sketches(left: HistogramSketch, right: HistogramSketch) -> HistogramSketch:
+    """Sketch of both inputs, the grids have to match"""
+    if (left.low, left.resolution, left.counts.shape) != (
+        right.low,
+        right.resolution,
+        right.counts.shape,
+    ):
+        raise SketchError("Only sketches over the same groups and grid can be merged")
+    return left._replace(counts=left.counts + right.counts)
+
+
+def _order_statistics(
+    counts: np.ndarray, values: np.ndarray, ranks: np.ndarray
+) -> np.ndarray:
+    """Value at each 0-based rank of the sorted data of one group"""
+    return values[np.searchsorted(np.cumsum(counts), ranks, side="right")]
+
+
+def sketch_quantiles(sketch: HistogramSketch, q: Sequence[float]) -> np.ndarray:
+    """(groups, len(q)) quantiles with np.percentile's default linear interpolation, NaN
+    for empty groups."""
+    fractions = np.asarray(q, dtype=np.float64)
+    values = sketch.values
+    result = np.full((sketch.counts.shape[0], len(fractions)), np.nan)
+    for group, counts in enumerate(sketch.counts):
+        n = counts.sum()
+        if n == 0:
+            continue
+        position = fractions * (n - 1)
+        below = np.floor(position)
+        lower = _order_statistics(counts, values, below)
+        upper = _order_statistics(counts, values, np.minimum(below + 1, n - 1))
+        result[group] = lower + (upper - lower) * (position - below)
+    return result
+
+
+def _empty_stats(label: Any) -> Dict[str, Any]:
+    # what matplotlib.cbook.boxplot_stats returns for an empty group -> bxp draws
+    # nothing for it
+    stats = dict.fromkeys(
+        ["mean", "med", "q1", "q3", "iqr", "cilo", "cihi", "whislo", "whishi"], np.nan
+    )
+    return {**stats, "fliers": np.array([]), "label": label}
+
+
+def boxplot_stats(
+    sketch: HistogramSketch,
+    whis: float = 1.5,
+    max_fliers: int = MAX_FLIERS,
+    labels: Optional[Sequence[Any]] = None,
+) -> List[Dict[str, Any]]:
+    """One Axes.bxp dict per group, same definitions as matplotlib.cbook.boxplot_stats.
+
+    Fliers are the distinct outlying values (repeated values would only draw over each
+    other), capped at max_fliers.
+    """
+    try:
+        values = sketch.values
+        quartiles = sketch_quantiles(sketch, [0.25, 0.5, 0.75])
+        labels = list(labels) if labels is not None else [None] * len(sketch.counts)
+
+        def _stats(group: int) -> Dict[str, Any]:
+            counts = sketch.counts[group]
+            n = counts.sum()
+            if n == 0:
+                return _empty_stats(labels[group])
+
+            q1, med, q3 = quartiles[group]
+            iqr = q3 - q1
+            present = values[counts > 0]
+            low_reach, high_reach = q1 - whis * iqr, q3 + whis * iqr
+
+            inside_low = present[present >= low_reach]
+            inside_high = present[present <= high_reach]
+            whislo = (
+                q1
+                if len(inside_low) == 0 or inside_low.min() > q1
+                else inside_low.min()
+            )
+            whishi = (
+                q3
+                if len(inside_high) == 0 or inside_high.max() < q3
+                else inside_high.max()
+            )
+
+            fliers = present[(present < whislo) | (present > whishi)]
+            if len(fliers) > max_fliers:
+                fliers = np.sort(
+                    fliers[
+                        np.argsort(-np.abs(fliers - med), kind="stable")[:max_fliers]
+                    ]
+                )
+
+            return {
+                "mean": float(np.dot(counts, values) / n),
+                "med": med,
+                "q1": q1,
+                "q3": q3,
+                "iqr": iqr,
+                "cilo": med - 1.57 * iqr / np.sqrt(n),
+                "cihi": med + 1.57 * iqr / np.sqrt(n),
+                "whislo": whislo,
+                "whishi": whishi,
+                "fliers": fliers,
+                "label": labels[group],
+            }
+
+        return [_stats(group) for group in range(len(sketch.counts))]
+    except Exception as e:
+        logger.error(f"Error calculating boxplot statistics: {str(e)}")
+        raise SketchError(f"Error calculating boxplot statistics: {str(e)}")
+
+
+def runtime_rating_sketches(df: pd.DataFrame) -> Dict[str, HistogramSketch]:
+    """Critics / audience rating sketch per runtime range of the runtime boxplots, (30,
+    60], (60, 90], ... like the pd.cut they replace"""
+    codes = bin_codes(
+        df["runtime_in_minutes"].to_numpy(), RUNTIME_EDGES, clip=False, right=True
+    )
+    return {
+        col: sketch_values(df[col].to_numpy(), codes, len(RUNTIME_EDGES) - 1)
+        for col in RATING_COLUMNS
+    }
+
+
+@register_view("runtime_rating_sketches")
+def _runtime_rating_sketches_view(data: MovieData) -> Dict[str, HistogramSketch]:
+    return runtime_rating_sketches(data.valid_runtime)
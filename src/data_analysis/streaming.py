@@ -0,0 +1,208 @@
+from functools import reduce
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+import pandas as pd
+
+from src.data_analysis.aggregation import (
+    RATING_COLUMNS,
+    finalize_moments,
+    group_moments,
+    merge_moments,
+)
+from src.data_analysis.binning import rating_heatmap_counts, runtime_rating_counts
+from src.data_analysis.data_insights import (
+    cached_insights,
+    genre_stats_from_frame,
+    rating_discrepancies_frame,
+    top_rated_frame,
+)
+from src.data_analysis.genre_index import combos_to_genres
+from src.data_analysis.ranking import RATING_DISCREPANCIES, TOP_RATED, merge_top_k
+from src.data_analysis.render_cache import RenderCache
+from src.data_analysis.sketches import HistogramSketch, merge_sketches
+from src.utils.config import ProjectConfig
+from src.utils.logger import setup_logger
+from src.utils.types import MovieData, PlotConfig
+
+logger = setup_logger("streaming", ProjectConfig.get_log_file("streaming"))
+
+
+class StreamingError(Exception):
+    """Custom exception for streaming errors."""
+
+    pass
+
+
+class PartialResults(NamedTuple):
+    """Everything the insights and plots need, in a form where two chunks can be
+    merged."""
+
+    rows: int
+    valid_rating_rows: int
+    # keyed by the raw genre list, see genre_index.combos_to_genres
+    genre_moments: pd.DataFrame
+    yearly_moments: pd.DataFrame
+    heatmap_counts: np.ndarray
+    runtime_counts: np.ndarray  # runtime x critics rating counts of the runtime heatmap
+    # rating column -> sketch per runtime range (boxplots)
+    runtime_sketches: Dict[str, HistogramSketch]
+    top_rated: pd.DataFrame  # top-k candidates only
+    rating_discrepancies: pd.DataFrame  # top-k candidates only
+
+
+def partial_results(
+    data: MovieData, discrepancy_threshold: float = 30.0
+) -> PartialResults:
+    """Summarize one chunk."""
+    try:
+        valid_ratings, valid_runtime = data.valid_ratings, data.valid_runtime
+        return PartialResults(
+            rows=len(data.df),
+            valid_rating_rows=len(valid_ratings),
+            genre_moments=group_moments(
+                data.df, "genre", [*RATING_COLUMNS, "runtime_in_minutes"]
+            ),
+            yearly_moments=group_moments(data.df, "release_year", RATING_COLUMNS),
+            heatmap_counts=rating_heatmap_counts(
+                valid_ratings["tomatometer_rating"].to_numpy(),
+                valid_ratings["audience_rating"].to_numpy(),
+            ),
+            runtime_counts=runtime_rating_counts(
+                valid_runtime["runtime_in_minutes"].to_numpy(),
+                valid_runtime["tomatometer_rating"].to_numpy(),
+            ),
+            runtime_sketches=data.view("runtime_rating_sketches"),
+            top_rated=top_rated_frame(valid_ratings),
+            rating_discrepancies=rating_discrepancies_frame(
+                valid_ratings, discrepancy_threshold
+            ),
+        )
+    except Exception as e:
+        logger.error(f"Error summarizing chunk: {str(e)}")
+        raise StreamingError(f"Error summarizing chunk: {str(e)}")
+
+
+def merge_partial_results(
+    left: PartialResults, right: PartialResults, discrepancy_threshold: float = 30.0
+) -> PartialResults:
+    """Merge two chunk summaries, order matters only for ties in the top-k tables (left
+    wins)."""
+    return PartialResults(
+        rows=left.rows + right.rows,
+        valid_rating_rows=left.valid_rating_rows + right.valid_rating_rows,
+        genre_moments=merge_moments(left.genre_moments, right.genre_moments),
+        yearly_moments=merge_moments(left.yearly_moments, right.yearly_moments),
+        heatmap_counts=left.heatmap_counts + right.heatmap_counts,
+        runtime_counts=left.runtime_counts + right.runtime_counts,
+        runtime_sketches={
+            col: merge_sketches(sketch, right.runtime_sketches[col])
+            for col, sketch in left.runtime_sketches.items()
+        },
+        top_rated=merge_top_k(TOP_RATED, left.top_rated, right.top_rated),
+        rating_discrepancies=merge_top_k(
+            RATING_DISCREPANCIES._replace(threshold=discrepancy_threshold),
+            left.rating_discrepancies,
+            right.rating_discrepancies,
+        ),
+    )
+
+
+def collect_partial_results(
+    chunks: Iterable[MovieData], discrepancy_threshold: float = 30.0
+) -> PartialResults:
+    """Fold a stream of chunks into one summary, chunks are dropped as soon as they are
+    summarized."""
+    summaries = map(lambda chunk: partial_results(chunk, discrepancy_threshold), chunks)
+    try:
+        first = next(summaries)
+    except StopIteration:
+        raise StreamingError("No data to summarize, the stream was empty")
+
+    result = reduce(
+        lambda acc, part: merge_partial_results(acc, part, discrepancy_threshold),
+        summaries,
+        first,
+    )
+    logger.info(f"Collected partial results for {result.rows} rows.")
+    return result
+
+
+def generate_key_insights_from_partials(
+    partials: PartialResults,
+    output_dir: Path,
+    formats: Sequence[str] = ("md",),
+    cache: Optional[RenderCache] = None,
+) -> Dict[str, Any]:
+    """Streaming counterpart of data_insights.generate_key_insights"""
+    try:
+        return cached_insights(
+            partials,
+            output_dir,
+            formats,
+            cache,
+            lambda: {
+                "top_rated": partials.top_rated,
+                "rating_discrepancies": partials.rating_discrepancies,
+                "genre_stats": genre_stats_from_frame(
+                    finalize_moments(combos_to_genres(partials.genre_moments))
+                ),
+            },
+        )
+    except Exception as e:
+        logger.error(f"Error generating insights from partial results: {str(e)}")
+        raise StreamingError(
+            f"Error generating insights from partial results: {str(e)}"
+        )
+
+
+def create_plot_functions_from_partials() -> (
+    List[Tuple[str, Callable[[PartialResults, PlotConfig], Any]]]
+):
+    """Plots that can be drawn from partial results, the runtime boxplots come from the
+    merged rating sketches."""
+    # imported here so an insights-only streaming run never loads matplotlib
+    from src.data_analysis.visualization import (
+        draw_genre_comparison,
+        draw_heatmap,
+        draw_runtime_analysis,
+        draw_yearly_trends,
+    )
+
+    return [
+        (
+            "heatmap",
+            lambda p, config: draw_heatmap(
+                p.heatmap_counts, p.valid_rating_rows, config
+            ),
+        ),
+        (
+            "genres",
+            lambda p, config: draw_genre_comparison(
+                finalize_moments(combos_to_genres(p.genre_moments)), config
+            ),
+        ),
+        (
+            "trends",
+            lambda p, config: draw_yearly_trends(
+                finalize_moments(p.yearly_moments), config
+            ),
+        ),
+        (
+            "runtime",
+            lambda p, config: draw_runtime_analysis(
+                p.runtime_counts, p.runtime_sketches, config
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+import importlib
+from typing import Dict
+
+# Derived MovieData view -> module defining it with @register_view. MovieData.view
+# imports the module on first use, so nobody has to import a module only for its
+# registrations (valid_* / decade live in utils.types).
+VIEW_MODULES: Dict[str, str] = {
+    "genre_index": "src.data_analysis.genre_index",
+    "genre": "src.data_analysis.genre_index",
+    "genre_cooccurrence": "src.data_analysis.genre_index",
+    "genre_group_stats": "src.data_analysis.aggregation",
+    "genre_aggregates": "src.data_analysis.aggregation",
+    "year_key": "src.data_analysis.aggregation",
+    "yearly_group_stats": "src.data_analysis.aggregation",
+    "yearly_aggregates": "src.data_analysis.aggregation",
+    "yearly_rating_ci": "src.data_analysis.bootstrap",
+    "genre_rating_ci": "src.data_analysis.bootstrap",
+    "runtime_rating_sketches": "src.data_analysis.sketches",
+    "column_fingerprint": "src.data_analysis.render_cache",
+}
+
+
+def load_view(name: str) -> None:
+    """Import the module registering the view, unknown names are left to
+    MovieData.view"""
+    if name in VIEW_MODULES:
+        importlib.import_module(VIEW_MODULES[name])
@@ -1,22 +1,34 @@
-from functools import reduce
-from typing import Tuple, List, Dict
+import io
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, Union
+
+import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 import seaborn as sns
-from pathlib import Path
-
-from matplotlib.pyplot import figure
 
-from src.utils.types import MovieData, PlotConfig
-from src.utils.logger import setup_logger
+from src.data_analysis.binning import (
+    RUNTIME_EDGES,
+    RUNTIME_RATING_EDGES,
+    rating_heatmap_counts,
+    runtime_rating_counts,
+)
+from src.data_analysis.sketches import HistogramSketch, boxplot_stats
 from src.utils.config import ProjectConfig
+from src.utils.logger import setup_logger
+from src.utils.types import MovieData, PlotConfig
 
-logger = setup_logger('visualization', ProjectConfig.get_log_file('visualization'))
+logger = setup_logger("visualization", ProjectConfig.get_log_file("visualization"))
+
+# No creation dates in vector files and fixed SVG element ids -> same inputs,
+# byte-identical files
+_STABLE_METADATA = {"png": None, "svg": {"Date": None}, "pdf": {"CreationDate": None}}
+_STABLE_RC = {"svg.hashsalt": "movie_analysis"}
 
 
 class VisualizationError(Exception):
     """Custom exception for visualization errors."""
+
     pass
 
 
@@ -24,175 +36,242 @@ def _setup_plot_style(config: PlotConfig) -> None:
     """Set plot style."""
     try:
         # plt.style.use('seaborn-poster') # throws error TODO find why
-        plt.rcParams.update(config.style)
+        plt.rcParams.update(config.style or {})
     except Exception as e:
-        logger.error(f'Failed while setting plot style: {str(e)}')
-        raise VisualizationError(f'Error setting plot style: {str(e)}')
+        logger.error(f"Failed while setting plot style: {str(e)}")
+        raise VisualizationError(f"Error setting plot style: {str(e)}")
 
 
 def _calculate_heatmap_data(df: pd.DataFrame) -> np.ndarray:
     """Calculate heatmap data."""
     try:
-        heatmap_data = np.zeros((10, 10))  # 10x10 matrix bc 0-10 to 90-100 ranges
-
-        def __update_heatmap_data(acc: np.ndarray, row: pd.Series) -> np.ndarray:  # helper function
-            """Update heatmap data."""
-            # Binns data into 10 bins then, helps with OOB but not necessary cause we already filtered
-            x_bin = min(int(row.tomatometer_rating // 10), 9)
-            y_bin = min(int(row.audience_rating // 10), 9)
-            acc[9 - y_bin, x_bin] += 1  # Lecimy od gory do dolu, bo od najwiekszej do najm. oceny i przesuwamy sie
-            return acc
-
-        return reduce(__update_heatmap_data, df.itertuples(),
-                      heatmap_data)  # TODO expects iterable, not itertuples check
+        # 10x10 matrix bc 0-10 to 90-100 ranges
+        return rating_heatmap_counts(
+            df["tomatometer_rating"].to_numpy(), df["audience_rating"].to_numpy()
+        )
     except Exception as e:
-        logger.error(f'Failed calculating heatmap data: {str(e)}')
-        raise VisualizationError(f'Error calculating heatmap data: {str(e)}')
+        logger.error(f"Failed calculating heatmap data: {str(e)}")
+        raise VisualizationError(f"Error calculating heatmap data: {str(e)}")
 
 
 def create_heatmap(data: MovieData, config: PlotConfig) -> plt.Figure:
     """Create heatmap."""
+    try:
+        valid_data = data.valid_ratings
+        return draw_heatmap(
+            _calculate_heatmap_data(valid_data), len(valid_data), config
+        )
+    except VisualizationError:
+        raise
+    except Exception as e:
+        logger.error(f"Failed creating heatmap: {str(e)}")
+        raise VisualizationError(f"Error creating heatmap: {str(e)}")
+
+
+def draw_heatmap(
+    heatmap_data: np.ndarray, total: int, config: PlotConfig
+) -> plt.Figure:
+    """Draw the critics vs audience heatmap from precomputed 10x10 counts."""
     try:
         _setup_plot_style(config)
         fig = plt.figure(figsize=config.figure_size, dpi=config.dpi)
 
-        valid_data = data.valid_ratings
-        heatmap_data = _calculate_heatmap_data(valid_data)
-
         sns.heatmap(
             heatmap_data,
-            cmap='YlGnBu',
-            annot=True,
-            fmt='g',
-            xticklabels=[f'{i}-{i+10}' for i in range(0, 100, 10)],
+            cmap="YlGnBu",
+            annot=config.annotate_heatmap,
+            fmt="g",
+            xticklabels=[f"{i}-{i+10}" for i in range(0, 100, 10)],
             # range(0, 100, 10) -> 0, 10, 20, 30, 40, 50, 60, 70, 80, 90
-            yticklabels=[f'{i}-{i+10}' for i in range(90, -1, -10)],
+            yticklabels=[f"{i}-{i+10}" for i in range(90, -1, -10)],
             # range(90, -10, -10) -> 90, 80, 70, 60, 50, 40, 30, 20, 10, 0
         )
 
-        plt.title(f'Critics vs Audience Ratings\n(Total: {len(valid_data):,} movies)')
-        plt.xlabel('Critics Rating (%)')
-        plt.ylabel('Audience Rating (%)')
+        plt.title(f"Critics vs Audience Ratings\n(Total: {total:,} movies)")
+        plt.xlabel("Critics Rating (%)")
+        plt.ylabel("Audience Rating (%)")
 
         return fig
     except Exception as e:
-        logger.error(f'Failed creating heatmap: {str(e)}')
-        raise VisualizationError(f'Error creating heatmap: {str(e)}')
+        logger.error(f"Failed creating heatmap: {str(e)}")
+        raise VisualizationError(f"Error creating heatmap: {str(e)}")
 
 
-def plot_genre_bars(genre_stats: pd.DataFrame) -> plt.Figure:
+def plot_genre_bars(
+    genre_stats: pd.DataFrame, config: Optional[PlotConfig] = None
+) -> plt.Figure:
     """Plot genre bars."""
     try:
-        fig, ax = plt.subplots(figsize=(12, 8), dpi=300)
+        config = config or PlotConfig(figure_size=(12, 8))
+        fig, ax = plt.subplots(figsize=config.figure_size, dpi=config.dpi)
 
         def _create_bar_data(col: str, offset: float, color: str) -> None:
             """Create bar data."""
             positions = np.arange(len(genre_stats.index)) + offset
-            heights = genre_stats[(col, 'mean')].values  # takes the mean values
-            errors = genre_stats[(col, 'std')].values / 2  # shows error both sides
+            heights = genre_stats[(col, "mean")].values  # takes the mean values
+            errors = genre_stats[(col, "std")].values / 2  # shows error both sides
 
             ax.bar(positions, heights, 0.35, yerr=errors, color=color)
 
-        list(map(
-            lambda params: _create_bar_data(*params),  # unpacks the tuple
-            # list of tuples as args for the lambda
-            [
-                ('tomatometer_rating', -0.2, 'lightblue'),
-                ('audience_rating', 0.2, 'orange')
-            ]
-        ))
+        list(
+            map(
+                lambda params: _create_bar_data(*params),  # unpacks the tuple
+                # list of tuples as args for the lambda
+                [
+                    ("tomatometer_rating", -0.2, "lightblue"),
+                    ("audience_rating", 0.2, "orange"),
+                ],
+            )
+        )
 
         return fig
     except Exception as e:
-        logger.error(f'Failed creating genre bars: {str(e)}')
-        raise VisualizationError(f'Error creating genre bars: {str(e)}')
+        logger.error(f"Failed creating genre bars: {str(e)}")
+        raise VisualizationError(f"Error creating genre bars: {str(e)}")
+
+
+def plot_filename(name: str, file_format: str = "png") -> str:
+    """File name of a plot inside the output directory"""
+    return f"movie_analysis_{name}.{file_format}"
+
+
+def _write_figure(
+    fig: plt.Figure, target: Union[Path, BinaryIO], config: PlotConfig
+) -> None:
+    with plt.rc_context(_STABLE_RC):
+        fig.savefig(
+            target,
+            format=config.file_format,
+            dpi=config.dpi,
+            bbox_inches="tight" if config.tight_bbox else None,
+            metadata=_STABLE_METADATA[config.file_format],
+        )
+    plt.close(fig)  # close the figure to free up memory
 
 
 def save_plot(fig: plt.Figure, name: str, output_dir: Path, config: PlotConfig) -> None:
-    """Save plot."""
+    """Save plot in the config's format, dpi and cropping."""
     try:
-        output_path = output_dir / f'movie_analysis_{name}.png'
-        fig.savefig(output_path, dpi=config.dpi, bbox_inches='tight')
-        plt.close(fig)  # close the figure to free up memory
-        logger.info(f'Plot saved successfully to {output_path}.')
+        output_path = output_dir / plot_filename(name, config.file_format)
+        _write_figure(fig, output_path, config)
+        logger.info(f"Plot saved successfully to {output_path}.")
     except Exception as e:
-        logger.error(f'Failed saving plot: {str(e)}')
-        raise VisualizationError(f'Error saving plot: {str(e)}')
-        
+        logger.error(f"Failed saving plot: {str(e)}")
+        raise VisualizationError(f"Error saving plot: {str(e)}")
+
+
+def plot_bytes(fig: plt.Figure, config: PlotConfig) -> bytes:
+    """The file save_plot would write, in memory (e.g. to answer an HTTP request)."""
+    try:
+        buffer = io.BytesIO()
+        _write_figure(fig, buffer, config)
+        return buffer.getvalue()
+    except Exception as e:
+        logger.error(f"Failed rendering plot: {str(e)}")
+        raise VisualizationError(f"Error rendering plot: {str(e)}")
+
 
 def create_genre_comparison(data: MovieData, config: PlotConfig) -> plt.Figure:
     """Create genre comparison visualization"""
+    return draw_genre_comparison(data.view("genre_aggregates"), config)
+
+
+def draw_genre_comparison(genre_stats: pd.DataFrame, config: PlotConfig) -> plt.Figure:
+    """Draw top 10 genres from a (column, stat) aggregate frame indexed by genre"""
     _setup_plot_style(config)
     fig, ax = plt.subplots(figsize=config.figure_size)
 
-    genre_stats = (data.df.groupby('genre')
-                   .agg({
-        'tomatometer_rating': ['mean', 'count', 'std'],
-        'audience_rating': ['mean', 'count', 'std']
-    })
-                   .pipe(lambda x: x[x[('tomatometer_rating', 'count')] >= 10])
-                   .nlargest(10, ('tomatometer_rating', 'mean')))
+    genre_stats = genre_stats.pipe(
+        lambda x: x[x[("tomatometer_rating", "count")] >= 10]
+    ).nlargest(10, ("tomatometer_rating", "mean"))
 
     x = np.arange(len(genre_stats.index))
 
     def plot_rating_bars(rating_type: str, offset: float, color: str) -> None:
-        col = 'tomatometer_rating' if rating_type == 'Critics' else 'audience_rating'
+        col = "tomatometer_rating" if rating_type == "Critics" else "audience_rating"
         ax.bar(
             x + offset,
-            genre_stats[(col, 'mean')],
+            genre_stats[(col, "mean")],
             0.35,
-            yerr=genre_stats[(col, 'std')] / 2,
+            yerr=genre_stats[(col, "std")] / 2,
             label=rating_type,
-            color=color
+            color=color,
         )
 
-    list(map(
-        lambda params: plot_rating_bars(*params),
-        [('Critics', -0.2, 'lightblue'), ('Audience', 0.2, 'lightgreen')]
-    ))
+    list(
+        map(
+            lambda params: plot_rating_bars(*params),
+            [("Critics", -0.2, "lightblue"), ("Audience", 0.2, "lightgreen")],
+        )
+    )
 
-    ax.set_ylabel('Average Rating (%)')
-    ax.set_title('Top 10 Genres by Rating')
+    ax.set_ylabel("Average Rating (%)")
+    ax.set_title("Top 10 Genres by Rating")
     ax.set_xticks(x)
-    ax.set_xticklabels(genre_stats.index, rotation=45, ha='right')
+    ax.set_xticklabels(genre_stats.index, rotation=45, ha="right")
     ax.legend()
 
     return fig
 
 
 def create_yearly_trends(data: MovieData, config: PlotConfig) -> plt.Figure:
-    """Create yearly trends visualization"""
+    """Create yearly trends visualization, bands are bootstrap CIs of the yearly
+    means"""
+    return draw_yearly_trends(
+        data.view("yearly_aggregates").join(data.view("yearly_rating_ci")), config
+    )
+
+
+def draw_yearly_trends(yearly_stats: pd.DataFrame, config: PlotConfig) -> plt.Figure:
+    """Draw yearly trends from a (column, stat) aggregate frame indexed by release year.
+
+    (column, ci_low / ci_high) columns are drawn as the bands, without them (streaming
+    partials) the bands fall back to the normal approximation mean +- 1.96 * std /
+    sqrt(count).
+    """
     _setup_plot_style(config)
     fig = plt.figure(figsize=config.figure_size)
 
-    yearly_stats = (data.df.groupby('release_year')
-                    .agg({
-        'tomatometer_rating': ['mean', 'std', 'count'],
-        'audience_rating': ['mean', 'std', 'count']
-    }).pipe(lambda x: x[x[('tomatometer_rating', 'count')] >= 5]))
-
+    yearly_stats = yearly_stats.pipe(
+        lambda x: x[x[("tomatometer_rating", "count")] >= 5]
+    )
     years = yearly_stats.index.values
 
     def plot_trend(rating_type: str, color: str, label: str) -> None:
-        mean = yearly_stats[(rating_type, 'mean')].values
-        std = yearly_stats[(rating_type, 'std')].values
-        count = yearly_stats[(rating_type, 'count')].values
-        ci = 1.96 * std / np.sqrt(count)
+        mean = yearly_stats[(rating_type, "mean")].values
+        std = yearly_stats[(rating_type, "std")].values
+        count = yearly_stats[(rating_type, "count")].values
+        if (rating_type, "ci_low") in yearly_stats.columns:
+            low = yearly_stats[(rating_type, "ci_low")].values
+            high = yearly_stats[(rating_type, "ci_high")].values
+        else:
+            ci = 1.96 * std / np.sqrt(count)
+            low, high = mean - ci, mean + ci
 
         plt.plot(years, mean, color=color, label=label, linewidth=2)
-        plt.fill_between(years, mean - ci, mean + ci, color=color, alpha=0.2)
-        plt.scatter(years, mean, color=color, alpha=0.5,
-                    s=count / count.max() * 100)  # Zmniejszony rozmiar punktów
-
-    list(map(
-        lambda params: plot_trend(*params),
-        [('tomatometer_rating', 'blue', 'Critics'),
-         ('audience_rating', 'green', 'Audience')]
-    ))
-
-    plt.xlabel('Year')
-    plt.ylabel('Average Rating (%)')
-    plt.title('Rating Trends Over Time (with 95% CI)')
+        plt.fill_between(years, low, high, color=color, alpha=0.2)
+        plt.scatter(
+            years,
+            mean,
+            color=color,
+            alpha=0.5,
+            s=count / count.max() * 100,  # Zmniejszony rozmiar punktów
+            rasterized=config.rasterize_points,
+        )
+
+    list(
+        map(
+            lambda params: plot_trend(*params),
+            [
+                ("tomatometer_rating", "blue", "Critics"),
+                ("audience_rating", "green", "Audience"),
+            ],
+        )
+    )
+
+    plt.xlabel("Year")
+    plt.ylabel("Average Rating (%)")
+    plt.title("Rating Trends Over Time (with 95% CI)")
     plt.grid(True, alpha=0.3)
     plt.legend()
 
@@ -200,22 +279,32 @@ def create_yearly_trends(data: MovieData, config: PlotConfig) -> plt.Figure:
     plt.margins(x=0.05, y=0.2)
     return fig
 
+
 def create_runtime_analysis(data: MovieData, config: PlotConfig) -> plt.Figure:
     """Create runtime analysis visualization"""
+    valid_data = data.valid_runtime
+    hist_data = runtime_rating_counts(
+        valid_data["runtime_in_minutes"].to_numpy(),
+        valid_data["tomatometer_rating"].to_numpy(),
+    )
+    return draw_runtime_analysis(
+        hist_data, data.view("runtime_rating_sketches"), config
+    )
+
+
+def draw_runtime_analysis(
+    hist_data: np.ndarray, sketches: Dict[str, HistogramSketch], config: PlotConfig
+) -> plt.Figure:
+    """Draw the runtime heatmap and the rating boxplots per runtime range from counts
+    and rating sketches."""
     _setup_plot_style(config)
-    fig = plt.figure(figsize=(15, 10))
+    fig = plt.figure(figsize=config.figure_size)
 
-    valid_data = data.valid_runtime
-    runtime_bins = np.linspace(30, 240, 8)
-    rating_bins = np.linspace(0, 100, 21)
+    runtime_bins = RUNTIME_EDGES
+    rating_bins = RUNTIME_RATING_EDGES
 
     # First subplot - heatmap
     plt.subplot(211)
-    hist_data = np.histogram2d(
-        valid_data['runtime_in_minutes'],
-        valid_data['tomatometer_rating'],
-        bins=(runtime_bins, rating_bins)
-    )[0]
 
     # Create custom normalization for better visualization of distribution
     from matplotlib.colors import LogNorm
@@ -223,29 +312,31 @@ def create_runtime_analysis(data: MovieData, config: PlotConfig) -> plt.Figure:
     # Use logarithmic normalization to better show differences in smaller values
     norm = LogNorm(vmin=1, vmax=np.max(hist_data))
 
-    im = plt.imshow(hist_data.T,
-                    aspect='auto',
-                    origin='lower',
-                    cmap='YlOrRd',  # Yellow-Orange-Red colormap
-                    norm=norm,
-                    extent=[runtime_bins[0], runtime_bins[-1], rating_bins[0], rating_bins[-1]])
+    im = plt.imshow(
+        hist_data.T,
+        aspect="auto",
+        origin="lower",
+        cmap="YlOrRd",  # Yellow-Orange-Red colormap
+        norm=norm,
+        extent=(runtime_bins[0], runtime_bins[-1], rating_bins[0], rating_bins[-1]),
+    )
 
     # Create custom colorbar with more detailed scale
     cbar = plt.colorbar(im)
-    cbar.set_label('Number of Movies', size=10)
+    cbar.set_label("Number of Movies", size=10)
 
     # Set custom tick locations for more detailed scale
     # Generate logarithmically spaced ticks
     tick_locations = np.logspace(0, np.log10(np.max(hist_data)), 10)
-    cbar.set_ticks(tick_locations)
+    cbar.set_ticks(list(tick_locations))
     # Round tick labels to whole numbers
-    cbar.set_ticklabels([f'{int(x)}' for x in tick_locations])
+    cbar.set_ticklabels([f"{int(x)}" for x in tick_locations])
 
-    plt.xlabel('Runtime (minutes)')
-    plt.ylabel('Critics Rating (%)')
-    plt.title('Movie Distribution by Runtime and Critics Rating')
+    plt.xlabel("Runtime (minutes)")
+    plt.ylabel("Critics Rating (%)")
+    plt.title("Movie Distribution by Runtime and Critics Rating")
     plt.yticks(np.linspace(0, 100, 11))
-    plt.xticks(runtime_bins, [f'{int(x)}' for x in runtime_bins], rotation=45)
+    plt.xticks(runtime_bins, [f"{int(x)}" for x in runtime_bins], rotation=45)
 
     # Second subplot - boxplots
     plt.subplot(212)
@@ -254,40 +345,57 @@ def create_runtime_analysis(data: MovieData, config: PlotConfig) -> plt.Figure:
     positions = np.arange(len(runtime_bins) - 1)
     width = 0.35
 
-    # Group data by runtime ranges
-    runtime_groups = valid_data.groupby(pd.cut(valid_data['runtime_in_minutes'], runtime_bins))
-
-    # Critics ratings boxplot
-    bp1 = plt.boxplot([group['tomatometer_rating'].values for name, group in runtime_groups],
-                      positions=positions - width / 2,
-                      widths=width,
-                      patch_artist=True,
-                      boxprops=dict(facecolor='skyblue', color='blue'),
-                      medianprops=dict(color='darkblue'),
-                      flierprops=dict(marker='o', markerfacecolor='skyblue'),
-                      labels=[''] * (len(runtime_bins) - 1))
+    # Box statistics per runtime range come from the rating sketches -> bxp never sees
+    # the raw ratings
+    labels = [""] * (len(runtime_bins) - 1)
+
+    # Critics ratings boxplot (boxplot turned color into the edge color, bxp needs it
+    # spelled out)
+    bp1 = plt.gca().bxp(
+        boxplot_stats(sketches["tomatometer_rating"], labels=labels),
+        positions=positions - width / 2,
+        widths=width,
+        patch_artist=True,
+        boxprops=dict(facecolor="skyblue", edgecolor="blue"),
+        medianprops=dict(color="darkblue"),
+        flierprops=dict(
+            marker="o", markerfacecolor="skyblue", rasterized=config.rasterize_points
+        ),
+    )
 
     # Audience ratings boxplot
-    bp2 = plt.boxplot([group['audience_rating'].values for name, group in runtime_groups],
-                      positions=positions + width / 2,
-                      widths=width,
-                      patch_artist=True,
-                      boxprops=dict(facecolor='orange', color='darkgoldenrod'),
-                      medianprops=dict(color='darkorange'),
-                      flierprops=dict(marker='o', markerfacecolor='orange'),
-                      labels=[''] * (len(runtime_bins) - 1))
+    bp2 = plt.gca().bxp(
+        boxplot_stats(sketches["audience_rating"], labels=labels),
+        positions=positions + width / 2,
+        widths=width,
+        patch_artist=True,
+        boxprops=dict(facecolor="orange", edgecolor="darkgoldenrod"),
+        medianprops=dict(color="darkorange"),
+        flierprops=dict(
+            marker="o", markerfacecolor="orange", rasterized=config.rasterize_points
+        ),
+    )
 
     # Set x-ticks in the middle of the paired boxes
-    plt.xticks(positions, [f'({int(runtime_bins[i])}, {int(runtime_bins[i + 1])}]'
-                           for i in range(len(runtime_bins) - 1)], rotation=45)
+    plt.xticks(
+        positions,
+        [
+            f"({int(runtime_bins[i])}, {int(runtime_bins[i + 1])}]"
+            for i in range(len(runtime_bins) - 1)
+        ],
+        rotation=45,
+    )
 
     # Add legend
-    plt.legend([bp1["boxes"][0], bp2["boxes"][0]], ['Critics Rating', 'Audience Rating'],
-               loc='upper right')
-
-    plt.xlabel('Runtime Range (minutes)')
-    plt.ylabel('Rating (%)')
-    plt.title('Ratings Distribution by Runtime Range')
+    plt.legend(
+        [bp1["boxes"][0], bp2["boxes"][0]],
+        ["Critics Rating", "Audience Rating"],
+        loc="upper right",
+    )
+
+    plt.xlabel("Runtime Range (minutes)")
+    plt.ylabel("Rating (%)")
+    plt.title("Ratings Distribution by Runtime Range")
     plt.grid(True, alpha=0.3)
 
     # Adjust layout
@@ -1,95 +1,525 @@
 # src/main.py
-from pathlib import Path
-from typing import List, Callable, Tuple
-from functools import partial
+import argparse
+import sys
 import warnings
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, List, Optional, Sequence, Tuple
 
-from matplotlib.figure import Figure
-
-from src.utils import MovieData, PlotConfig
-from utils.types import MovieData, PlotConfig
-from utils.logger import setup_logger
-from utils.config import ProjectConfig
-from data_analysis.data_processing import read_movie_data
-from data_analysis.data_insights import generate_key_insights
-from data_analysis.visualization import (
-    create_heatmap,
-    create_genre_comparison,
-    create_yearly_trends,
-    create_runtime_analysis,
-    save_plot
+from src.data_analysis.partitioned_store import (
+    DEFAULT_PARTITION_BY,
+    NO_FILTER,
+    PARTITION_KEYS,
+    PartitionFilter,
+    convert_csv,
+    filter_movie_data,
+    read_partitioned,
 )
+from src.data_analysis.reporting import REPORT_FORMATS
+from src.utils.config import ProjectConfig
+from src.utils.logger import LOG_FORMATS, set_log_format, setup_logger
+from src.utils.profiling import disable_profiling, enable_profiling
+from src.utils.types import RENDER_PROFILES, MovieData, PlotConfig, render_profile
+from src.utils.validation import configure_validation, load_rules
+
+# annotations only, matplotlib is imported by the commands that draw something
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+    from src.data_analysis.render_cache import RenderCache
+    from src.data_analysis.streaming import PartialResults
 
 warnings.filterwarnings("ignore")
 
-ProjectConfig.setup()
 logger = setup_logger(__name__, ProjectConfig.get_log_file("main"))
 
-PlotFunction = Tuple[str, Callable[[MovieData, PlotConfig], None]]
+PlotFunction = Tuple[str, Callable[[MovieData, PlotConfig], "Figure"]]
+
+# insights -> insights report only, plots -> png files only,
+# all -> both (default without a command),
+# partition -> write the processed data as a partitioned store for filtered runs
+#              (--store),
+# mmap -> write the processed data as .npy columns for memory-mapped runs (--mmap),
+# serve -> keep the data loaded and answer insight / plot requests over HTTP
+COMMANDS = ("insights", "plots", "all", "partition", "mmap", "serve")
 
 
-def _create_plot_functions(config: PlotConfig) -> list[
-    tuple[str, Callable[[MovieData, PlotConfig], Figure]] | tuple[str, Callable[[MovieData, PlotConfig], Figure]] |
-    tuple[str, Callable[[MovieData, PlotConfig], Figure]] | tuple[str, Callable[[MovieData, PlotConfig], Figure]]]:
+def _create_plot_functions(config: PlotConfig) -> List[PlotFunction]:
     """Create list of plot generation functions with config"""
+    from src.data_analysis.visualization import (
+        create_genre_comparison,
+        create_heatmap,
+        create_runtime_analysis,
+        create_yearly_trends,
+    )
+
     return [
         ("heatmap", create_heatmap),
         ("genres", create_genre_comparison),
         ("trends", create_yearly_trends),
-        ("runtime", create_runtime_analysis)
+        ("runtime", create_runtime_analysis),
     ]
 
 
 def process_and_visualize(
-        data_path: Path,
-        output_dir: Path,
-        config: PlotConfig
+    data_path: Path,
+    output_dir: Path,
+    config: PlotConfig,
+    chunk_size: Optional[int] = None,
+    workers: int = 1,
+    incremental: bool = False,
+    insights: bool = True,
+    plots: bool = True,
+    report_formats: Sequence[str] = ("md",),
+    store: Optional[Path] = None,
+    filters: Optional[PartitionFilter] = None,
+    force: bool = False,
+    mmap: Optional[Path] = None,
 ) -> None:
-    """Main processing pipeline"""
+    """Main processing pipeline
+
+    chunk_size switches to the bounded-memory streaming mode,
+    incremental folds only rows appended since the last run into the saved statistics,
+    workers > 1 renders the plots in a process pool (workers=1 -> serial),
+    insights / plots pick the outputs, the plotting modules are only imported with
+    plots=True,
+    report_formats are the formats the insights are written in (md, csv, json, html),
+    store reads a partitioned store instead of the CSV, filters restrict the rows (only
+    matching partitions are read),
+    mmap opens a memory-mapped store instead, with only the columns the selected outputs
+    read,
+    outputs whose inputs did not change since the last run are skipped unless force is
+    set (see render_cache).
+    """
     try:
+        from src.data_analysis.render_cache import RenderCache
+
         # Ensure output directory exists
         output_dir.mkdir(parents=True, exist_ok=True)
+        cache = RenderCache(output_dir, force=force)
+
+        if incremental:
+            from src.data_analysis.data_processing import DEFAULT_CHUNK_SIZE
+            from src.data_analysis.incremental import update_incremental_state
+
+            logger.info("Updating incremental statistics...")
+            _visualize_partials(
+                update_incremental_state(
+                    data_path, chunk_size=chunk_size or DEFAULT_CHUNK_SIZE
+                ),
+                output_dir,
+                config,
+                insights,
+                plots,
+                report_formats,
+                cache,
+            )
+            return
+
+        if chunk_size is not None:
+            from src.data_analysis.data_processing import stream_movie_data
+            from src.data_analysis.streaming import collect_partial_results
+
+            logger.info(f"Streaming data in chunks of {chunk_size} rows...")
+            _visualize_partials(
+                collect_partial_results(stream_movie_data(data_path, chunk_size)),
+                output_dir,
+                config,
+                insights,
+                plots,
+                report_formats,
+                cache,
+            )
+            return
 
         # Read and process data
-        logger.info("Reading and processing data...")
-        movie_data = read_movie_data(data_path)
+        movie_data = _read_data(
+            data_path, store, filters, mmap, _needed_columns(insights, plots, filters)
+        )
 
-        # Generate insights
-        logger.info("Generating insights...")
-        _ = generate_key_insights(movie_data, ProjectConfig.PLOTS_DIR)  # print insights
+        if insights:
+            from src.data_analysis.data_insights import generate_key_insights
 
-        # Generate and save plots
-        logger.info("Generating visualizations...")
-        plot_functions = _create_plot_functions(config)
+            logger.info("Generating insights...")
+            # print insights
+            _ = generate_key_insights(movie_data, output_dir, report_formats, cache)
+
+        if plots:
+            from src.data_analysis.parallel_rendering import render_plots_parallel
 
-        for plot_name, plot_func in plot_functions:
-            try:
-                fig = plot_func(movie_data, config)
-                save_plot(fig, plot_name, output_dir, config)
-                logger.info(f"Generated {plot_name} plot")
-            except Exception as e:
-                logger.error(f"Failed to generate {plot_name}: {str(e)}")
+            logger.info("Generating visualizations...")
+            render_plots_parallel(
+                _create_plot_functions(config),
+                movie_data,
+                output_dir,
+                config,
+                workers,
+                cache,
+            )
 
-        logger.info("Visualization complete!")
+        logger.info("Done!")
 
     except Exception as e:
         logger.error(f"Processing failed: {str(e)}")
         raise
 
 
-def main():
+def _needed_columns(
+    insights: bool, plots: bool, filters: Optional[PartitionFilter]
+) -> List[str]:
+    """Columns read by the selected outputs (and the filters)"""
+    from src.data_analysis.render_cache import INSIGHT_COLUMNS, PLOT_COLUMNS
+
+    columns = ["release_year", "genre"] if filters is not None else []
+    if insights:
+        columns += INSIGHT_COLUMNS
+    if plots:
+        columns += PLOT_COLUMNS
+    return list(dict.fromkeys(columns))
+
+
+def _read_data(
+    data_path: Path,
+    store: Optional[Path],
+    filters: Optional[PartitionFilter],
+    mmap: Optional[Path] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> MovieData:
+    """Processed data from the partitioned store (only partitions matching the filters),
+    the memory-mapped store (only the given columns) or the CSV"""
+    if store is not None:
+        logger.info(f"Reading partitioned store {store}...")
+        return read_partitioned(store, filters or NO_FILTER)
+
+    if mmap is not None:
+        from src.data_analysis.mmap_store import open_mmap_store
+
+        logger.info(f"Opening memory-mapped store {mmap}...")
+        movie_data = open_mmap_store(mmap, columns)
+        return movie_data if filters is None else filter_movie_data(movie_data, filters)
+
+    from src.data_analysis.data_processing import read_movie_data
+
+    logger.info("Reading and processing data...")
+    movie_data = read_movie_data(data_path)
+    return movie_data if filters is None else filter_movie_data(movie_data, filters)
+
+
+def _visualize_partials(
+    partials: "PartialResults",
+    output_dir: Path,
+    config: PlotConfig,
+    insights: bool = True,
+    plots: bool = True,
+    report_formats: Sequence[str] = ("md",),
+    cache: Optional["RenderCache"] = None,
+) -> None:
+    """Same outputs from mergeable partial results, the full frame is never in memory"""
+    if insights:
+        from src.data_analysis.streaming import generate_key_insights_from_partials
+
+        logger.info("Generating insights...")
+        _ = generate_key_insights_from_partials(
+            partials, output_dir, report_formats, cache
+        )
+
+    if plots:
+        from src.data_analysis.parallel_rendering import render_plots_serial
+        from src.data_analysis.streaming import create_plot_functions_from_partials
+
+        logger.info("Generating visualizations...")
+        render_plots_serial(
+            create_plot_functions_from_partials(), partials, output_dir, config, cache
+        )
+
+    logger.info("Done!")
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Command line options, a missing command means 'all' so older invocations keep
+    working"""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "--data",
+        type=Path,
+        default=ProjectConfig.DATA_DIR / "Rotten Tomatoes Movies.csv",
+        help="input CSV (default: data/Rotten Tomatoes Movies.csv)",
+    )
+    common.add_argument(
+        "--output",
+        type=Path,
+        default=ProjectConfig.PLOTS_DIR,
+        help="where the insights markdown and the plots are written (default: plots/)",
+    )
+    common.add_argument(
+        "--report-format",
+        nargs="+",
+        choices=REPORT_FORMATS,
+        default=["md"],
+        help="formats of the insights report, e.g. --report-format md html (default: "
+        "md)",
+    )
+    common.add_argument(
+        "--render-profile",
+        choices=list(RENDER_PROFILES),
+        default="final",
+        help="final: 300 dpi PNGs (default), preview: quick low-resolution PNGs for "
+        "dashboards, "
+        "vector: SVGs with rasterized point clouds",
+    )
+    common.add_argument(
+        "--force",
+        action="store_true",
+        help="redraw every plot and rewrite the report even if their inputs did not "
+        "change",
+    )
+    common.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="processes used to render plots, 1 renders serially (default: 1)",
+    )
+    common.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help="stream the CSV in chunks of this many rows (bounded memory)",
+    )
+    common.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only fold rows appended since the last run into the saved statistics",
+    )
+    common.add_argument(
+        "--log-format",
+        choices=LOG_FORMATS,
+        default="text",
+        help="log files as plain text (logs/*.log) or JSON lines (logs/*.jsonl)",
+    )
+    common.add_argument(
+        "--rules",
+        type=Path,
+        default=None,
+        metavar="RULES.json",
+        help="validation rules to use instead of validation_rules.json",
+    )
+    common.add_argument(
+        "--rejects",
+        type=Path,
+        default=None,
+        metavar="REJECTS.csv",
+        help="write the rows rejected by validation (and the rules they failed) to "
+        "this CSV",
+    )
+    common.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        metavar="DIR",
+        help="processed-data cache and incremental state (default: data/.cache)",
+    )
+    common.add_argument(
+        "--store",
+        type=Path,
+        default=None,
+        metavar="DIR",
+        help="read a partitioned store (see the partition command) instead of the CSV",
+    )
+    common.add_argument(
+        "--mmap",
+        type=Path,
+        default=None,
+        metavar="DIR",
+        help="open a memory-mapped store (see the mmap command) instead of the CSV",
+    )
+    common.add_argument(
+        "--years",
+        type=int,
+        nargs=2,
+        default=None,
+        metavar=("FROM", "TO"),
+        help="only movies released in these years (inclusive)",
+    )
+    common.add_argument(
+        "--genres",
+        nargs="+",
+        default=None,
+        metavar="GENRE",
+        help="only movies listing at least one of these genres",
+    )
+    common.add_argument(
+        "--profile",
+        type=Path,
+        default=None,
+        metavar="REPORT.json",
+        help="time every ingest/processing/insight/plot step and write a JSON report",
+    )
+    common.add_argument(
+        "--profile-cprofile",
+        type=Path,
+        default=None,
+        metavar="DIR",
+        help="with --profile, also dump a cProfile .prof file per step into DIR",
+    )
+    common.add_argument(
+        "--profile-no-memory",
+        action="store_true",
+        help="with --profile, skip tracemalloc (lower overhead, no per-step memory "
+        "numbers)",
+    )
+
+    parser = argparse.ArgumentParser(
+        description="Movie data analysis and visualization"
+    )
+    commands = parser.add_subparsers(
+        dest="command", metavar="{insights,plots,all,partition,mmap,serve}"
+    )
+    commands.add_parser(
+        "insights",
+        parents=[common],
+        help="markdown insights only, matplotlib/seaborn are never imported",
+    )
+    commands.add_parser("plots", parents=[common], help="plots only")
+    commands.add_parser("all", parents=[common], help="insights and plots (default)")
+    partition = commands.add_parser(
+        "partition",
+        parents=[common],
+        help="write the processed data as a partitioned store (default: "
+        "data/partitioned)",
+    )
+    partition.add_argument(
+        "--partition-by",
+        nargs="+",
+        choices=PARTITION_KEYS,
+        default=list(DEFAULT_PARTITION_BY),
+        help="partition keys in directory order (default: decade)",
+    )
+    commands.add_parser(
+        "mmap",
+        parents=[common],
+        help="write the processed data as memory-mappable .npy columns (default: "
+        "data/mmap)",
+    )
+    serve = commands.add_parser(
+        "serve",
+        parents=[common],
+        help="load the data once and serve insights (JSON) and plots over HTTP",
+    )
+    serve.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="interface to listen on (default: 127.0.0.1)",
+    )
+    serve.add_argument(
+        "--port", type=int, default=8050, help="port to listen on (default: 8050)"
+    )
+    serve.add_argument(
+        "--plot-workers",
+        type=int,
+        default=1,
+        help="processes rendering plots, 0 renders in a thread of the server (default: "
+        "1)",
+    )
+    serve.add_argument(
+        "--response-cache",
+        type=int,
+        default=256,
+        metavar="N",
+        help="recent responses kept in memory (default: 256)",
+    )
+
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ("-h", "--help")):
+        argv.insert(0, "all")
+    args = parser.parse_args(argv)
+    if (args.store or args.mmap or args.years or args.genres) and (
+        args.chunk_size is not None or args.incremental
+    ):
+        parser.error(
+            "--store/--mmap/--years/--genres need the in-memory mode, drop "
+            "--chunk-size/--incremental"
+        )
+    if args.command == "serve" and (args.chunk_size is not None or args.incremental):
+        parser.error(
+            "serve keeps the whole frame in memory, drop --chunk-size/--incremental"
+        )
+    if args.store and args.mmap:
+        parser.error("--store and --mmap are alternatives, pick one")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
     """Entry point"""
-    config = PlotConfig()
-    # Tried to use relative paths, but it didn't work, just add the full path of both on your machine
-    # data_path = Path(r'C:\Users\szyme\PycharmProjects\FunctionProgrammingLab\data\Rotten Tomatoes Movies.csv')
+    args = _parse_args(argv)
+    ProjectConfig.setup()
+    if args.cache_dir is not None:
+        ProjectConfig.CACHE_DIR = args.cache_dir
+    set_log_format(args.log_format)
+    configure_validation(
+        load_rules(args.rules) if args.rules else None, rejects_path=args.rejects
+    )
+    config = render_profile(args.render_profile)
+    # Tried to use relative paths, but it didn't work, just add the full path of both on
+    # your machine
+    # data_path = Path(r'C:\Users\szyme\PycharmProjects\FunctionProgrammingLab\data\Rotten Tomatoes Movies.csv')  # noqa: E501
     # output_dir = Path(r'C:\Users\szyme\PycharmProjects\FunctionProgrammingLab\plots')
     #
     # process_and_visualize(data_path, output_dir, config)
 
-    data_path = ProjectConfig.DATA_DIR / "Rotten Tomatoes Movies.csv"
-    output_dir = ProjectConfig.PLOTS_DIR
+    if args.profile is not None:
+        enable_profiling(
+            trace_memory=not args.profile_no_memory, cprofile_dir=args.profile_cprofile
+        )
+    try:
+        if args.command == "partition":
+            convert_csv(
+                args.data,
+                args.store or ProjectConfig.PARTITIONED_DIR,
+                args.partition_by,
+            )
+            return
+        if args.command == "mmap":
+            from src.data_analysis import mmap_store
+
+            mmap_store.convert_csv(args.data, args.mmap or ProjectConfig.MMAP_DIR)
+            return
+
+        filters = None
+        if args.years or args.genres:
+            filters = PartitionFilter(
+                years=tuple(args.years) if args.years else None,
+                genres=tuple(args.genres or ()),
+            )
+        if args.command == "serve":
+            from src.data_analysis.server import run_server
 
-    process_and_visualize(data_path, output_dir, config)
+            run_server(
+                _read_data(args.data, args.store, filters, args.mmap),
+                config,
+                args.host,
+                args.port,
+                plot_workers=args.plot_workers,
+                cache_size=args.response_cache,
+            )
+            return
+        process_and_visualize(
+            args.data,
+            args.output,
+            config,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            incremental=args.incremental,
+            insights=args.command in ("insights", "all"),
+            plots=args.command in ("plots", "all"),
+            report_formats=args.report_format,
+            store=args.store,
+            filters=filters,
+            force=args.force,
+            mmap=args.mmap,
+        )
+    finally:
+        profiler = disable_profiling()
+        if profiler is not None:
+            profiler.write_report(args.profile)
 
 
 if __name__ == "__main__":
@@ -1,19 +1,13 @@
 # src/utils/__init__.py
 from .logger import setup_logger
-
-from .types import (
-    Rating,
-    Year,
-    MovieCount,
-    MovieData,
-    PlotConfig
-)
+from .types import MovieCount, MovieData, PlotConfig, Rating, Year, register_view
 
 __all__ = [
-    'setup_logger',
-    'Rating',
-    'Year',
-    'MovieCount',
-    'MovieData',
-    'PlotConfig',
+    "setup_logger",
+    "Rating",
+    "Year",
+    "MovieCount",
+    "MovieData",
+    "PlotConfig",
+    "register_view",
 ]
@@ -1,14 +1,23 @@
 from pathlib import Path
 
+
 class ProjectConfig:
     """Configuration for the project."""
-    PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent # ;) 3 levels up
+
+    PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent  # ;) 3 levels up
     LOGS_DIR = PROJECT_ROOT / "logs"
     DATA_DIR = PROJECT_ROOT / "data"
     PLOTS_DIR = PROJECT_ROOT / "plots"
+    CACHE_DIR = DATA_DIR / ".cache"  # processed data cache, safe to delete
+    # row validation bounds, see utils.validation
+    VALIDATION_RULES = PROJECT_ROOT / "validation_rules.json"
+    # default location of the partitioned store (main.py partition)
+    PARTITIONED_DIR = DATA_DIR / "partitioned"
+    # default location of the memory-mapped store (main.py mmap)
+    MMAP_DIR = DATA_DIR / "mmap"
 
     @classmethod
-    def setup(cls):
+    def setup(cls) -> None:
         """Create necessary directories."""
         for directory in [cls.DATA_DIR, cls.PLOTS_DIR]:
             directory.mkdir(exist_ok=True)
@@ -18,6 +27,6 @@ class ProjectConfig:
 
     @classmethod
     def get_log_file(cls, name: str) -> str:
-        """Return a path to a log file with the specified name."""
-        cls.LOGS_DIR.mkdir(exist_ok=True)
-        return str(cls.LOGS_DIR / f"{name}.log")
\ No newline at end of file
+        """Return a path to a log file with the specified name (the dir is created on
+        the first write)."""
+        return str(cls.LOGS_DIR / f"{name}.log")
@@ -1,10 +1,27 @@
+import atexit
+import copy
+import json
 import logging
-from logging.handlers import RotatingFileHandler
-from typing import Optional
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+from io import TextIOWrapper
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+LOG_FORMATS = ("text", "jsonl")
+
+# At most HOT_PATH_BURST info/debug records per call site and second, the rest is
+# counted and dropped
+HOT_PATH_BURST = 20
+HOT_PATH_INTERVAL = 1.0
 
 
 class CustomFormatter(logging.Formatter):
     """Własny formatter z różnymi kolorami ANSI dla różnych części logu"""
+
     # Kolory ANSI
     grey = "\x1b[38;20m"
     cyan = "\x1b[36m"
@@ -14,27 +31,30 @@ class CustomFormatter(logging.Formatter):
     green = "\x1b[32m"
     reset = "\x1b[0m"
 
-    def __init__(self, fmt: Optional[str] = None):
+    def __init__(self, fmt: Optional[str] = None) -> None:
         super().__init__()
-        self.fmt = fmt or '%(asctime)s - %(levelname)s - %(name)s - [%(filename)s:%(lineno)d] - %(message)s'
-
-    def format(self, record):
-        # Zachowaj oryginalny format
-        format_orig = self._style._fmt
+        self.fmt = (
+            fmt
+            or "%(asctime)s - %(levelname)s - %(name)s - "
+            "[%(filename)s:%(lineno)d] - %(message)s"
+        )
 
+    def format(self, record: logging.LogRecord) -> str:
         # Dodaj kolory do różnych części komunikatu
-        timestamp = self.grey + record.asctime + self.reset
+        timestamp = self.grey + self.formatTime(record) + self.reset
         level = self.get_level_color(record.levelno) + record.levelname + self.reset
         name = self.yellow + record.name + self.reset
         location = self.cyan + f"[{record.filename}:{record.lineno}]" + self.reset
-        message = self.green + record.message + self.reset
+        message = self.green + record.getMessage() + self.reset
 
         # Złóż komunikat
         formatted = f"[{timestamp}] - {level} - {name} - {location} - {message}"
+        if record.exc_text:
+            formatted += "\n" + record.exc_text
 
         return formatted
 
-    def get_level_color(self, levelno):
+    def get_level_color(self, levelno: int) -> str:
         if levelno >= logging.CRITICAL:
             return self.bold_red
         elif levelno >= logging.ERROR:
@@ -46,35 +66,263 @@ class CustomFormatter(logging.Formatter):
         return self.grey
 
 
-def setup_logger(name: str, log_file: str, level: int = logging.INFO) -> logging.Logger:
-    """Return a logger with the specified name and level."""
-    # Format dla pliku (bez kolorów)
-    file_formatter = logging.Formatter(
-        '[%(asctime)s] - %(levelname)s - %(name)s - [%(filename)s:%(lineno)d] - %(message)s'
-    )
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers and jq."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "file": record.filename,
+            "line": record.lineno,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class LazyRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that opens its file (and creates the logs dir) only when the
+    first record is written.
+
+    Every module sets up its logger at import, so without this a plain import already
+    touched the disk.
+    """
+
+    def __init__(self, filename: str, **kwargs: Any) -> None:
+        super().__init__(filename, delay=True, **kwargs)
+
+    def _open(self) -> TextIOWrapper:
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
+class RateLimitFilter(logging.Filter):
+    """Sampling for messages logged from tight loops.
+
+    Lets through at most `burst` records per call site (file + line) and `interval`
+    seconds. The first record of the next window says how many were dropped. Warnings
+    and errors always pass.
+    """
+
+    def __init__(
+        self, burst: int = HOT_PATH_BURST, interval: float = HOT_PATH_INTERVAL
+    ) -> None:
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        # call site -> [window start, passed, dropped]
+        self._windows: Dict[Tuple[str, int], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+
+        with self._lock:
+            window = self._windows.setdefault(
+                (record.pathname, record.lineno), [record.created, 0, 0]
+            )
+            if record.created - window[0] >= self.interval:
+                dropped = int(window[2])
+                window[:] = [record.created, 0, 0]
+                if dropped:
+                    record.msg = f"{record.msg} [{dropped} similar messages suppressed]"
+            if window[1] >= self.burst:
+                window[2] += 1
+                return False
+            window[1] += 1
+            return True
+
+
+_PLAIN_FORMATTER = logging.Formatter()
+
+
+class _LogFileQueueHandler(QueueHandler):
+    """Tags the record with the module's log file, the listener thread does the actual
+    writing."""
+
+    def __init__(self, log_queue: "_LogQueue", log_file: str) -> None:
+        super().__init__(log_queue)
+        self.log_file = log_file
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # message and traceback rendered here (args/exc_info may not pickle), the
+        # traceback stays in exc_text so JSON lines keep it in its own field
+        exc_text = record.exc_text
+        if record.exc_info and not exc_text:
+            exc_text = _PLAIN_FORMATTER.formatException(record.exc_info)
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args, record.exc_info, record.exc_text = None, None, exc_text
+        record.log_file = self.log_file  # type: ignore[attr-defined]
+        return record
+
+
+class _LogFileRouter(logging.Handler):
+    """Runs on the listener thread: one rotating file per module log file plus the
+    shared console."""
+
+    def __init__(self, file_format: str = "text") -> None:
+        super().__init__()
+        self.file_format = file_format
+        self.files: Dict[str, RotatingFileHandler] = {}
+        self.console = logging.StreamHandler()
+        self.console.setFormatter(CustomFormatter())
+
+    def _file_handler(self, log_file: str) -> RotatingFileHandler:
+        handler = self.files.get(log_file)
+        if handler is None:
+            # Format dla pliku (bez kolorów), jsonl -> osobny plik *.jsonl zeby nie
+            # mieszac formatow
+            path = (
+                Path(log_file).with_suffix(".jsonl")
+                if self.file_format == "jsonl"
+                else Path(log_file)
+            )
+            handler = LazyRotatingFileHandler(
+                str(path), maxBytes=5 * 1024 * 1024, backupCount=2
+            )
+            handler.setFormatter(
+                JsonLinesFormatter()
+                if self.file_format == "jsonl"
+                else logging.Formatter(
+                    "[%(asctime)s] - %(levelname)s - %(name)s - "
+                    "[%(filename)s:%(lineno)d] - %(message)s"
+                )
+            )
+            self.files[log_file] = handler
+        return handler
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self._file_handler(record.log_file).handle(record)  # type: ignore[attr-defined]
+        self.console.handle(record)
+
+    def close(self) -> None:
+        for handler in self.files.values():
+            handler.close()
+        self.files = {}
+        super().close()
+
+
+class _SynchronousQueue:
+    """Stands in for the queue in worker processes, see log_synchronously."""
+
+    def __init__(self, router: _LogFileRouter) -> None:
+        self.router = router
+
+    def put_nowait(self, record: logging.LogRecord) -> None:
+        self.router.handle(record)
+
+    def get(self) -> logging.LogRecord:
+        # records are written by put_nowait, nothing is ever waiting here
+        raise queue.Empty
+
+
+_LogQueue = Union["queue.SimpleQueue[logging.LogRecord]", _SynchronousQueue]
+
+_queue: _LogQueue = queue.SimpleQueue()
+_router = _LogFileRouter()
+_listener: Optional[QueueListener] = None
+# process that started _listener, a forked child inherits the object but not the thread
+_listener_pid: Optional[int] = None
+_queue_handlers: List[_LogFileQueueHandler] = []
+_state_lock = threading.Lock()
+
 
-    # Utwórz handler pliku
-    handler = RotatingFileHandler(log_file, maxBytes=5 * 1024 * 1024, backupCount=2)
-    handler.setFormatter(file_formatter)
+def _ensure_listener() -> None:
+    global _listener, _listener_pid
+    with _state_lock:
+        if _listener is None and not isinstance(_queue, _SynchronousQueue):
+            _listener = QueueListener(_queue, _router)
+            _listener.start()
+            _listener_pid = os.getpid()
 
-    # Utwórz handler konsoli z kolorami
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(CustomFormatter())
+
+def stop_logging() -> None:
+    """Write everything still queued and stop the background thread (runs at exit)."""
+    global _listener
+    with _state_lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+    _router.close()
+
+
+def set_log_format(file_format: str) -> None:
+    """Switch every log file between plain text (*.log) and JSON lines (*.jsonl)."""
+    if file_format not in LOG_FORMATS:
+        raise ValueError(
+            f"Unknown log format {file_format!r}, expected one of {LOG_FORMATS}"
+        )
+    stop_logging()  # drain the queue in the old format first
+    _router.file_format = file_format
+    if _queue_handlers:
+        _ensure_listener()
+
+
+def log_synchronously() -> None:
+    """Write records in the calling thread from now on.
+
+    For worker processes: a forked child has no listener thread (and its locks may be
+    held), and a spawned one exits through os._exit, so anything still queued at exit
+    would be lost.
+    """
+    global _queue, _router, _listener, _state_lock
+    listener, _listener = _listener, None
+    if listener is not None and _listener_pid == os.getpid():
+        # spawned worker -> write what is already queued (a forked child's copy has no
+        # thread to stop)
+        listener.stop()
+
+    _state_lock = threading.Lock()
+    _router = _LogFileRouter(_router.file_format)
+    _queue = _SynchronousQueue(_router)
+    for handler in _queue_handlers:
+        handler.queue = _queue
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=log_synchronously)
+atexit.register(stop_logging)
+
+
+def setup_logger(
+    name: str,
+    log_file: str,
+    level: int = logging.INFO,
+    burst: Optional[int] = HOT_PATH_BURST,
+) -> logging.Logger:
+    """Return a logger with the specified name and level.
+
+    Records only go on a queue in the calling thread, a background listener writes the
+    file and the console. burst limits info/debug records per call site and second (see
+    RateLimitFilter), None logs everything.
+    """
+    handler = _LogFileQueueHandler(_queue, log_file)
+    if burst is not None:
+        handler.addFilter(RateLimitFilter(burst))
 
     # Skonfiguruj logger
     logger = logging.getLogger(name)
     logger.setLevel(level)
 
     # Usuń istniejące handlery
-    logger.handlers = []
-
-    # Dodaj oba handlery
-    logger.addHandler(handler)
-    logger.addHandler(console_handler)
+    for old in logger.handlers:
+        if old in _queue_handlers:
+            _queue_handlers.remove(old)
+    logger.handlers = [handler]
+    _queue_handlers.append(handler)
 
+    _ensure_listener()
     return logger
 
 
 # Ustaw root logger żeby uniknąć duplikowania
 root_logger = logging.getLogger()
-root_logger.handlers = []
\ No newline at end of file
+root_logger.handlers = []
@@ -0,0 +1,207 @@
+import cProfile
+import json
+import re
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .config import ProjectConfig
+from .logger import setup_logger
+
+try:
+    import resource  # not available on Windows -> RSS is simply left out of the report
+except ImportError:
+    resource = None  # type: ignore[assignment]
+
+logger = setup_logger("profiling", ProjectConfig.get_log_file("profiling"))
+
+
+class _NullProbe:
+    """Returned by profiled() when profiling is off -> one shared object, attribute
+    writes are dropped."""
+
+    def __enter__(self) -> "_NullProbe":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        pass
+
+
+_NULL_PROBE = _NullProbe()
+
+
+class StageProbe:
+    """Measurements of one instrumented step, rows_out can be set by the code inside the
+    step."""
+
+    def __init__(self, name: str, rows_in: Optional[int]):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out: Optional[int] = None
+        self.record: Dict[str, Any] = {}
+
+
+class Profiler:
+    """Collects one record per instrumented step and writes them as a single JSON run
+    report."""
+
+    def __init__(self, trace_memory: bool = True, cprofile_dir: Optional[Path] = None):
+        self.trace_memory = trace_memory
+        self.cprofile_dir = cprofile_dir
+        self.records: List[Dict[str, Any]] = []
+        self.started_at = datetime.now(timezone.utc)
+        self._started = time.perf_counter()
+        # running absolute tracemalloc peak of every open step
+        self._peak_stack: List[int] = []
+        self._cprofile_active = False
+
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if cprofile_dir is not None:
+            cprofile_dir.mkdir(parents=True, exist_ok=True)
+
+    @contextmanager
+    def stage(self, name: str, rows_in: Optional[int] = None) -> Iterator[StageProbe]:
+        probe = StageProbe(name, rows_in)
+        profile = self._start_cprofile()
+        traced_before = self._start_memory()
+        cpu_before, wall_before = time.process_time(), time.perf_counter()
+        error: Optional[str] = None
+        try:
+            yield probe
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            wall, cpu = (
+                time.perf_counter() - wall_before,
+                time.process_time() - cpu_before,
+            )
+            probe.record = {
+                "name": name,
+                "wall_seconds": wall,
+                "cpu_seconds": cpu,
+                "rows_in": probe.rows_in,
+                "rows_out": probe.rows_out,
+                **self._stop_memory(traced_before),
+                **self._stop_cprofile(profile, name),
+                "error": error,
+            }
+            self.records.append(probe.record)
+
+    def _start_memory(self) -> Optional[int]:
+        if not self.trace_memory:
+            return None
+        current, peak = tracemalloc.get_traced_memory()
+        if self._peak_stack:
+            # keep the outer step's peak before resetting
+            self._peak_stack[-1] = max(self._peak_stack[-1], peak)
+        tracemalloc.reset_peak()
+        self._peak_stack.append(current)
+        return current
+
+    def _stop_memory(self, traced_before: Optional[int]) -> Dict[str, Any]:
+        memory: Dict[str, Any] = {}
+        if traced_before is not None:
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, self._peak_stack.pop())
+            if self._peak_stack:
+                self._peak_stack[-1] = max(self._peak_stack[-1], peak)
+            memory.update(
+                {
+                    # above what was allocated when the step started
+                    "peak_traced_bytes": peak - traced_before,
+                    # net: allocated by the step and still alive when it finished minus
+                    # what it freed, negative for steps releasing memory
+                    "retained_bytes": current - traced_before,
+                }
+            )
+        if resource is not None:
+            # ru_maxrss is KiB on Linux, bytes on macOS
+            scale = 1 if sys.platform == "darwin" else 1024
+            memory["max_rss_bytes"] = (
+                resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+            )
+        return memory
+
+    def _start_cprofile(self) -> Optional[cProfile.Profile]:
+        # only one cProfile can run at a time -> nested steps are covered by the outer
+        # dump
+        if self.cprofile_dir is None or self._cprofile_active:
+            return None
+        profile = cProfile.Profile()
+        profile.enable()
+        self._cprofile_active = True
+        return profile
+
+    def _stop_cprofile(
+        self, profile: Optional[cProfile.Profile], name: str
+    ) -> Dict[str, Any]:
+        if profile is None or self.cprofile_dir is None:
+            return {}
+        profile.disable()
+        self._cprofile_active = False
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+        dump_path = self.cprofile_dir / f"{len(self.records):03d}_{safe_name}.prof"
+        profile.dump_stats(dump_path)
+        return {"cprofile": str(dump_path)}
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "started_at": self.started_at.isoformat(),
+            "total_wall_seconds": time.perf_counter() - self._started,
+            "trace_memory": self.trace_memory,
+            "stages": self.records,
+        }
+
+    def write_report(self, path: Path) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.report(), indent=2))
+        logger.info(
+            f"Profiling report with {len(self.records)} steps written to {path}."
+        )
+        return path
+
+
+_active_profiler: Optional[Profiler] = None
+
+
+def enable_profiling(
+    trace_memory: bool = True, cprofile_dir: Optional[Path] = None
+) -> Profiler:
+    """Start collecting measurements for every instrumented step in this process."""
+    global _active_profiler
+    _active_profiler = Profiler(trace_memory=trace_memory, cprofile_dir=cprofile_dir)
+    logger.info(
+        f"Profiling enabled (trace_memory={trace_memory}, cprofile_dir={cprofile_dir})."
+    )
+    return _active_profiler
+
+
+def disable_profiling() -> Optional[Profiler]:
+    """Stop profiling and return the profiler that was active (its records stay
+    available)."""
+    global _active_profiler
+    profiler, _active_profiler = _active_profiler, None
+    if profiler is not None and profiler.trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    return profiler
+
+
+def profiled(name: str, rows_in: Optional[int] = None) -> Any:
+    """Context manager around one step, a shared no-op object when profiling is off.
+
+    with profiled('processing/_convert_dates', rows_in=len(df)) as probe:
+        result = _convert_dates(df)
+        probe.rows_out = len(result)
+    """
+    if _active_profiler is None:
+        return _NULL_PROBE
+    return _active_profiler.stage(name, rows_in)
@@ -1,62 +1,174 @@
-from typing import List, Tuple, Dict, Any, Union, NewType
-from dataclasses import dataclass
-import pandas as pd
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, NewType, Optional, Tuple
+
 import numpy as np
-from pathlib import Path
-from .logger import setup_logger
+import pandas as pd
+
 from .config import ProjectConfig
+from .logger import setup_logger
+from .validation import rule_mask, rules_for
 
-logger = setup_logger('utils', ProjectConfig.get_log_file('types'))
+logger = setup_logger("utils", ProjectConfig.get_log_file("types"))
 
 # Alias for common types
-Rating = NewType('Rating', float)
-Year = NewType('Year', int)
-MovieCount = NewType('MovieCount', int)
+Rating = NewType("Rating", float)
+Year = NewType("Year", int)
+MovieCount = NewType("MovieCount", int)
+
+
+ViewFunction = Callable[..., Any]
+
+# name -> function(movie_data, *args) computing a derived view, see MovieData.view
+_VIEW_REGISTRY: Dict[str, ViewFunction] = {}
+
+
+def register_view(name: str) -> Callable[[ViewFunction], ViewFunction]:
+    """Decorator registering a derived view that MovieData computes once and
+    memoizes."""
+
+    def _register(func: ViewFunction) -> ViewFunction:
+        _VIEW_REGISTRY[name] = func
+        return func
+
+    return _register
 
 
 @dataclass(frozen=True)
 class MovieData:
     """Dataclass for movie data. - > immutable!"""  # less error-prone.
+
     df: pd.DataFrame
+    # memoized derived views, the dict itself is mutable so the dataclass can stay
+    # frozen
+    _views: Dict[Tuple[Hashable, ...], Any] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    def view(self, name: str, *args: Hashable) -> Any:
+        """Return a registered derived view, computed on first access and shared
+        afterwards.
+
+        The returned objects are shared between callers -> treat them as read-only.
+        """
+        key = (name, *args)
+        if key not in self._views:
+            if name not in _VIEW_REGISTRY:
+                # imported here -> utils never imports the analysis modules
+                from src.data_analysis.views import load_view
+
+                load_view(name)
+            if name not in _VIEW_REGISTRY:
+                raise KeyError(f"Unknown view: {name}")
+            self._views[key] = _VIEW_REGISTRY[name](self, *args)
+        return self._views[key]
 
     @property
     def valid_ratings(self) -> pd.DataFrame:
         """Return only rows with valid ratings."""
-        filtered_df = self.df[
-            (self.df['tomatometer_rating'].between(0, 100) &
-             self.df['audience_rating'].between(0, 100))
-        ]
-        logger.info(f'Filtered {len(filtered_df)} rows with valid ratings.')
-        return filtered_df
+        return self.view("valid_ratings")
 
     @property
     def valid_runtime(self) -> pd.DataFrame:
         """Return only rows with valid runtime."""
-        filtered_df = self.df[
-            self.df['runtime_in_minutes'].between(0, 280)
-        ]
-        logger.info(f'Filtered {len(filtered_df)} rows with valid runtime.')
-        return filtered_df
+        return self.view("valid_runtime")
+
+
+# Same bounds as the pipeline's validation stage (utils.validation), a frame that went
+# through it passes these in full and the views below hand back the frame itself instead
+# of a filtered copy.
+@register_view("valid_ratings_mask")
+def _valid_ratings_mask(data: MovieData) -> np.ndarray:
+    return rule_mask(data.df, rules_for(["tomatometer_rating", "audience_rating"]))
+
+
+@register_view("valid_runtime_mask")
+def _valid_runtime_mask(data: MovieData) -> np.ndarray:
+    return rule_mask(data.df, rules_for(["runtime_in_minutes"]))
+
+
+def _masked(df: pd.DataFrame, mask: np.ndarray) -> pd.DataFrame:
+    return df if mask.all() else df[mask]
+
+
+@register_view("valid_ratings")
+def _valid_ratings(data: MovieData) -> pd.DataFrame:
+    filtered_df = _masked(data.df, data.view("valid_ratings_mask"))
+    logger.info(f"Filtered {len(filtered_df)} rows with valid ratings.")
+    return filtered_df
+
+
+@register_view("valid_runtime")
+def _valid_runtime(data: MovieData) -> pd.DataFrame:
+    filtered_df = _masked(data.df, data.view("valid_runtime_mask"))
+    logger.info(f"Filtered {len(filtered_df)} rows with valid runtime.")
+    return filtered_df
+
+
+@register_view("decade")
+def _decade_slice(data: MovieData, decade: int) -> pd.DataFrame:
+    """Rows released in the decade starting at the given year, e.g. 1990 -> 1990-1999"""
+    return data.df[(data.df["release_year"] // 10 * 10) == decade]
+
+
+# Formats save_plot can write, the vector ones keep text and lines as paths
+PLOT_FORMATS = ("png", "svg", "pdf")
+
 
 @dataclass(frozen=True)
 class PlotConfig:
     """Dataclass for plot configuration."""
-    figure_size: Tuple[int, int] = (15, 10) # default value
+
+    figure_size: Tuple[int, int] = (15, 10)  # default value
     font_size: int = 10
     title_size: int = 14
     label_size: int = 12
     tick_size: int = 10
     dpi: int = 300
-    style: Dict[str, Any] = None
+    style: Optional[Dict[str, Any]] = None
+    file_format: str = "png"  # one of PLOT_FORMATS
+    # scatter points / boxplot fliers as an image inside vector files
+    rasterize_points: bool = False
+    annotate_heatmap: bool = True  # count in every heatmap cell
+    # crop to the drawn content, False -> every image is exactly figure_size * dpi
+    tight_bbox: bool = True
 
-    def __post_init__(self): # called after __init__
+    def __post_init__(self) -> None:  # called after __init__
+        if self.file_format not in PLOT_FORMATS:
+            raise ValueError(
+                f"Unsupported plot format {self.file_format!r}, expected one of "
+                f"{PLOT_FORMATS}"
+            )
         if self.style is None:
-            object.__setattr__(self, 'style', { # object.__setattr__ set the attribute bc it's frozen
-                'figure.figsize': self.figure_size,
-                'font.size': self.font_size,
-                'axes.titlesize': self.title_size,
-                'axes.labelsize': self.label_size,
-                'xtick.labelsize': self.tick_size,
-                'ytick.labelsize': self.tick_size
-            })
-        logger.debug('Plot configuration initialized.')
+            object.__setattr__(
+                self,
+                "style",
+                {  # object.__setattr__ set the attribute bc it's frozen
+                    "figure.figsize": self.figure_size,
+                    "font.size": self.font_size,
+                    "axes.titlesize": self.title_size,
+                    "axes.labelsize": self.label_size,
+                    "xtick.labelsize": self.tick_size,
+                    "ytick.labelsize": self.tick_size,
+                },
+            )
+        logger.debug("Plot configuration initialized.")
+
+
+# name -> PlotConfig fields differing from the defaults. final is the default config
+# (its output must not change), preview is for dashboards (most of the save time is
+# rasterizing 300 dpi, the crop pass is cheap at 72 dpi and keeps rotated tick labels
+# inside the image), vector writes scalable SVGs
+RENDER_PROFILES: Dict[str, Dict[str, Any]] = {
+    "final": {},
+    "preview": {"dpi": 72, "annotate_heatmap": False},
+    "vector": {"file_format": "svg", "rasterize_points": True},
+}
+
+
+def render_profile(name: str, **overrides: Any) -> PlotConfig:
+    """PlotConfig of a named render profile, overrides win over the profile's values."""
+    if name not in RENDER_PROFILES:
+        raise ValueError(
+            f"Unknown render profile {name!r}, expected one of {tuple(RENDER_PROFILES)}"
+        )
+    return PlotConfig(**{**RENDER_PROFILES[name], **overrides})
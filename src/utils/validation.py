@@ -0,0 +1,274 @@
+import csv
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set
+
+import numpy as np
+import pandas as pd
+
+from .config import ProjectConfig
+from .logger import setup_logger
+
+logger = setup_logger("validation", ProjectConfig.get_log_file("validation"))
+
+# Rows per block of the fused evaluation -> the temporaries are two bool buffers of this
+# size, not full columns
+CHUNK_ROWS = 1 << 16
+
+REJECTED_RULES_COLUMN = "failed_rules"
+
+
+class ValidationError(Exception):
+    """Custom exception for validation errors."""
+
+    pass
+
+
+class ValidationRule(NamedTuple):
+    """column has to lie in [low, high], None -> unbounded on that side. Missing values
+    never pass."""
+
+    name: str
+    column: str
+    low: Optional[float] = None
+    high: Optional[float] = None
+
+
+class ValidationReport(NamedTuple):
+    rows_in: int
+    rows_kept: int
+    # rule name -> rows failing it (a row can fail several rules)
+    failures: Dict[str, int]
+
+
+DEFAULT_RULES: List[ValidationRule] = [
+    ValidationRule("release_year", "release_year", 1900, 2024),
+    ValidationRule("tomatometer_rating", "tomatometer_rating", 0, 100),
+    ValidationRule("audience_rating", "audience_rating", 0, 100),
+    ValidationRule("runtime_in_minutes", "runtime_in_minutes", 0, 280),
+]
+
+_rules: Optional[List[ValidationRule]] = None
+_rejects_path: Optional[Path] = None
+_rejects_started: Set[
+    Path
+] = set()  # sidecars already truncated in this process, later chunks append
+
+
+def parse_rules(spec: Dict) -> List[ValidationRule]:
+    """{"rules": [{"column": "release_year", "min": 1900, "max": 2024}, ...]} -> rules,
+    name defaults to the column"""
+    try:
+        rules = [
+            ValidationRule(
+                name=rule.get("name", rule["column"]),
+                column=rule["column"],
+                low=rule.get("min"),
+                high=rule.get("max"),
+            )
+            for rule in spec["rules"]
+        ]
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValidationError(f"Invalid validation rules: {str(e)}")
+    names = [rule.name for rule in rules]
+    if len(set(names)) != len(names):
+        raise ValidationError(f"Duplicate validation rule names: {names}")
+    return rules
+
+
+def load_rules(path: Path) -> List[ValidationRule]:
+    """Rules from a JSON file, see parse_rules for the layout."""
+    try:
+        spec = json.loads(Path(path).read_text())
+    except Exception as e:
+        raise ValidationError(f"Error reading validation rules {path}: {str(e)}")
+    return parse_rules(spec)
+
+
+def configure_validation(
+    rules: Optional[Sequence[ValidationRule]] = None,
+    rejects_path: Optional[Path] = None,
+) -> None:
+    """Rules used by the pipeline from now on (None -> the rules file or DEFAULT_RULES)
+    and an optional CSV the rejected rows are written to."""
+    global _rules, _rejects_path
+    _rules = None if rules is None else list(rules)
+    _rejects_path = rejects_path
+
+
+def active_rules() -> List[ValidationRule]:
+    """Configured rules, else ProjectConfig.VALIDATION_RULES if that file exists, else
+    DEFAULT_RULES."""
+    global _rules
+    if _rules is None:
+        rules_file = ProjectConfig.VALIDATION_RULES
+        _rules = load_rules(rules_file) if rules_file.exists() else list(DEFAULT_RULES)
+    return _rules
+
+
+def rules_for(
+    columns: Iterable[str], rules: Optional[Sequence[ValidationRule]] = None
+) -> List[ValidationRule]:
+    """The rules checking any of the columns"""
+    columns = set(columns)
+    return [
+        rule
+        for rule in (active_rules() if rules is None else rules)
+        if rule.column in columns
+    ]
+
+
+def rules_fingerprint(rules: Optional[Sequence[ValidationRule]] = None) -> str:
+    """Short hash of the rules, part of every cache key -> tightening a rule invalidates
+    cached results"""
+    rules = active_rules() if rules is None else rules
+    return hashlib.blake2b(
+        json.dumps([list(rule) for rule in rules]).encode(), digest_size=8
+    ).hexdigest()
+
+
+def _column_values(series: pd.Series) -> np.ndarray:
+    # plain numpy columns are used as they are (no copy), nullable ones become float64
+    # with NaN
+    values: np.ndarray
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind in "iuf":
+        values = series.to_numpy()
+    else:
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    return values
+
+
+def _rule_passes(
+    values: np.ndarray, rule: ValidationRule, out: np.ndarray, scratch: np.ndarray
+) -> np.ndarray:
+    """out = low <= values <= high, written into the given buffers. NaN fails every
+    comparison."""
+    if rule.low is not None:
+        np.greater_equal(values, rule.low, out=out)
+    elif values.dtype.kind == "f":
+        np.equal(values, values, out=out)  # only NaN differs from itself
+    else:
+        out.fill(True)
+    if rule.high is not None:
+        out &= np.less_equal(values, rule.high, out=scratch)
+    return out
+
+
+def evaluate_rules(
+    df: pd.DataFrame, rules: Sequence[ValidationRule], chunk_rows: int = CHUNK_ROWS
+) -> tuple[np.ndarray, ValidationReport]:
+    """Row mask of the rows passing every rule plus per-rule failure counts.
+
+    All rules are evaluated block by block into two reusable buffers instead of building
+    one full boolean Series per rule and folding them, so the only full-size array is
+    the result mask.
+    """
+    try:
+        missing = {rule.column for rule in rules} - set(df.columns)
+        if missing:
+            raise ValidationError(
+                f"Columns {sorted(missing)} are missing, rules can not be evaluated"
+            )
+
+        rows = len(df)
+        columns = {rule.column: _column_values(df[rule.column]) for rule in rules}
+        mask = np.ones(rows, dtype=bool)
+        failures = np.zeros(len(rules), dtype=np.int64)
+        passed, scratch = np.empty(min(chunk_rows, rows), dtype=bool), np.empty(
+            min(chunk_rows, rows), dtype=bool
+        )
+
+        for start in range(0, rows, chunk_rows):
+            stop = min(start + chunk_rows, rows)
+            size = stop - start
+            block = mask[start:stop]  # view -> updated in place
+            for position, rule in enumerate(rules):
+                ok = _rule_passes(
+                    columns[rule.column][start:stop],
+                    rule,
+                    passed[:size],
+                    scratch[:size],
+                )
+                failures[position] += size - np.count_nonzero(ok)
+                block &= ok
+
+        report = ValidationReport(
+            rows_in=rows,
+            rows_kept=int(np.count_nonzero(mask)),
+            failures=dict(zip((rule.name for rule in rules), failures.tolist())),
+        )
+        return mask, report
+    except ValidationError:
+        raise
+    except Exception as e:
+        logger.error(f"Error evaluating validation rules: {str(e)}")
+        raise ValidationError(f"Error evaluating validation rules: {str(e)}")
+
+
+def rule_mask(df: pd.DataFrame, rules: Sequence[ValidationRule]) -> np.ndarray:
+    """Just the mask of evaluate_rules"""
+    return evaluate_rules(df, rules)[0]
+
+
+def _failed_rules(rejected: pd.DataFrame, rules: Sequence[ValidationRule]) -> List[str]:
+    # only runs on the rejected rows, usually a small share -> plain per-rule masks are
+    # fine here
+    size = len(rejected)
+    failed = {
+        rule.name: ~_rule_passes(
+            _column_values(rejected[rule.column]),
+            rule,
+            np.empty(size, dtype=bool),
+            np.empty(size, dtype=bool),
+        )
+        for rule in rules
+    }
+    return [
+        ";".join(name for name, fails in failed.items() if fails[row])
+        for row in range(size)
+    ]
+
+
+def write_rejects(
+    rejected: pd.DataFrame, rules: Sequence[ValidationRule], path: Path
+) -> None:
+    """Append the rejected rows, with the rules each one failed, to a CSV sidecar.
+
+    The first write of a process truncates the file, so chunked reads end up with one
+    file per run.
+    """
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        first = path not in _rejects_started
+        rejected.assign(
+            **{REJECTED_RULES_COLUMN: _failed_rules(rejected, rules)}
+        ).to_csv(
+            path,
+            mode="w" if first else "a",
+            header=first,
+            index_label="row",
+            quoting=csv.QUOTE_MINIMAL,
+        )
+        _rejects_started.add(path)
+    except Exception as e:
+        logger.error(f"Error writing rejected rows: {str(e)}")
+        raise ValidationError(f"Error writing rejected rows: {str(e)}")
+
+
+def apply_rules(
+    df: pd.DataFrame, rules: Optional[Sequence[ValidationRule]] = None
+) -> pd.DataFrame:
+    """Rows passing every rule (the active ones by default), logs the per-rule
+    rejections and writes the rejected rows to the sidecar when one is configured."""
+    rules = active_rules() if rules is None else rules
+    mask, report = evaluate_rules(df, rules)
+    rejected = report.rows_in - report.rows_kept
+    logger.info(
+        f"Validation kept {report.rows_kept}/{report.rows_in} rows, rejected "
+        f"{rejected}: "
+        + ", ".join(f"{name}={count}" for name, count in report.failures.items())
+    )
+    if rejected and _rejects_path is not None:
+        write_rejects(df[~mask], rules, _rejects_path)
+    return df if not rejected else df[mask]
@@ -0,0 +1,22 @@
+from pathlib import Path
+
+import pytest
+
+from benchmarks.synthetic import write_synthetic_csv
+from src.data_analysis.data_processing import read_movie_data
+from src.utils.types import MovieData
+
+SYNTHETIC_ROWS = 3000
+
+
+@pytest.fixture(scope="session")
+def movies_csv(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """A small synthetic export (same columns and quirks as the real CSV)"""
+    return write_synthetic_csv(
+        tmp_path_factory.mktemp("data") / "movies.csv", SYNTHETIC_ROWS
+    )
+
+
+@pytest.fixture(scope="session")
+def movie_data(movies_csv: Path) -> MovieData:
+    return read_movie_data(movies_csv, use_cache=False)
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+from src.data_analysis.binning import (
+    RUNTIME_EDGES,
+    RUNTIME_RATING_EDGES,
+    bin_codes,
+    count_grid,
+    rating_heatmap_counts,
+    runtime_rating_counts,
+    uniform_edges,
+)
+from src.utils.types import MovieData
+
+# ratings on and next to every decile edge, plus the 0 / 100 ends
+EDGE_RATINGS = np.array(
+    [0, 0.5, 9.99, 10, 10.01, 49.5, 50, 89.9, 90, 99, 99.99, 100], dtype=np.float64
+)
+
+
+def _legacy_heatmap(critics: np.ndarray, audience: np.ndarray) -> np.ndarray:
+    """The per-row loop the heatmap used before the binning module"""
+    counts = np.zeros((10, 10))
+    for x, y in zip(critics, audience):
+        x_bin, y_bin = min(int(x // 10), 9), min(int(y // 10), 9)
+        counts[9 - y_bin, x_bin] += 1
+    return counts
+
+
+def test_heatmap_matches_legacy_loop(movie_data: MovieData) -> None:
+    ratings = movie_data.valid_ratings
+    critics, audience = (
+        ratings["tomatometer_rating"].to_numpy(),
+        ratings["audience_rating"].to_numpy(),
+    )
+    assert np.array_equal(
+        rating_heatmap_counts(critics, audience), _legacy_heatmap(critics, audience)
+    )
+
+
+def test_heatmap_matches_legacy_loop_on_edges() -> None:
+    critics, audience = np.meshgrid(EDGE_RATINGS, EDGE_RATINGS[::-1])
+    critics, audience = critics.ravel(), audience.ravel()
+    assert np.array_equal(
+        rating_heatmap_counts(critics, audience), _legacy_heatmap(critics, audience)
+    )
+
+
+def test_count_grid_matches_histogram2d() -> None:
+    rng = np.random.default_rng(0)
+    runtime = np.concatenate(
+        [rng.normal(105, 40, 5000).round(), RUNTIME_EDGES, [0, 29.9, 240.1, 300]]
+    )
+    rating = np.concatenate(
+        [rng.integers(0, 101, 5000), rng.choice(RUNTIME_RATING_EDGES, 12)]
+    ).astype(np.float64)
+    expected, _, _ = np.histogram2d(
+        runtime, rating, bins=(RUNTIME_EDGES, RUNTIME_RATING_EDGES)
+    )
+    assert np.array_equal(runtime_rating_counts(runtime, rating), expected)
+
+
+def test_weighted_grid_matches_histogram2d() -> None:
+    rng = np.random.default_rng(1)
+    x, y, weights = (
+        rng.uniform(-5, 105, 2000),
+        rng.uniform(-5, 105, 2000),
+        rng.uniform(0, 3, 2000),
+    )
+    edges = uniform_edges(0, 100, 7)
+    expected, _, _ = np.histogram2d(x, y, bins=(edges, edges), weights=weights)
+    assert np.allclose(
+        count_grid(x, y, edges, edges, weights=weights, clip=False), expected
+    )
+
+
+def test_bin_codes_missing_and_clipping() -> None:
+    values = np.array([np.nan, -1, 0, 100, 101])
+    assert bin_codes(values, uniform_edges(0, 100, 10)).tolist() == [-1, 0, 0, 9, 9]
+    assert bin_codes(values, uniform_edges(0, 100, 10), clip=False).tolist() == [
+        -1,
+        -1,
+        0,
+        9,
+        -1,
+    ]
+
+
+def test_right_closed_bins_match_pd_cut() -> None:
+    values = np.array([0.5, 10, 10.5, 55, 100])
+    edges = uniform_edges(0, 100, 10)
+    assert (
+        bin_codes(values, edges, right=True).tolist()
+        == pd.cut(values, edges).codes.tolist()
+    )
@@ -0,0 +1,83 @@
+from typing import Tuple
+
+import numpy as np
+import pytest
+
+from src.data_analysis.bootstrap import COUNTS_COST, BootstrapError, bootstrap_mean_ci
+from src.utils.types import MovieData
+
+
+def _groups(seed: int = 0) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Group 0 small (rows path), 1 large with few values (counts path), 2 empty, 3 one
+    row"""
+    rng = np.random.default_rng(seed)
+    values = np.concatenate(
+        [rng.normal(50, 10, 40), rng.integers(0, 5, 30 * COUNTS_COST), [70.0]]
+    )
+    codes = np.concatenate([np.zeros(40), np.ones(30 * COUNTS_COST), [3]]).astype(
+        np.int64
+    )
+    # both left out
+    extra_values, extra_codes = np.array([np.nan, 1000.0]), np.array([0, -1])
+    return (
+        np.concatenate([values, extra_values]),
+        np.concatenate([codes, extra_codes]),
+        4,
+    )
+
+
+def test_same_intervals_for_any_worker_count() -> None:
+    values, codes, n_groups = _groups()
+    serial = bootstrap_mean_ci(values, codes, n_groups, resamples=600)
+    parallel = bootstrap_mean_ci(values, codes, n_groups, resamples=600, workers=2)
+    assert np.array_equal(serial.low, parallel.low, equal_nan=True)
+    assert np.array_equal(serial.high, parallel.high, equal_nan=True)
+
+
+def test_seeded_and_reproducible() -> None:
+    values, codes, n_groups = _groups()
+    first = bootstrap_mean_ci(values, codes, n_groups, resamples=300)
+    again = bootstrap_mean_ci(values, codes, n_groups, resamples=300)
+    other = bootstrap_mean_ci(values, codes, n_groups, resamples=300, seed=1)
+    assert np.array_equal(first.low, again.low, equal_nan=True)
+    assert not np.array_equal(first.low[:2], other.low[:2])
+
+
+def test_empty_and_single_row_groups() -> None:
+    values, codes, n_groups = _groups()
+    ci = bootstrap_mean_ci(values, codes, n_groups, resamples=200)
+    assert np.isnan(ci.low[2]) and np.isnan(ci.high[2])
+    assert ci.low[3] == ci.high[3] == 70.0
+    assert (ci.low[:2] < ci.high[:2]).all()
+
+
+@pytest.mark.parametrize("group", [0, 1])
+def test_intervals_match_a_per_group_bootstrap(group: int) -> None:
+    values, codes, n_groups = _groups()
+    ci = bootstrap_mean_ci(values, codes, n_groups, resamples=4000)
+    own = values[(codes == group) & ~np.isnan(values)]
+    means = own[np.random.default_rng(7).integers(0, len(own), (4000, len(own)))].mean(
+        axis=1
+    )
+    low, high = np.quantile(means, [0.025, 0.975])
+    half_width = (high - low) / 2
+    assert ci.low[group] == pytest.approx(low, abs=0.1 * half_width)
+    assert ci.high[group] == pytest.approx(high, abs=0.1 * half_width)
+
+
+def test_invalid_confidence() -> None:
+    values, codes, n_groups = _groups()
+    with pytest.raises(BootstrapError):
+        bootstrap_mean_ci(values, codes, n_groups, confidence=1.5)
+
+
+def test_views_follow_the_aggregate_index(movie_data: MovieData) -> None:
+    yearly = movie_data.view("yearly_rating_ci")
+    assert yearly.index.equals(movie_data.view("yearly_aggregates").index)
+    genres = movie_data.view("genre_rating_ci")
+    assert genres.index.equals(movie_data.view("genre_aggregates").index)
+    filled = genres.dropna()
+    assert (
+        filled[("tomatometer_rating", "ci_low")]
+        <= filled[("tomatometer_rating", "ci_high")]
+    ).all()
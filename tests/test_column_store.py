@@ -0,0 +1,74 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_analysis.column_store import (
+    SCHEMA_FILE,
+    ColumnStoreError,
+    read_columns,
+    write_columns,
+)
+from src.data_analysis.mmap_store import open_mmap_store, write_mmap_store
+from src.utils.types import MovieData
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "rating": np.array([91.0, np.nan, 40.5, 77.0]),
+            "count": pd.array([12, None, 3, 0], dtype="UInt32"),
+            "genre": pd.Categorical(["Drama", "Comedy", None, "Drama"]),
+            "title": np.array(["A", np.nan, "Ç", "D"], dtype=object),
+            "released": pd.to_datetime(
+                ["1999-01-02", None, "2010-05-06", "2020-12-31"]
+            ),
+        },
+        index=[10, 11, 14, 20],
+    )
+
+
+def test_round_trip(tmp_path: Path) -> None:
+    df = _frame()
+    write_columns(df, tmp_path / "store")
+    pd.testing.assert_frame_equal(read_columns(tmp_path / "store"), df)
+
+
+def test_masks_are_arrays_not_schema_lists(tmp_path: Path) -> None:
+    write_columns(_frame(), tmp_path / "store")
+    schema = json.loads((tmp_path / "store" / SCHEMA_FILE).read_text())
+    count = next(meta for meta in schema["columns"] if meta["name"] == "count")
+    assert count["roles"] == ["values", "mask"] and "na" not in count
+    assert np.load(tmp_path / "store" / "col_002_mask.npy").tolist() == [
+        False,
+        True,
+        False,
+        False,
+    ]
+
+
+def test_mmap_read_is_read_only_and_equal(tmp_path: Path) -> None:
+    df = _frame()
+    write_columns(df, tmp_path / "store")
+    mapped = read_columns(tmp_path / "store", columns=["rating", "genre"], mmap=True)
+    pd.testing.assert_frame_equal(mapped, df[["rating", "genre"]])
+    assert not mapped["rating"].to_numpy().flags.writeable
+
+
+def test_mmap_store_matches_processed_data(
+    tmp_path: Path, movie_data: MovieData
+) -> None:
+    write_mmap_store(movie_data, tmp_path / "mmap")
+    pd.testing.assert_frame_equal(open_mmap_store(tmp_path / "mmap").df, movie_data.df)
+
+
+def test_old_version_is_refused(tmp_path: Path) -> None:
+    write_columns(_frame(), tmp_path / "store")
+    schema_path = tmp_path / "store" / SCHEMA_FILE
+    schema_path.write_text(
+        json.dumps({**json.loads(schema_path.read_text()), "version": 1})
+    )
+    with pytest.raises(ColumnStoreError):
+        read_columns(tmp_path / "store")
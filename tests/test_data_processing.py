@@ -0,0 +1,105 @@
+import shutil
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_movies
+from src.data_analysis.data_processing import (
+    ingest_memory_report,
+    process_raw_data,
+    read_movie_data,
+)
+from src.utils.validation import configure_validation, parse_rules
+
+
+def _raw_frame(dates: List[Optional[str]]) -> pd.DataFrame:
+    rows = len(dates)
+    return pd.DataFrame(
+        {
+            "movie_title": [f"Movie {i}" for i in range(rows)],
+            "in_theaters_date": pd.Series(dates, dtype="category"),
+            "genre": pd.Series(["Drama"] * rows, dtype="category"),
+            "tomatometer_rating": [50.0] * rows,
+            "tomatometer_count": [10] * rows,
+            "audience_rating": [60.0] * rows,
+            "audience_count": [100] * rows,
+            "runtime_in_minutes": [100.0] * rows,
+        }
+    )
+
+
+@pytest.fixture
+def use_rules() -> Iterator[Callable[[List[Dict]], None]]:
+    yield lambda rules: configure_validation(parse_rules({"rules": rules}))
+    configure_validation()  # back to the rules file / defaults
+
+
+def test_default_rules_compact_release_year() -> None:
+    df = process_raw_data(_raw_frame(["1999-05-01", "2010-01-01", None]))
+
+    assert df["release_year"].dtype == np.int16
+    assert df["release_year"].tolist() == [1999, 2010]
+
+
+def test_missing_years_without_year_rule_stay_float(
+    use_rules: Callable[[List[Dict]], None]
+) -> None:
+    use_rules([{"column": "tomatometer_rating", "min": 0, "max": 100}])
+
+    df = process_raw_data(_raw_frame(["1999-05-01", None]))
+
+    assert df["release_year"].dtype == np.float64
+    assert len(df) == 2
+    assert np.isnan(df["release_year"].iloc[1])
+
+
+def test_dates_outside_the_configured_formats_are_inferred() -> None:
+    df = process_raw_data(
+        _raw_frame(["1999-05-01", "Jan 5, 2001", "12/31/2005", "not a date"])
+    )
+
+    # the unparseable row fails the year rule
+    assert df["release_year"].tolist() == [
+        1999,
+        2001,
+        2005,
+    ]
+
+
+def test_ingest_memory_report(movies_csv: Path) -> None:
+    report = ingest_memory_report(movies_csv, nrows=500)
+    columns = report.drop(index="total")
+    assert report.loc["total", "bytes_after"] == columns["bytes_after"].sum()
+    assert report.loc["total", "bytes_after"] < report.loc["total", "bytes_before"]
+    assert report.loc["audience_count", "dtype_after"] == "UInt32"
+
+
+def test_cache_only_drops_stale_entries_of_the_same_file(
+    movies_csv: Path, tmp_path: Path
+) -> None:
+    cache_dir = tmp_path / "cache"
+
+    def _cache(source: Path) -> Set[Path]:
+        before = set(cache_dir.iterdir()) if cache_dir.exists() else set()
+        read_movie_data(source, cache_dir=cache_dir)
+        return set(cache_dir.iterdir()) - before
+
+    movies, movies_2024, other = (
+        tmp_path / "movies.csv",
+        tmp_path / "movies-2024.csv",
+        tmp_path / "b" / "movies.csv",
+    )
+    other.parent.mkdir()
+    entries = {}
+    for source in (movies, movies_2024, other):
+        shutil.copy(movies_csv, source)
+        (entries[source],) = _cache(source)
+
+    generate_movies(10, seed=1, offset=5000).to_csv(
+        movies, mode="a", header=False, index=False
+    )
+    (updated,) = _cache(movies)
+    assert set(cache_dir.iterdir()) == {updated, entries[movies_2024], entries[other]}
@@ -0,0 +1,71 @@
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+from src.data_analysis.genre_index import (
+    build_genre_index,
+    genre_cooccurrence,
+    split_genres,
+)
+from src.utils.types import MovieData
+
+GENRES = pd.Series(
+    [
+        "Action & Adventure, Comedy",
+        "Comedy",
+        "Drama, Comedy, Romance",
+        None,
+        "Drama",
+        "Comedy, Action & Adventure",
+        "Action & Adventure, Comedy",
+        "Horror",
+    ]
+)
+
+
+def _pairwise_counts(genres: pd.Series) -> pd.DataFrame:
+    listed = [set(split_genres(value)) for value in genres.dropna()]
+    names = sorted(set().union(*listed))
+    return pd.DataFrame(
+        [
+            [sum(a in movie and b in movie for movie in listed) for b in names]
+            for a in names
+        ],
+        index=names,
+        columns=names,
+    )
+
+
+def test_cooccurrence_matches_pairwise_counts() -> None:
+    for genres in (GENRES, GENRES.astype("category")):
+        result = genre_cooccurrence(build_genre_index(genres))
+        pd.testing.assert_frame_equal(
+            result, _pairwise_counts(genres), check_names=False, check_dtype=False
+        )
+
+
+def test_cooccurrence_with_a_mask() -> None:
+    mask = np.array([True, False] * 4)
+    result = genre_cooccurrence(build_genre_index(GENRES), mask)
+    expected = _pairwise_counts(GENRES[mask]).reindex(
+        index=result.index, columns=result.columns, fill_value=0
+    )
+    pd.testing.assert_frame_equal(
+        result, expected, check_names=False, check_dtype=False
+    )
+
+
+def test_cooccurrence_view(movie_data: MovieData) -> None:
+    result = movie_data.view("genre_cooccurrence")
+    assert (result.to_numpy() == result.to_numpy().T).all()
+    exploded = movie_data.df["genre"].dropna().astype(str).map(split_genres).explode()
+    diagonal = exploded.value_counts().reindex(result.index)
+    assert np.array_equal(np.diag(result.to_numpy()), diagonal.to_numpy())
+    for a, b in product(result.index[:3], repeat=2):
+        both = (
+            movie_data.df["genre"]
+            .astype(str)
+            .map(lambda value: {a, b} <= set(split_genres(value)))
+        )
+        assert result.loc[a, b] == both.sum()
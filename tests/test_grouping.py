@@ -0,0 +1,103 @@
+from functools import reduce
+from typing import List
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_analysis.aggregation import (
+    RATING_COLUMNS,
+    finalize_moments,
+    group_moments,
+    merge_moments,
+)
+from src.data_analysis.genre_index import split_genres
+from src.data_analysis.grouping import factorize_key, group_stats, stats_frame
+from src.utils.types import MovieData
+
+AGGREGATES = ["mean", "count", "std"]
+
+
+def _frame(rows: int = 2000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            "key": rng.choice([1990.0, 1995.0, 2001.0, 2010.0, np.nan], rows),
+            "a": rng.integers(0, 101, rows).astype(np.float64),
+            "b": pd.array(rng.integers(0, 10_000, rows), dtype="UInt32"),
+            "c": rng.normal(0, 1, rows).astype(np.float32),
+        }
+    )
+    df.loc[rng.choice(rows, 100, replace=False), "a"] = np.nan
+    df.loc[rng.choice(rows, 100, replace=False), "b"] = pd.NA
+    df.loc[df["key"] == 2010.0, "c"] = np.nan  # a group without values
+    return df
+
+
+def _expected(df: pd.DataFrame, columns: List[str], stats: List[str]) -> pd.DataFrame:
+    return df.groupby("key")[columns].agg(stats).astype(np.float64)
+
+
+@pytest.mark.parametrize("masked", [False, True])
+def test_group_stats_match_pandas_groupby(masked: bool) -> None:
+    df, columns = _frame(), ["a", "b", "c"]
+    mask = (df["a"] > 20).to_numpy() if masked else None
+    stats = group_stats(factorize_key(df["key"]), df, columns, mask)
+    names = ["count", "sum", "min", "max", "mean", "std"]
+    expected = _expected(df[mask] if masked else df, columns, names)
+    result = stats_frame(stats, names)
+    result.columns = pd.MultiIndex.from_tuples(result.columns)
+    # pandas sums an empty group to 0, like group_stats; float32 'c' is summed in
+    # float64 here
+    pd.testing.assert_frame_equal(
+        result.astype(np.float64), expected, check_names=False, rtol=1e-5
+    )
+
+
+def test_yearly_aggregates_match_pandas_groupby(movie_data: MovieData) -> None:
+    expected = movie_data.df.groupby("release_year")[RATING_COLUMNS].agg(AGGREGATES)
+    result = movie_data.view("yearly_aggregates")
+    pd.testing.assert_frame_equal(
+        result,
+        expected,
+        check_names=False,
+        check_dtype=False,
+        check_index_type=False,
+        check_column_type=False,
+    )
+
+
+def test_genre_aggregates_match_exploded_groupby(movie_data: MovieData) -> None:
+    df = movie_data.df.dropna(subset=["genre"])
+    exploded = df.assign(genre=df["genre"].astype(str).map(split_genres)).explode(
+        "genre"
+    )
+    columns = [*RATING_COLUMNS, "runtime_in_minutes"]
+    expected = exploded.groupby("genre")[columns].agg(AGGREGATES)
+    result = movie_data.view("genre_aggregates")
+    pd.testing.assert_frame_equal(
+        result,
+        expected,
+        check_names=False,
+        check_dtype=False,
+        check_index_type=False,
+        check_column_type=False,
+    )
+
+
+def test_merged_chunk_moments_match_the_whole_frame() -> None:
+    df = _frame()
+    moments = [
+        group_moments(df.iloc[start : start + 300], "key", ["a", "b"])
+        for start in range(0, len(df), 300)
+    ]
+    merged = finalize_moments(reduce(merge_moments, moments))
+    expected = df.groupby("key")[["a", "b"]].agg(AGGREGATES)
+    pd.testing.assert_frame_equal(
+        merged,
+        expected,
+        check_names=False,
+        check_dtype=False,
+        check_index_type=False,
+        check_column_type=False,
+    )
@@ -0,0 +1,134 @@
+import csv
+import io
+import shutil
+from pathlib import Path
+from typing import Any, List
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_movies
+from src.data_analysis import incremental
+from src.data_analysis.incremental import (
+    ANCHOR_BYTES,
+    SCAN_BYTES,
+    update_incremental_state,
+)
+from src.data_analysis.streaming import PartialResults
+
+RATING_FIELD = 13  # tomatometer_rating
+
+
+@pytest.fixture
+def source(movies_csv: Path, tmp_path: Path) -> Path:
+    return Path(shutil.copy(movies_csv, tmp_path / "movies.csv"))
+
+
+def _full_build(path: Path, tmp_path: Path) -> PartialResults:
+    return update_incremental_state(path, tmp_path / "fresh.json")
+
+
+def _assert_same(partials: PartialResults, expected: PartialResults) -> None:
+    assert partials.rows == expected.rows
+    assert np.array_equal(partials.heatmap_counts, expected.heatmap_counts)
+    pd.testing.assert_frame_equal(
+        partials.yearly_moments,
+        expected.yearly_moments,
+        check_dtype=False,
+        check_index_type=False,
+        check_names=False,
+    )
+
+
+def _edit_rating(path: Path, line: int) -> None:
+    """Change the critics rating of one row without changing the file size"""
+    lines = path.read_bytes().split(b"\n")
+    row = next(csv.reader([lines[line].decode()]))
+    old = row[RATING_FIELD]
+    row[RATING_FIELD] = ("1" if old[0] != "1" else "2") + old[1:]
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="").writerow(row)
+    edited = buffer.getvalue().encode()
+    assert len(edited) == len(lines[line])
+    lines[line] = edited
+    path.write_bytes(b"\n".join(lines))
+
+
+def _append(path: Path, rows: int) -> None:
+    generate_movies(rows, seed=1, offset=3000).to_csv(
+        path, mode="a", header=False, index=False
+    )
+
+
+class _CountingFile:
+    """Binary file handle adding up the bytes read through it"""
+
+    def __init__(self, handle: Any, counts: List[int]):
+        self._handle = handle
+        self._counts = counts
+
+    def read(self, size: int = -1) -> bytes:
+        data: bytes = self._handle.read(size)
+        self._counts.append(len(data))
+        return data
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._handle, name)
+
+    def __enter__(self) -> "_CountingFile":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._handle.close()
+
+
+def test_appended_rows_are_folded_in(source: Path, tmp_path: Path) -> None:
+    state = tmp_path / "state.json"
+    update_incremental_state(source, state)
+    _append(source, 200)
+    _assert_same(update_incremental_state(source, state), _full_build(source, tmp_path))
+
+
+@pytest.mark.parametrize("line", [1, -2], ids=["first row", "last row"])
+def test_edits_next_to_the_anchors_trigger_a_rebuild(
+    source: Path, tmp_path: Path, line: int
+) -> None:
+    state = tmp_path / "state.json"
+    before = update_incremental_state(source, state)
+    _edit_rating(source, line)  # -2 -> the last row, the file ends with a newline
+    after = update_incremental_state(source, state)
+    _assert_same(after, _full_build(source, tmp_path))
+    assert not np.array_equal(after.heatmap_counts, before.heatmap_counts)
+
+
+def test_shorter_files_trigger_a_rebuild(source: Path, tmp_path: Path) -> None:
+    state = tmp_path / "state.json"
+    update_incremental_state(source, state)
+    lines = source.read_bytes().split(b"\n")
+    source.write_bytes(b"\n".join(lines[:-100] + [b""]))
+    _assert_same(update_incremental_state(source, state), _full_build(source, tmp_path))
+
+
+def test_refresh_reads_only_the_appended_bytes(
+    source: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    state = tmp_path / "state.json"
+    update_incremental_state(source, state)
+    size = source.stat().st_size
+    _append(source, 20)
+    delta = source.stat().st_size - size
+    assert size > 4 * ANCHOR_BYTES + SCAN_BYTES + delta
+
+    counts: List[int] = []
+    monkeypatch.setattr(
+        incremental,
+        "open",
+        lambda *args, **kwargs: _CountingFile(open(*args, **kwargs), counts),
+        raising=False,
+    )
+    partials = update_incremental_state(source, state)
+    # the new rows, both anchors before and after them and the scan for the last row
+    assert delta <= sum(counts) <= delta + 4 * ANCHOR_BYTES + SCAN_BYTES
+    monkeypatch.undo()
+    _assert_same(partials, _full_build(source, tmp_path))
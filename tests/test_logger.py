@@ -0,0 +1,127 @@
+import json
+import logging
+import multiprocessing
+import sys
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from src.utils.logger import (
+    JsonLinesFormatter,
+    LazyRotatingFileHandler,
+    RateLimitFilter,
+    set_log_format,
+    setup_logger,
+    stop_logging,
+)
+
+
+def _record(
+    message: str, created: float, level: int = logging.INFO, lineno: int = 10
+) -> logging.LogRecord:
+    record = logging.LogRecord("test", level, "hot.py", lineno, message, None, None)
+    record.created = created
+    return record
+
+
+@pytest.fixture
+def flushed() -> Iterator[None]:
+    """Tests write through the real listener, stop_logging drains the queue and
+    set_log_format restores the default afterwards."""
+    yield
+    set_log_format("text")
+
+
+def test_rate_limit_drops_a_burst_and_reports_it() -> None:
+    limit = RateLimitFilter(burst=3, interval=1.0)
+    passed = [limit.filter(_record(f"row {i}", 100.0 + i / 100)) for i in range(10)]
+    assert passed == [True] * 3 + [False] * 7
+    # other call sites and warnings are not limited
+    assert limit.filter(_record("elsewhere", 100.5, lineno=11))
+    assert limit.filter(_record("careful", 100.5, level=logging.WARNING))
+
+    record = _record("row 10", 101.0)
+    assert limit.filter(record)
+    assert record.getMessage() == "row 10 [7 similar messages suppressed]"
+    # the count is reported once
+    record = _record("row 11", 101.1)
+    assert limit.filter(record)
+    assert record.getMessage() == "row 11"
+
+
+def test_json_lines_formatter() -> None:
+    formatter = JsonLinesFormatter()
+    try:
+        raise ValueError("bad row")
+    except ValueError:
+        record = logging.LogRecord(
+            "test", logging.ERROR, "x.py", 3, 'quote " and %s', ("ąę",), None
+        )
+        record.exc_info = sys.exc_info()
+    entry = json.loads(formatter.format(record))
+    assert entry["message"] == 'quote " and ąę'
+    assert entry["level"] == "ERROR"
+    assert entry["line"] == 3
+    assert "ValueError: bad row" in entry["exception"]
+
+
+def test_jsonl_log_files_have_one_object_per_line(
+    tmp_path: Path, flushed: None
+) -> None:
+    set_log_format("jsonl")
+    logger = setup_logger("test_jsonl", str(tmp_path / "test.log"), burst=None)
+    for i in range(50):
+        logger.info(f"line {i}\nwith a newline")
+    try:
+        int("x")
+    except ValueError:
+        logger.exception("lookup failed")
+    stop_logging()
+
+    assert not (tmp_path / "test.log").exists()
+    lines = (tmp_path / "test.jsonl").read_text(encoding="utf-8").splitlines()
+    entries = [json.loads(line) for line in lines]
+    assert [entry["message"] for entry in entries[:50]] == [
+        f"line {i}\nwith a newline" for i in range(50)
+    ]
+    assert entries[50]["message"] == "lookup failed"
+    assert "ValueError: invalid literal" in entries[50]["exception"]
+
+
+def test_log_files_are_created_on_the_first_record(
+    tmp_path: Path, flushed: None
+) -> None:
+    handler = LazyRotatingFileHandler(str(tmp_path / "logs" / "lazy.log"))
+    assert not (tmp_path / "logs").exists()
+    handler.handle(_record("first", 0.0))
+    handler.close()
+    assert (tmp_path / "logs" / "lazy.log").read_text().strip() == "first"
+
+    log_file = tmp_path / "quiet" / "module.log"
+    logger = setup_logger("test_lazy", str(log_file))
+    stop_logging()
+    assert not log_file.parent.exists()
+    set_log_format("text")
+    logger.info("now")
+    stop_logging()
+    assert "now" in log_file.read_text()
+
+
+def _log_in_child(log_file: str) -> None:
+    setup_logger("test_child", log_file).info("from the child")
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="needs fork"
+)
+def test_forked_children_write_synchronously(tmp_path: Path, flushed: None) -> None:
+    log_file = tmp_path / "child.log"
+    child = multiprocessing.get_context("fork").Process(
+        target=_log_in_child, args=(str(log_file),)
+    )
+    child.start()
+    child.join()
+    # written by the child itself, not by a listener thread it does not have
+    assert child.exitcode == 0
+    assert "from the child" in log_file.read_text()
@@ -0,0 +1,148 @@
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+import pandas as pd
+import pytest
+
+from src.data_analysis import partitioned_store
+from src.data_analysis.genre_index import split_genres
+from src.data_analysis.partitioned_store import (
+    NO_FILTER,
+    PartitionFilter,
+    filter_movie_data,
+    read_partitioned,
+    write_partitioned,
+)
+from src.utils.types import MovieData
+
+FILTERS = [
+    PartitionFilter(years=(1995, 2004)),
+    PartitionFilter(genres=("Western", "Animation")),
+    PartitionFilter(years=(1980, 2020), genres=("Documentary",)),
+    PartitionFilter(tomatometer=(90, 100), audience=(0, 50)),
+    PartitionFilter(years=(3000, 3010)),
+]
+
+
+def _expected(df: pd.DataFrame, filters: PartitionFilter) -> pd.DataFrame:
+    """The filters written out with plain pandas comparisons"""
+    keep = pd.Series(True, index=df.index)
+    for col, bounds in (
+        ("release_year", filters.years),
+        ("tomatometer_rating", filters.tomatometer),
+        ("audience_rating", filters.audience),
+    ):
+        if bounds is not None:
+            values = df[col].astype("float64")
+            keep &= (values >= bounds[0]) & (values <= bounds[1])
+    if filters.genres:
+        keep &= (
+            df["genre"]
+            .map(lambda value: bool(set(split_genres(value)) & set(filters.genres)))
+            .astype(bool)
+            .fillna(False)
+        )
+    return df[keep.to_numpy()]
+
+
+def _spy_reads(monkeypatch: pytest.MonkeyPatch) -> List[Path]:
+    """Records the directory of every column store read_partitioned opens"""
+    opened: List[Path] = []
+    read_columns = partitioned_store.read_columns
+
+    def _read_columns(path: Path, *args: Any, **kwargs: Any) -> pd.DataFrame:
+        opened.append(path)
+        return read_columns(path, *args, **kwargs)
+
+    monkeypatch.setattr(partitioned_store, "read_columns", _read_columns)
+    return opened
+
+
+def _few_rows(data: MovieData) -> MovieData:
+    # genre lists -> hundreds of tiny partitions, a slice keeps the tests quick
+    return MovieData(df=data.df.iloc[:200])
+
+
+def _store(data: MovieData, tmp_path: Path, by: Sequence[str]) -> Dict[str, Any]:
+    return write_partitioned(data, tmp_path / "store", by)
+
+
+def _matching_paths(
+    data: MovieData, manifest: Dict[str, Any], filters: PartitionFilter, root: Path
+) -> List[str]:
+    """Partitions holding at least one matching row"""
+    matching = _expected(data.df, filters).index
+    return sorted(
+        entry["path"]
+        for entry in manifest["partitions"]
+        if partitioned_store.read_columns(root / entry["path"])
+        .index.isin(matching)
+        .any()
+    )
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_filtered_reads_match_filtering_the_frame(
+    movie_data: MovieData, tmp_path: Path, filters: PartitionFilter
+) -> None:
+    _store(movie_data, tmp_path, ("decade",))
+    expected = _expected(movie_data.df, filters)
+    pd.testing.assert_frame_equal(
+        read_partitioned(tmp_path / "store", filters).df, expected
+    )
+    pd.testing.assert_frame_equal(filter_movie_data(movie_data, filters).df, expected)
+
+
+def test_unfiltered_reads_return_everything(
+    movie_data: MovieData, tmp_path: Path
+) -> None:
+    data = _few_rows(movie_data)
+    _store(data, tmp_path, ("decade", "genre"))
+    df = data.df.dropna(subset=["release_year", "genre"])
+    pd.testing.assert_frame_equal(read_partitioned(tmp_path / "store").df, df)
+    assert filter_movie_data(movie_data, NO_FILTER) is movie_data
+
+
+@pytest.mark.parametrize(
+    "by, filters",
+    [
+        (("decade",), PartitionFilter(years=(1995, 2004))),
+        (("genre",), PartitionFilter(genres=("Western",))),
+        (("decade", "genre"), PartitionFilter(years=(2000, 2009), genres=("Horror",))),
+    ],
+)
+def test_only_matching_partitions_are_opened(
+    movie_data: MovieData,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    by: Sequence[str],
+    filters: PartitionFilter,
+) -> None:
+    data = _few_rows(movie_data) if "genre" in by else movie_data
+    manifest = _store(data, tmp_path, by)
+    root = tmp_path / "store"
+    matching = _matching_paths(data, manifest, filters, root)
+    assert 0 < len(matching) < len(manifest["partitions"])
+
+    opened = _spy_reads(monkeypatch)
+    result = read_partitioned(root, filters).df
+    assert sorted(str(path.relative_to(root)) for path in opened) == matching
+    pd.testing.assert_frame_equal(result, _expected(data.df, filters))
+
+
+def test_score_bounds_prune_on_partition_stats(
+    movie_data: MovieData, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    manifest = _store(movie_data, tmp_path, ("decade",))
+    # above every partition's tomatometer max -> nothing to open at all but the first
+    # partition for the columns and dtypes
+    top = max(
+        entry["stats"]["tomatometer_rating"]["max"] or 0
+        for entry in manifest["partitions"]
+    )
+    filters = PartitionFilter(tomatometer=(top + 1, top + 2))
+    opened = _spy_reads(monkeypatch)
+    result = read_partitioned(tmp_path / "store", filters).df
+    assert len(opened) == 1
+    assert result.empty
+    assert list(result.columns) == list(movie_data.df.columns)
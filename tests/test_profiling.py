@@ -0,0 +1,97 @@
+import gc
+import json
+import tracemalloc
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from src.utils.profiling import Profiler, disable_profiling, enable_profiling, profiled
+
+MIB = 1 << 20
+
+
+@pytest.fixture
+def profiler() -> Iterator[Profiler]:
+    yield enable_profiling()
+    disable_profiling()
+
+
+def test_profiled_is_a_no_op_when_disabled() -> None:
+    with profiled("step", rows_in=3) as probe:
+        probe.rows_out = 2
+    assert not hasattr(probe, "rows_out")
+    assert profiled("other") is probe
+
+
+def test_stage_records(profiler: Profiler) -> None:
+    with profiled("outer", rows_in=10) as outer:
+        with profiled("inner", rows_in=10) as inner:
+            inner.rows_out = 4
+        outer.rows_out = 4
+    assert [record["name"] for record in profiler.records] == ["inner", "outer"]
+    record = profiler.records[1]
+    assert (record["rows_in"], record["rows_out"], record["error"]) == (10, 4, None)
+    assert record["wall_seconds"] >= profiler.records[0]["wall_seconds"] >= 0
+
+
+def test_peak_and_retained_bytes(profiler: Profiler) -> None:
+    kept = []
+    # a collection inside a step frees garbage of earlier tests -> less retained
+    gc.collect()
+    gc.disable()
+    try:
+        with profiled("outer"):
+            with profiled("temporary"):
+                buffer = bytearray(16 * MIB)
+                del buffer
+            with profiled("kept"):
+                kept.append(bytearray(4 * MIB))
+    finally:
+        gc.enable()
+    temporary, kept_step, outer = profiler.records
+    assert temporary["peak_traced_bytes"] >= 16 * MIB
+    assert abs(temporary["retained_bytes"]) < MIB
+    assert 4 * MIB <= kept_step["retained_bytes"] < 5 * MIB
+    assert kept_step["peak_traced_bytes"] < 16 * MIB
+    # the outer step saw both, its peak includes the inner one
+    assert outer["peak_traced_bytes"] >= 16 * MIB
+    assert 4 * MIB <= outer["retained_bytes"] < 5 * MIB
+
+
+def test_errors_are_recorded_and_raised(profiler: Profiler) -> None:
+    with pytest.raises(KeyError):
+        with profiled("failing"):
+            raise KeyError("missing")
+    assert profiler.records[0]["error"] == "KeyError: 'missing'"
+
+
+def test_cprofile_dumps_and_report(tmp_path: Path) -> None:
+    profiler = enable_profiling(trace_memory=False, cprofile_dir=tmp_path / "prof")
+    try:
+        with profiled("ingest/read csv"):
+            with profiled("nested"):
+                sum(range(1000))
+    finally:
+        disable_profiling()
+    nested, outer = profiler.records
+    # one cProfile at a time -> the nested step is part of the outer dump
+    assert "cprofile" not in nested
+    assert Path(outer["cprofile"]).name == "001_ingest_read_csv.prof"
+    assert Path(outer["cprofile"]).exists()
+    assert "peak_traced_bytes" not in outer
+
+    report = json.loads(profiler.write_report(tmp_path / "report.json").read_text())
+    assert report["trace_memory"] is False
+    assert [stage["name"] for stage in report["stages"]] == [
+        "nested",
+        "ingest/read csv",
+    ]
+
+
+def test_disable_stops_tracing() -> None:
+    enable_profiling()
+    assert tracemalloc.is_tracing()
+    assert disable_profiling() is not None
+    assert not tracemalloc.is_tracing()
+    assert disable_profiling() is None
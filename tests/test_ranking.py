@@ -0,0 +1,82 @@
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_analysis.data_insights import rating_discrepancies_frame, top_rated_frame
+from src.data_analysis.genre_index import split_genres
+from src.data_analysis.ranking import (
+    TOP_RATED,
+    merge_top_k,
+    rank_chunks,
+    rank_frame,
+    top_k_positions,
+)
+from src.utils.types import MovieData
+
+
+def _stable_top(df: pd.DataFrame, score: pd.Series, k: int) -> pd.DataFrame:
+    """Reference ranking: best first, ties in row order"""
+    return (
+        df.assign(_score=score)
+        .dropna(subset=["_score"])
+        .sort_values("_score", ascending=False, kind="stable")
+        .head(k)
+        .drop(columns="_score")
+    )
+
+
+@pytest.mark.parametrize("k", [0, 1, 7, 50, 10_000])
+def test_top_k_positions_is_a_stable_sort(k: int) -> None:
+    rng = np.random.default_rng(k)
+    scores = rng.integers(0, 20, 2000).astype(np.float64)  # lots of ties
+    scores[rng.choice(2000, 100, replace=False)] = np.nan
+    valid = np.flatnonzero(~np.isnan(scores))
+    expected = valid[np.argsort(-scores[valid], kind="stable")][:k]
+    assert top_k_positions(scores, k).tolist() == expected.tolist()
+
+
+@pytest.mark.parametrize("k", [5, 20])
+def test_top_rated_matches_sorting(movie_data: MovieData, k: int) -> None:
+    df = movie_data.valid_ratings
+    expected = _stable_top(
+        df, (df["tomatometer_rating"] + df["audience_rating"]) / 2, k
+    )
+    assert top_rated_frame(df, k).index.tolist() == expected.index.tolist()
+
+
+def test_discrepancies_match_sorting(movie_data: MovieData) -> None:
+    df = movie_data.valid_ratings
+    gap = (df["tomatometer_rating"] - df["audience_rating"]).abs()
+    expected = _stable_top(df, gap.where(gap >= 30), 20)
+    ranked = rating_discrepancies_frame(df, 30.0, 20)
+    assert ranked.index.tolist() == expected.index.tolist()
+    assert (ranked["rating_diff"] >= 30).all()
+
+
+def test_top_rated_per_genre_matches_filtering(movie_data: MovieData) -> None:
+    df = movie_data.valid_ratings
+    ranked = top_rated_frame(df, 3, by=("genre",))
+    genre_lists = df["genre"].astype(str).map(split_genres)
+    for genre, rows in ranked.groupby("by_genre", sort=False):
+        members = df[genre_lists.map(lambda genres: genre in genres)]
+        expected = _stable_top(
+            members, (members["tomatometer_rating"] + members["audience_rating"]) / 2, 3
+        )
+        assert rows.index.tolist() == expected.index.tolist(), genre
+
+
+@pytest.mark.parametrize("by", [(), ("genre",), ("release_year",)])
+def test_chunks_and_merges_match_the_whole_frame(
+    movie_data: MovieData, by: Tuple[str, ...]
+) -> None:
+    df = movie_data.valid_ratings
+    spec = TOP_RATED._replace(k=10, by=by)
+    whole = rank_frame(df, spec)
+    chunks = [df.iloc[start : start + 250] for start in range(0, len(df), 250)]
+    pd.testing.assert_frame_equal(rank_chunks(chunks, spec), whole)
+    halves = rank_frame(df.iloc[: len(df) // 2], spec), rank_frame(
+        df.iloc[len(df) // 2 :], spec
+    )
+    pd.testing.assert_frame_equal(merge_top_k(spec, *halves), whole)
@@ -0,0 +1,168 @@
+import json
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+import matplotlib.pyplot as plt
+import pytest
+
+from src.data_analysis.data_insights import GenreStats, generate_key_insights
+from src.data_analysis.parallel_rendering import render_plots_serial
+from src.data_analysis.render_cache import MANIFEST_FILE, RenderCache
+from src.data_analysis.visualization import plot_filename
+from src.utils.types import MovieData, PlotConfig
+
+CONFIG = PlotConfig(dpi=20, figure_size=(2, 2))
+
+
+class _Plots:
+    """A cheap heatmap and trends plot counting how often they are drawn"""
+
+    def __init__(self) -> None:
+        self.drawn: List[str] = []
+        self.failing: Set[str] = set()
+
+    def _plot(self, name: str) -> Callable[[MovieData, PlotConfig], plt.Figure]:
+        def _draw(data: MovieData, config: PlotConfig) -> plt.Figure:
+            if name in self.failing:
+                raise ValueError(f"{name} failed")
+            self.drawn.append(name)
+            fig, ax = plt.subplots(figsize=config.figure_size)
+            ax.plot(data.df["tomatometer_rating"].to_numpy()[:10])
+            return fig
+
+        return _draw
+
+    def render(
+        self,
+        data: MovieData,
+        output_dir: Path,
+        config: PlotConfig = CONFIG,
+        force: bool = False,
+    ) -> Dict[str, Optional[str]]:
+        self.drawn = []
+        return render_plots_serial(
+            [(name, self._plot(name)) for name in ("heatmap", "trends")],
+            data,
+            output_dir,
+            config,
+            RenderCache(output_dir, force=force),
+        )
+
+
+@pytest.fixture
+def data(movie_data: MovieData) -> MovieData:
+    # a fresh MovieData -> no fingerprints memoized by other tests
+    return MovieData(df=movie_data.df.copy())
+
+
+def test_unchanged_plots_are_skipped(data: MovieData, tmp_path: Path) -> None:
+    plots = _Plots()
+    assert plots.render(data, tmp_path) == {"heatmap": None, "trends": None}
+    assert plots.drawn == ["heatmap", "trends"]
+    assert (tmp_path / plot_filename("heatmap")).exists()
+
+    # a new RenderCache reads the manifest written by the first one
+    assert plots.render(MovieData(df=data.df.copy()), tmp_path) == {
+        "heatmap": None,
+        "trends": None,
+    }
+    assert plots.drawn == []
+
+
+def test_force_renders_everything_again(data: MovieData, tmp_path: Path) -> None:
+    plots = _Plots()
+    plots.render(data, tmp_path)
+    plots.render(data, tmp_path, force=True)
+    assert plots.drawn == ["heatmap", "trends"]
+    # and the forced run leaves a valid manifest behind
+    plots.render(data, tmp_path)
+    assert plots.drawn == []
+
+
+def test_deleted_and_failed_outputs_are_rendered_again(
+    data: MovieData, tmp_path: Path
+) -> None:
+    plots = _Plots()
+    plots.render(data, tmp_path)
+    (tmp_path / plot_filename("trends")).unlink()
+    plots.render(data, tmp_path)
+    assert plots.drawn == ["trends"]
+
+    plots.failing = {"heatmap"}
+    plots.render(data, tmp_path, force=True)
+    manifest = json.loads((tmp_path / MANIFEST_FILE).read_text())
+    assert "plot/heatmap" not in manifest["artifacts"]
+    plots.failing = set()
+    plots.render(data, tmp_path)
+    assert plots.drawn == ["heatmap"]
+
+
+def test_data_changes_invalidate_only_the_plots_reading_them(
+    data: MovieData, tmp_path: Path
+) -> None:
+    plots = _Plots()
+    plots.render(data, tmp_path)
+
+    # titles are no plot input
+    titles = data.df.assign(movie_title=data.df["movie_title"].astype(str) + "!")
+    plots.render(MovieData(df=titles), tmp_path)
+    assert plots.drawn == []
+
+    # release_year is read by the trends plot only
+    years = data.df.assign(release_year=data.df["release_year"] + 1)
+    plots.render(MovieData(df=years), tmp_path)
+    assert plots.drawn == ["trends"]
+
+    ratings = years.assign(
+        tomatometer_rating=years["tomatometer_rating"].to_numpy()[::-1]
+    )
+    plots.render(MovieData(df=ratings), tmp_path)
+    assert plots.drawn == ["heatmap", "trends"]
+
+
+def test_config_changes_invalidate_plots(data: MovieData, tmp_path: Path) -> None:
+    plots = _Plots()
+    plots.render(data, tmp_path)
+    plots.render(data, tmp_path, PlotConfig(dpi=30, figure_size=(2, 2)))
+    assert plots.drawn == ["heatmap", "trends"]
+
+
+def test_unreadable_manifest_costs_one_render(data: MovieData, tmp_path: Path) -> None:
+    plots = _Plots()
+    plots.render(data, tmp_path)
+    (tmp_path / MANIFEST_FILE).write_text("{not json")
+    plots.render(data, tmp_path)
+    assert plots.drawn == ["heatmap", "trends"]
+    plots.render(data, tmp_path)
+    assert plots.drawn == []
+
+
+def test_skipped_insights_return_the_stored_summary(
+    data: MovieData, tmp_path: Path
+) -> None:
+    first = generate_key_insights(data, tmp_path, ["md"], RenderCache(tmp_path))
+    report = tmp_path / "movie_insights.md"
+    # only rewritten reports lose the marker
+    report.write_text("marker")
+
+    again = generate_key_insights(
+        MovieData(df=data.df.copy()), tmp_path, ["md"], RenderCache(tmp_path)
+    )
+    assert report.read_text() == "marker"
+    assert again["top_rated"] == first["top_rated"]
+    assert all(isinstance(stat, GenreStats) for stat in again["genre_stats"])
+    assert [stat.genre for stat in again["genre_stats"]] == [
+        stat.genre for stat in first["genre_stats"]
+    ]
+
+    # another format set writes the report again, and so does force
+    generate_key_insights(data, tmp_path, ["md", "json"], RenderCache(tmp_path))
+    assert report.read_text() != "marker"
+    assert (tmp_path / "movie_insights.json").exists()
+    report.write_text("marker")
+    generate_key_insights(data, tmp_path, ["md", "json"], RenderCache(tmp_path))
+    assert report.read_text() == "marker"
+    generate_key_insights(
+        data, tmp_path, ["md", "json"], RenderCache(tmp_path, force=True)
+    )
+    assert report.read_text() != "marker"
@@ -0,0 +1,40 @@
+import dataclasses
+from pathlib import Path
+
+import matplotlib.pyplot as plt
+import pytest
+
+from src.data_analysis.visualization import plot_filename, save_plot
+from src.utils.types import PLOT_FORMATS, RENDER_PROFILES, PlotConfig, render_profile
+
+
+@pytest.mark.parametrize("name", sorted(RENDER_PROFILES))
+def test_profiles_resolve_to_valid_configs(name: str, tmp_path: Path) -> None:
+    config = render_profile(name)
+    fields = {field.name for field in dataclasses.fields(PlotConfig)}
+    assert set(RENDER_PROFILES[name]) <= fields
+    for field_name, value in RENDER_PROFILES[name].items():
+        assert getattr(config, field_name) == value
+    assert config.file_format in PLOT_FORMATS
+
+    # and save_plot can write with it
+    fig, ax = plt.subplots(figsize=(2, 2))
+    ax.scatter([1, 2, 3], [3, 1, 2], rasterized=config.rasterize_points)
+    save_plot(fig, "profile", tmp_path, dataclasses.replace(config, dpi=20))
+    assert (tmp_path / plot_filename("profile", config.file_format)).stat().st_size
+
+
+def test_final_is_the_default_config() -> None:
+    assert render_profile("final") == PlotConfig()
+
+
+def test_overrides_win_over_the_profile() -> None:
+    config = render_profile("preview", dpi=100, font_size=8)
+    assert (config.dpi, config.font_size, config.annotate_heatmap) == (100, 8, False)
+
+
+def test_unknown_profiles_and_formats_raise() -> None:
+    with pytest.raises(ValueError, match="Unknown render profile 'draft'"):
+        render_profile("draft")
+    with pytest.raises(ValueError, match="Unsupported plot format"):
+        render_profile("vector", file_format="gif")
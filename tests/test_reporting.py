@@ -0,0 +1,130 @@
+import csv
+import json
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_analysis.reporting import (
+    Report,
+    ReportError,
+    frame_table,
+    table_records,
+    write_report,
+)
+
+TITLES = [
+    'The "Quoted", Movie',
+    "Line\nbreak",
+    "<script>alert('x')</script> & Co",
+    "Pipe | Dream",
+    "Zażółć gęślą jaźń",
+]
+
+
+def _report() -> Report:
+    movies = pd.DataFrame(
+        {
+            "movie_title": TITLES,
+            "tomatometer_rating": [95.0, np.nan, 40.5, 12.0, 88.25],
+            "audience_count": pd.array([100, None, 3, 4, 5], dtype="UInt32"),
+            "genre": pd.Categorical(["Drama", "Comedy, Drama", None, "a,b", "<b>"]),
+        }
+    )
+    return Report(
+        'Insights "report" <1>',
+        [
+            frame_table("movies", "All movies", movies),
+            frame_table(
+                "empty",
+                "No rows",
+                movies.iloc[:0],
+                fields=[("movie_title", "Title")],
+            ),
+        ],
+    )
+
+
+class _Cells(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__()
+        self.rows: List[List[str]] = []
+        self.tags: List[str] = []
+        self._cell = False
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        self.tags.append(tag)
+        if tag == "tr":
+            self.rows.append([])
+        self._cell = tag in ("td", "th")
+        if self._cell:
+            self.rows[-1].append("")
+
+    def handle_endtag(self, tag: str) -> None:
+        self._cell = False
+
+    def handle_data(self, data: str) -> None:
+        if self._cell:
+            self.rows[-1][-1] += data
+
+
+def test_json_round_trip(tmp_path: Path) -> None:
+    report = _report()
+    (path,) = write_report(report, tmp_path / "report.md", ["json"])
+    assert json.loads(path.read_text(encoding="utf-8")) == {
+        "title": report.title,
+        "tables": {
+            table.key: {"title": table.title, "rows": table_records(table)}
+            for table in report.tables
+        },
+    }
+    records = table_records(report.tables[0])
+    assert records[1]["tomatometer_rating"] is None
+    assert records[1]["audience_count"] is None
+    assert records[2]["genre"] is None
+
+
+def test_csv_quotes_separators_and_newlines(tmp_path: Path) -> None:
+    paths = write_report(_report(), tmp_path / "report.md", ["csv"])
+    assert [path.name for path in paths] == ["report_movies.csv", "report_empty.csv"]
+    with open(paths[0], newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["movie_title", "tomatometer_rating", "audience_count", "genre"]
+    assert [row[0] for row in rows[1:]] == TITLES
+    assert rows[2][1:3] == ["", ""]
+    assert [row[3] for row in rows[1:]] == ["Drama", "Comedy, Drama", "", "a,b", "<b>"]
+    with open(paths[1], newline="", encoding="utf-8") as f:
+        assert list(csv.reader(f)) == [["Title"]]
+
+
+def test_html_escapes_titles_and_values(tmp_path: Path) -> None:
+    (path,) = write_report(_report(), tmp_path / "report.md", ["html"])
+    text = path.read_text(encoding="utf-8")
+    assert "<script>" not in text
+    assert "&lt;b&gt;" in text
+
+    parser = _Cells()
+    parser.feed(text)
+    assert "script" not in parser.tags and "b" not in parser.tags
+    header, *rows = parser.rows[:6]
+    assert header == ["movie_title", "tomatometer_rating", "audience_count", "genre"]
+    assert [row[0] for row in rows] == TITLES
+    assert rows[0][1:] == ["95.0", "100", "Drama"]
+    assert rows[1][1:] == ["", "", "Comedy, Drama"]
+    assert [row[3] for row in rows[2:]] == ["", "a,b", "<b>"]
+
+
+def test_markdown_escapes_pipes(tmp_path: Path) -> None:
+    (path,) = write_report(_report(), tmp_path / "report.md", ["md"])
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert lines[0] == '# Insights "report" <1>'
+    assert "| Pipe \\| Dream | 12.0 | 4 | a,b |" in lines
+
+
+def test_unknown_format(tmp_path: Path) -> None:
+    with pytest.raises(ReportError):
+        write_report(_report(), tmp_path / "report.md", ["md", "xlsx"])
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,78 @@
+import asyncio
+from typing import Tuple
+
+import pytest
+
+from src.data_analysis.server import (
+    MAX_BODY_BYTES,
+    MAX_K,
+    AnalysisServer,
+    BadRequest,
+    parse_query,
+)
+from src.utils.types import MovieData, PlotConfig
+
+
+def test_parse_query_defaults() -> None:
+    query = parse_query("/insights/top_rated", {"k": ["5"], "years": ["1990,1999"]})
+
+    assert (query.kind, query.name, query.k) == ("insights", "top_rated", 5)
+    assert query.filters.years == (1990, 1999)
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"k": [str(MAX_K + 1)]},
+        {"k": ["0"]},
+        {"threshold": ["nan"]},
+        {"threshold": ["inf"]},
+        {"tomatometer": ["nan,nan"]},
+        {"years": ["1990"]},
+    ],
+)
+def test_parse_query_rejects_out_of_range_numbers(params: dict) -> None:
+    with pytest.raises(BadRequest) as error:
+        parse_query("/insights", params)
+    assert error.value.status == 400
+
+
+def test_parse_query_unknown_path_is_404() -> None:
+    with pytest.raises(BadRequest) as error:
+        parse_query("/plots/nope", {})
+    assert error.value.status == 404
+
+
+async def _exchange(port: int, request: bytes) -> Tuple[int, bytes]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(request)
+    await writer.drain()
+    response = await reader.read()  # every error closes the connection
+    writer.close()
+    return int(response.split()[1]), response
+
+
+def _ask(data: MovieData, *requests: bytes) -> list:
+    async def _run() -> list:
+        server = AnalysisServer(data, PlotConfig(), plot_workers=0)
+        _, port = await server.start("127.0.0.1", 0)
+        try:
+            return [await _exchange(port, request) for request in requests]
+        finally:
+            server.close()
+
+    return asyncio.run(_run())
+
+
+def test_invalid_request_bodies_get_an_answer(movie_data: MovieData) -> None:
+    bad_length, huge, ok = _ask(
+        movie_data,
+        b"GET /insights HTTP/1.1\r\nContent-Length: abc\r\n\r\n",
+        f"GET /insights HTTP/1.1\r\nContent-Length: {MAX_BODY_BYTES + 1}\r\n"
+        "\r\n".encode(),
+        b"GET /insights/top_rated?k=3 HTTP/1.1\r\nConnection: close\r\n\r\n",
+    )
+
+    assert bad_length[0] == 400 and b"Content-Length" in bad_length[1]
+    assert huge[0] == 413
+    assert ok[0] == 200
@@ -0,0 +1,46 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import pytest
+
+from src.data_analysis.render_cache import PLOT_COLUMNS
+from src.data_analysis.shared_frame import (
+    SharedFrameError,
+    attach_movie_data,
+    init_worker,
+    share_movie_data,
+    worker_data,
+)
+from src.utils.types import MovieData
+
+
+def _columns() -> list:
+    return list(worker_data().df.columns)
+
+
+def _genre_counts() -> dict:
+    counts: dict = worker_data().df["genre"].value_counts().to_dict()
+    return counts
+
+
+def test_attach_round_trip(movie_data: MovieData) -> None:
+    with share_movie_data(movie_data) as shared:
+        attached = attach_movie_data(shared.descriptor)
+        pd.testing.assert_frame_equal(attached.df, movie_data.df)
+
+
+def test_worker_data_outside_a_pool() -> None:
+    with pytest.raises(SharedFrameError):
+        worker_data()
+
+
+def test_workers_attach_the_plot_columns(movie_data: MovieData) -> None:
+    with share_movie_data(movie_data, PLOT_COLUMNS) as shared, ProcessPoolExecutor(
+        max_workers=2, initializer=init_worker, initargs=(shared.descriptor,)
+    ) as pool:
+        columns, counts = (
+            pool.submit(_columns).result(),
+            pool.submit(_genre_counts).result(),
+        )
+    assert columns == list(PLOT_COLUMNS)
+    assert counts == movie_data.df["genre"].value_counts().to_dict()
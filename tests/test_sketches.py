@@ -0,0 +1,98 @@
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+import pytest
+from matplotlib import cbook
+
+from src.data_analysis.binning import RUNTIME_EDGES
+from src.data_analysis.sketches import (
+    SketchError,
+    boxplot_stats,
+    empty_sketch,
+    merge_sketches,
+    runtime_rating_sketches,
+    sketch_quantiles,
+    sketch_values,
+)
+from src.utils.types import MovieData
+
+BOX_KEYS = ("mean", "med", "q1", "q3", "iqr", "cilo", "cihi", "whislo", "whishi")
+
+
+def _ratings(
+    seed: int, rows: int = 3000, groups: int = 5
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    rng = np.random.default_rng(seed)
+    values = np.concatenate(
+        [rng.integers(0, 101, rows // 2), rng.integers(0, 1001, rows - rows // 2) / 10]
+    )
+    values[rng.choice(rows, 40, replace=False)] = np.nan
+    codes = rng.integers(-1, groups, rows)
+    codes[codes == 2] = 3  # group 2 stays empty
+    return values, codes, groups
+
+
+def test_quantiles_match_np_percentile() -> None:
+    values, codes, groups = _ratings(0)
+    q = [0, 0.1, 0.25, 0.5, 0.75, 0.99, 1]
+    quantiles = sketch_quantiles(sketch_values(values, codes, groups), q)
+    for group in range(groups):
+        own = values[(codes == group) & ~np.isnan(values)]
+        expected = (
+            np.percentile(own, np.multiply(q, 100))
+            if len(own)
+            else np.full(len(q), np.nan)
+        )
+        np.testing.assert_allclose(quantiles[group], expected, equal_nan=True)
+
+
+def test_boxplot_stats_match_matplotlib() -> None:
+    values, codes, groups = _ratings(1, rows=800)
+    values[:5], codes[:5] = [0, 0.1, 99.9, 100, 100], 0  # far outliers for the fliers
+    stats = boxplot_stats(sketch_values(values, codes, groups), labels=range(groups))
+    for group, box in enumerate(stats):
+        own = values[(codes == group) & ~np.isnan(values)]
+        if not len(own):
+            assert np.isnan(box["med"]) and len(box["fliers"]) == 0
+            continue
+        expected = cbook.boxplot_stats(own)[0]
+        for key in BOX_KEYS:
+            assert box[key] == pytest.approx(expected[key]), (group, key)
+        assert box["fliers"].tolist() == pytest.approx(
+            np.unique(expected["fliers"]).tolist()
+        )
+        assert box["label"] == group
+
+
+def test_fliers_are_capped_farthest_first() -> None:
+    values = np.concatenate(
+        [np.full(1000, 50.0), np.arange(0, 40), np.arange(61, 101)]
+    ).astype(np.float64)
+    box = boxplot_stats(
+        sketch_values(values, np.zeros(len(values), dtype=int), 1), max_fliers=10
+    )[0]
+    assert box["fliers"].tolist() == [0, 1, 2, 3, 4, 96, 97, 98, 99, 100]
+
+
+def test_merge_equals_one_sketch_of_everything() -> None:
+    values, codes, groups = _ratings(2)
+    half = len(values) // 2
+    merged = merge_sketches(
+        sketch_values(values[:half], codes[:half], groups),
+        sketch_values(values[half:], codes[half:], groups),
+    )
+    assert np.array_equal(merged.counts, sketch_values(values, codes, groups).counts)
+    with pytest.raises(SketchError):
+        merge_sketches(merged, empty_sketch(groups + 1))
+
+
+def test_runtime_groups_match_pd_cut(movie_data: MovieData) -> None:
+    df = movie_data.valid_runtime
+    sketches = runtime_rating_sketches(df)
+    groups = pd.cut(df["runtime_in_minutes"], RUNTIME_EDGES)
+    for col, sketch in sketches.items():
+        expected = df[col].groupby(groups, observed=False).median().to_numpy()
+        np.testing.assert_allclose(
+            sketch_quantiles(sketch, [0.5])[:, 0], expected, equal_nan=True
+        )
@@ -0,0 +1,32 @@
+from pathlib import Path
+from typing import Callable
+
+from benchmarks.bench_startup import PLOTTING_MODULES, run_command
+
+
+def test_insights_never_imports_plotting(
+    movies_csv: Path, tmp_path: Path, record_property: Callable[[str, object], None]
+) -> None:
+    cache_dir = tmp_path / "cache"
+    _, imports = run_command("insights", movies_csv, tmp_path / "insights", cache_dir)
+    assert "pandas" in imports  # the -X importtime report was parsed
+    assert not PLOTTING_MODULES & imports.keys()
+    assert (tmp_path / "insights" / "movie_insights.md").exists()
+    # the processed frame went to the given cache, not to data/.cache
+    assert any(cache_dir.iterdir())
+
+    _, plot_imports = run_command(
+        "plots",
+        movies_csv,
+        tmp_path / "plots",
+        cache_dir,
+        ["--render-profile", "preview"],
+    )
+    insights_seconds, plots_seconds = sum(imports.values()), sum(plot_imports.values())
+    record_property("insights_import_seconds", round(insights_seconds, 3))
+    record_property("plots_import_seconds", round(plots_seconds, 3))
+    # the lazy imports are the whole point: everything the plots import except the
+    # plotting libraries is shared, so insights starts faster by at least half of them
+    plotting_seconds = sum(plot_imports.get(module, 0) for module in PLOTTING_MODULES)
+    assert plotting_seconds > 0
+    assert insights_seconds < plots_seconds - plotting_seconds / 2
@@ -0,0 +1,47 @@
+import importlib
+import os
+import subprocess
+import sys
+
+from src.data_analysis.views import VIEW_MODULES
+from src.utils.config import ProjectConfig
+from src.utils.types import _VIEW_REGISTRY
+
+
+def test_every_view_is_registered_by_its_module() -> None:
+    for name, module in VIEW_MODULES.items():
+        importlib.import_module(module)
+        assert _VIEW_REGISTRY[name].__module__ == module, name
+
+
+def test_every_registered_view_can_be_found() -> None:
+    for module in set(VIEW_MODULES.values()):
+        importlib.import_module(module)
+    unlisted = {
+        name
+        for name, func in _VIEW_REGISTRY.items()
+        if name not in VIEW_MODULES and func.__module__ != "src.utils.types"
+    }
+    assert not unlisted
+
+
+def test_views_load_their_module_on_first_use() -> None:
+    code = (
+        "import sys, pandas as pd\n"
+        "from src.utils.types import MovieData\n"
+        'assert "src.data_analysis.aggregation" not in sys.modules\n'
+        'data = MovieData(df=pd.DataFrame({"genre": ["Drama, Comedy", "Drama"],\n'
+        '    "tomatometer_rating": [50.0, 70.0], "audience_rating": [60.0, 80.0],\n'
+        '    "runtime_in_minutes": [90.0, 100.0]}))\n'
+        'stats = data.view("genre_aggregates")\n'
+        'print(stats.loc["Drama", ("tomatometer_rating", "mean")])\n'
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ProjectConfig.PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": str(ProjectConfig.PROJECT_ROOT)},
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "60.0"